@@ -0,0 +1,172 @@
+"""
+Async MongoDB Handler for SynapseChat Bot
+Runs MongoDBHandler operations on a dedicated bounded executor so coroutines never block the gateway loop
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+
+class AsyncMongoDBHandler:
+    """Awaitable facade over MongoDBHandler with the same method surface"""
+
+    def __init__(self, handler, max_workers: int = None, max_pending: int = None):
+        self.handler = handler
+        self.max_workers = max_workers or int(os.environ.get('MONGODB_EXECUTOR_WORKERS', 8))
+        self.max_pending = max_pending or int(os.environ.get('MONGODB_MAX_PENDING', self.max_workers * 16))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="MongoIO")
+        self._slots = None  # asyncio.Semaphore created lazily on the running loop
+
+        # Statistics
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+
+    @property
+    def db(self):
+        """Raw database handle (for callers that still need direct collection access)"""
+        return self.handler.db
+
+    @property
+    def connection_failed(self) -> bool:
+        return self.handler.connection_failed
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database callable on the executor and await its result"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        queued_at = time.perf_counter()
+        async with self._slots:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+            def timed_call():
+                started_at = time.perf_counter()
+                self.total_wait_time += started_at - queued_at
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.total_run_time += time.perf_counter() - started_at
+
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, timed_call)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    # Channel operations
+
+    async def get_crosschat_channels(self) -> List[int]:
+        return await self.run(self.handler.get_crosschat_channels)
+
+    async def get_crosschat_channel_records(self) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_crosschat_channel_records)
+
+    async def add_crosschat_channel(self, channel_id: int, guild_id: int, channel_name: str = None, guild_name: str = None) -> bool:
+        return await self.run(self.handler.add_crosschat_channel, channel_id, guild_id, channel_name, guild_name)
+
+    # Message operations
+
+    async def get_crosschat_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.handler.get_crosschat_message, message_id)
+
+    async def update_crosschat_message(self, message_id: str, new_content: str) -> bool:
+        return await self.run(self.handler.update_crosschat_message, message_id, new_content)
+
+    async def log_crosschat_message(self, message_data: Dict[str, Any]) -> bool:
+        return await self.run(self.handler.log_crosschat_message, message_data)
+
+    async def bulk_upsert_crosschat_messages(self, documents: Dict[str, Dict[str, Any]]) -> bool:
+        return await self.run(self.handler.bulk_upsert_crosschat_messages, documents)
+
+    async def track_sent_message(self, cc_id: str, channel_id: str, sent_message_id: str) -> bool:
+        return await self.run(self.handler.track_sent_message, cc_id, channel_id, sent_message_id)
+
+    async def track_sent_messages(self, cc_id: str, entries: List[tuple]) -> bool:
+        return await self.run(self.handler.track_sent_messages, cc_id, entries)
+
+    async def get_sent_messages_by_cc_id(self, cc_id: str) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_sent_messages_by_cc_id, cc_id)
+
+    async def get_chatlog_count(self) -> int:
+        return await self.run(self.handler.get_chatlog_count)
+
+    async def get_message_count(self) -> int:
+        return await self.run(self.handler.get_message_count)
+
+    async def count_documents(self, collection_name: str, query: Dict[str, Any] = None) -> int:
+        return await self.run(self.handler.count_documents, collection_name, query)
+
+    # Alert operations
+
+    async def get_pending_alerts(self) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_pending_alerts)
+
+    async def mark_alert_processed(self, alert_id) -> bool:
+        return await self.run(self.handler.mark_alert_processed, alert_id)
+
+    # Moderation operations
+
+    async def log_moderation_action(self, action_data: Dict[str, Any]) -> bool:
+        return await self.run(self.handler.log_moderation_action, action_data)
+
+    async def add_warning(self, user_id: str, moderator_id: str, reason: str, guild_id: str = None) -> bool:
+        return await self.run(self.handler.add_warning, user_id, moderator_id, reason, guild_id)
+
+    async def ban_user(self, user_id: str, moderator_id: str, reason: str, duration: str = "permanent") -> bool:
+        return await self.run(self.handler.ban_user, user_id, moderator_id, reason, duration)
+
+    async def get_automod_profiles(self) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_automod_profiles)
+
+    async def save_automod_profile(self, profile: Dict[str, Any]) -> bool:
+        return await self.run(self.handler.save_automod_profile, profile)
+
+    async def get_violation_ledger(self) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_violation_ledger)
+
+    async def bulk_upsert_violation_ledger(self, documents: Dict[str, Dict[str, Any]]) -> bool:
+        return await self.run(self.handler.bulk_upsert_violation_ledger, documents)
+
+    async def get_user_warnings(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self.run(self.handler.get_user_warnings, user_id)
+
+    async def is_user_banned(self, user_id: str) -> bool:
+        return await self.run(self.handler.is_user_banned, user_id)
+
+    # Guild operations
+
+    async def remove_guild_data(self, guild_id: str) -> bool:
+        return await self.run(self.handler.remove_guild_data, guild_id)
+
+    async def cleanup_guild_data(self, guild_id: str) -> bool:
+        return await self.run(self.handler.cleanup_guild_data, guild_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        completed = max(self.calls - self.in_flight, 1)
+        return {
+            'workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'calls': self.calls,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'avg_queue_wait_ms': round(self.total_wait_time / completed * 1000, 2),
+            'avg_run_time_ms': round(self.total_run_time / completed * 1000, 2),
+            'health': self.handler.get_health_stats()
+        }
+
+    def shutdown(self):
+        """Shut down the database executor"""
+        self._executor.shutdown(wait=False)
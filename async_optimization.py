@@ -4,11 +4,56 @@ Advanced async patterns for maximum bot performance
 """
 
 import asyncio
+import os
+import random
 import time
 from typing import List, Dict, Any, Callable, Optional
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
+from delivery_scheduler import delivery_scheduler
+
+class RateLimitBucket:
+    """Token bucket seeded with Discord's documented limit and corrected from rate-limit headers"""
+    
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+    
+    async def acquire(self, sleep: Callable[[float], Any] = asyncio.sleep) -> float:
+        """Take a token, sleeping until the bucket resets if it is empty. Returns seconds waited"""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.per
+            if self.remaining > 0:
+                self.remaining -= 1
+                return waited
+            delay = self.reset_at - now
+            waited += delay
+            await sleep(delay)
+    
+    def update_from_headers(self, headers):
+        """Adopt X-RateLimit-Limit / Remaining / Reset-After from a Discord response"""
+        try:
+            if 'X-RateLimit-Limit' in headers:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset-After' in headers:
+                self.reset_at = time.monotonic() + float(headers['X-RateLimit-Reset-After'])
+        except (TypeError, ValueError):
+            pass
+    
+    def block(self, retry_after: float):
+        """Empty the bucket until retry_after has elapsed (after a 429)"""
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, time.monotonic() + retry_after)
+
 class AsyncOptimizer:
     """Advanced async optimization patterns for bot performance"""
     
@@ -16,49 +61,171 @@ class AsyncOptimizer:
         self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="BotOptim")
         self._background_tasks = set()
         
+        # Fan-out engine configuration
+        self.fanout_window = int(os.environ.get('FANOUT_WINDOW', 10))
+        self.max_retries = int(os.environ.get('FANOUT_MAX_RETRIES', 3))
+        self.retry_base = float(os.environ.get('FANOUT_RETRY_BASE', 0.5))
+        self.channel_limit = int(os.environ.get('FANOUT_CHANNEL_LIMIT', 5))      # messages per channel ...
+        self.channel_period = float(os.environ.get('FANOUT_CHANNEL_PERIOD', 5))  # ... per N seconds
+        self.global_bucket = RateLimitBucket(int(os.environ.get('FANOUT_GLOBAL_LIMIT', 50)), 1.0)
+        self._channel_buckets: Dict[int, RateLimitBucket] = {}
+        # Reactions use their own per-channel route bucket
+        self.reaction_limit = int(os.environ.get('FANOUT_REACTION_LIMIT', 1))
+        self.reaction_period = float(os.environ.get('FANOUT_REACTION_PERIOD', 0.25))
+        self._reaction_buckets: Dict[int, RateLimitBucket] = {}
+        # DMs are spread over a fixed set of route ids, each shared by many users - its own, looser bucket
+        self.dm_limit = int(os.environ.get('FANOUT_DM_LIMIT', 10))
+        self.dm_period = float(os.environ.get('FANOUT_DM_PERIOD', 1))
+        self._dm_buckets: Dict[int, RateLimitBucket] = {}
+        
+        # Fan-out statistics
+        self.fanout_stats = {
+            'sends': 0, 'succeeded': 0, 'failed': 0, 'retries': 0,
+            'rate_limited': 0, 'server_errors': 0, 'bucket_wait': 0.0
+        }
+        
+    def _channel_bucket(self, channel_id: int) -> RateLimitBucket:
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = RateLimitBucket(self.channel_limit, self.channel_period)
+            self._channel_buckets[channel_id] = bucket
+        return bucket
+    
+    def _reaction_bucket(self, channel_id: int) -> RateLimitBucket:
+        bucket = self._reaction_buckets.get(channel_id)
+        if bucket is None:
+            bucket = RateLimitBucket(self.reaction_limit, self.reaction_period)
+            self._reaction_buckets[channel_id] = bucket
+        return bucket
+    
+    def _dm_bucket(self, route_id: int) -> RateLimitBucket:
+        bucket = self._dm_buckets.get(route_id)
+        if bucket is None:
+            bucket = RateLimitBucket(self.dm_limit, self.dm_period)
+            self._dm_buckets[route_id] = bucket
+        return bucket
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, self.retry_base * (2 ** attempt))
+    
+    async def deliver(self, channel, send: Callable[[], Any], use_global: bool = True,
+                      reaction: bool = False, dm: bool = False) -> Dict[str, Any]:
+        """Send to one channel through its rate-limit buckets, retrying 429 / 5xx with jitter.
+        
+        send is called again on every attempt, so it must build fresh discord.File objects.
+        use_global=False skips the bot's global bucket (webhook executions have their own).
+        reaction=True uses the channel's reaction bucket instead of its message bucket.
+        dm=True treats channel.id as a DM route id and uses the DM bucket. A route is shared by many users,
+        so one user's DM rate-limit headers are not applied to it - the retry backoff alone handles a 429.
+        Returns a per-destination outcome dict.
+        Bucket and backoff waits go through delivery_scheduler.pause, so a scheduled job does not
+        hold its delivery slot while it waits.
+        """
+        import discord
+        
+        if dm:
+            bucket = self._dm_bucket(channel.id)
+        elif reaction:
+            bucket = self._reaction_bucket(channel.id)
+        else:
+            bucket = self._channel_bucket(channel.id)
+        started = time.perf_counter()
+        outcome = {'channel_id': str(channel.id), 'success': False, 'attempts': 0, 'status': 'failed'}
+        self.fanout_stats['sends'] += 1
+        
+        for attempt in range(self.max_retries + 1):
+            outcome['attempts'] = attempt + 1
+            self.fanout_stats['bucket_wait'] += await bucket.acquire(delivery_scheduler.pause)
+            if use_global:
+                self.fanout_stats['bucket_wait'] += await self.global_bucket.acquire(delivery_scheduler.pause)
+            try:
+                outcome['result'] = await send()
+                outcome['success'] = True
+                outcome['status'] = 'sent'
+                break
+            except discord.RateLimited as e:
+                # Raised instead of sleeping when the wait exceeds the client's max_ratelimit_timeout
+                self.fanout_stats['rate_limited'] += 1
+                if not dm:
+                    bucket.block(e.retry_after)
+                outcome['status'] = 'rate_limited'
+                outcome['error'] = str(e)
+                delay = e.retry_after + self._backoff(attempt)
+            except discord.HTTPException as e:
+                headers = getattr(e.response, 'headers', None) or {}
+                outcome['error'] = str(e)
+                if e.status == 429:
+                    self.fanout_stats['rate_limited'] += 1
+                    retry_after = float(headers.get('Retry-After', 1.0))
+                    if headers.get('X-RateLimit-Global') or headers.get('X-RateLimit-Scope') == 'global':
+                        self.global_bucket.block(retry_after)
+                    elif not dm:
+                        bucket.update_from_headers(headers)
+                        bucket.block(retry_after)
+                    outcome['status'] = 'rate_limited'
+                    delay = retry_after + self._backoff(attempt)
+                elif e.status >= 500:
+                    self.fanout_stats['server_errors'] += 1
+                    outcome['status'] = 'server_error'
+                    delay = self._backoff(attempt)
+                else:
+                    # 403 / 404 / 400 - retrying will not help
+                    if not dm:
+                        bucket.update_from_headers(headers)
+                    outcome['status'] = 'forbidden' if e.status == 403 else 'not_found' if e.status == 404 else 'rejected'
+                    break
+            except (asyncio.TimeoutError, OSError) as e:
+                outcome['status'] = 'network_error'
+                outcome['error'] = str(e)
+                delay = self._backoff(attempt)
+            except Exception as e:
+                outcome['error'] = str(e)
+                break
+            
+            if attempt < self.max_retries:
+                self.fanout_stats['retries'] += 1
+                await delivery_scheduler.pause(delay)
+        
+        outcome['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        if outcome['success']:
+            self.fanout_stats['succeeded'] += 1
+        else:
+            self.fanout_stats['failed'] += 1
+            print(f"ASYNC_OPT: Delivery to channel {channel.id} failed after {outcome['attempts']} attempts ({outcome['status']}): {outcome.get('error')}")
+        return outcome
+        
     async def parallel_channel_distribution(self, channels: List, message_data: Dict[str, Any], 
-                                          send_func: Callable) -> List[Dict[str, Any]]:
-        """Distribute messages to multiple channels in parallel"""
+                                          send_func: Callable, window: int = None) -> List[Dict[str, Any]]:
+        """Distribute messages to multiple channels concurrently within a bounded window.
+        
+        Returns one outcome dict per channel (same order as channels).
+        """
         if not channels:
             return []
         
-        # Create tasks for parallel execution
-        tasks = []
-        for channel in channels:
-            task = asyncio.create_task(
-                self._safe_channel_send(channel, message_data, send_func)
-            )
-            tasks.append(task)
-        
-        # Execute all sends simultaneously
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        slots = asyncio.Semaphore(window or self.fanout_window)
         
-        # Process results
-        successful_sends = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                print(f"ASYNC_OPT: Failed to send to channel {channels[i]}: {result}")
-            else:
-                successful_sends.append(result)
+        async def send_one(channel):
+            async with slots:
+                return await self._safe_channel_send(channel, message_data, send_func)
         
-        return successful_sends
+        return await asyncio.gather(*(send_one(channel) for channel in channels))
     
     async def _safe_channel_send(self, channel, message_data: Dict[str, Any], 
                                send_func: Callable) -> Optional[Dict[str, Any]]:
-        """Safely send message to a channel with error handling"""
-        try:
-            result = await send_func(channel, message_data)
-            return {
-                'channel_id': str(channel.id),
-                'success': True,
-                'result': result
-            }
-        except Exception as e:
-            return {
-                'channel_id': str(channel.id),
-                'success': False,
-                'error': str(e)
-            }
+        """Safely send message to a channel with rate limiting, retries and error handling"""
+        return await self.deliver(channel, lambda: send_func(channel, message_data))
+    
+    def get_fanout_stats(self) -> Dict[str, Any]:
+        """Get fan-out engine statistics"""
+        return {
+            **self.fanout_stats,
+            'bucket_wait': round(self.fanout_stats['bucket_wait'], 3),
+            'window': self.fanout_window,
+            'channel_buckets': len(self._channel_buckets),
+            'dm_buckets': len(self._dm_buckets)
+        }
     
     def background_task(self, coro):
         """Execute coroutine as background task without blocking"""
@@ -138,28 +305,22 @@ class MessageProcessingOptimizer:
         """Optimized crosschat message distribution with performance tracking"""
         start_time = time.time()
         
-        async def send_to_channel(channel):
-            """Send embed to single channel"""
-            try:
-                import discord
-                
-                embed = discord.Embed(
-                    description=embed_data.get('description', ''),
-                    color=embed_data.get('color', 0x3498db)
+        async def send_to_channel(channel, embed_data):
+            """Send embed to single channel (errors are handled by the fan-out engine)"""
+            import discord
+            
+            embed = discord.Embed(
+                description=embed_data.get('description', ''),
+                color=embed_data.get('color', 0x3498db)
+            )
+            
+            if embed_data.get('author'):
+                embed.set_author(
+                    name=embed_data['author'].get('name', ''),
+                    icon_url=embed_data['author'].get('icon_url', '')
                 )
-                
-                if embed_data.get('author'):
-                    embed.set_author(
-                        name=embed_data['author'].get('name', ''),
-                        icon_url=embed_data['author'].get('icon_url', '')
-                    )
-                
-                message = await channel.send(embed=embed)
-                return message
-                
-            except Exception as e:
-                print(f"SEND_OPT: Failed to send to {channel.id}: {e}")
-                return None
+            
+            return await channel.send(embed=embed)
         
         # Execute parallel distribution
         results = await self.async_optimizer.parallel_channel_distribution(
@@ -0,0 +1,155 @@
+"""
+Attachment Fan-Out
+Downloads each crosschat attachment once into a shared buffer and hands every destination a cheap view
+"""
+
+import io
+import os
+import tempfile
+from typing import List, Dict, Any, Optional
+
+import aiohttp
+import discord
+
+class SharedAttachment:
+    """One downloaded attachment - immutable bytes in memory or a spooled temp file"""
+
+    def __init__(self, attachment, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.filename = attachment.filename
+        self.url = attachment.url
+        self.size = attachment.size
+        self.spoiler = attachment.is_spoiler()
+        self.description = attachment.description
+        self.data = data
+        self.path = path
+
+    def open(self) -> discord.File:
+        """Create a discord.File over the shared buffer (BytesIO shares the bytes until written)"""
+        if self.path:
+            fp = open(self.path, 'rb')
+        else:
+            fp = io.BytesIO(self.data)
+        return discord.File(fp, filename=self.filename, spoiler=self.spoiler, description=self.description)
+
+class AttachmentBundle:
+    """Attachments of one crosschat message, shared by every destination send"""
+
+    def __init__(self):
+        self.shared: List[SharedAttachment] = []
+        self.links: List[Any] = []  # attachments delivered as links only (oversized / download failed)
+
+    def files_for(self, channel) -> List[discord.File]:
+        """Fresh file views for one send, limited to the destination guild's upload limit"""
+        limit = getattr(getattr(channel, 'guild', None), 'filesize_limit', None)
+        files, total = [], 0
+        for shared in self.shared:
+            if limit and total + shared.size > limit:
+                continue
+            total += shared.size
+            files.append(shared.open())
+        return files
+
+    def links_for(self, channel) -> Optional[str]:
+        """Link-only fallback text for attachments this destination cannot receive as files"""
+        limit = getattr(getattr(channel, 'guild', None), 'filesize_limit', None)
+        urls = [attachment.url for attachment in self.links]
+        total = 0
+        for shared in self.shared:
+            if limit and total + shared.size > limit:
+                urls.append(shared.url)
+                continue
+            total += shared.size
+        if not urls:
+            return None
+        return "📎 " + "\n📎 ".join(urls)
+
+    def cleanup(self):
+        """Remove spooled temp files once every destination has been served"""
+        for shared in self.shared:
+            if shared.path:
+                try:
+                    os.unlink(shared.path)
+                except OSError:
+                    pass
+        self.shared = []
+
+class AttachmentFanout:
+    """Fetch-once attachment preparation with temp-file spooling and a size cap"""
+
+    def __init__(self):
+        self.max_bytes = int(os.environ.get('ATTACHMENT_MAX_BYTES', 25 * 1024 * 1024))
+        self.spool_bytes = int(os.environ.get('ATTACHMENT_SPOOL_BYTES', 1024 * 1024))
+        self.chunk_size = 64 * 1024
+        self._session = None
+
+        # Statistics
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.spooled = 0
+        self.link_only = 0
+        self.failed = 0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def _spool(self, attachment) -> str:
+        """Stream a large attachment to a temp file so RSS stays bounded"""
+        session = await self._get_session()
+        fd, path = tempfile.mkstemp(prefix='synapse_att_', suffix=os.path.splitext(attachment.filename)[1])
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                async with session.get(attachment.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        fp.write(chunk)
+        except Exception:
+            os.unlink(path)
+            raise
+        return path
+
+    async def prepare(self, message, download: bool = True) -> AttachmentBundle:
+        """Download every attachment of a message once (or mark it link-only)"""
+        bundle = AttachmentBundle()
+        for attachment in message.attachments:
+            if not download or attachment.size > self.max_bytes:
+                bundle.links.append(attachment)
+                self.link_only += 1
+                if download:
+                    print(f"ATTACHMENT: {attachment.filename} ({attachment.size} bytes) over cap - sending link only")
+                continue
+            try:
+                if attachment.size > self.spool_bytes:
+                    shared = SharedAttachment(attachment, path=await self._spool(attachment))
+                    self.spooled += 1
+                else:
+                    shared = SharedAttachment(attachment, data=await attachment.read())
+                bundle.shared.append(shared)
+                self.downloads += 1
+                self.bytes_downloaded += attachment.size
+                print(f"ATTACHMENT: Prepared {attachment.filename} once for all destinations")
+            except Exception as e:
+                self.failed += 1
+                bundle.links.append(attachment)
+                print(f"ATTACHMENT_ERROR: Failed to download {attachment.filename}, sending link only: {e}")
+        return bundle
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get attachment fan-out statistics"""
+        return {
+            'downloads': self.downloads,
+            'bytes_downloaded': self.bytes_downloaded,
+            'spooled': self.spooled,
+            'link_only': self.link_only,
+            'failed': self.failed,
+            'max_bytes': self.max_bytes,
+            'spool_bytes': self.spool_bytes
+        }
+
+# Global attachment fan-out instance
+attachment_fanout = AttachmentFanout()
@@ -1,15 +1,33 @@
 """
 Auto Moderation Manager - Self-Hosted Version
 Simplified moderation system for self-hosted deployments
-"""Add commentMore actions
+"""
 
 import asyncio
+import hashlib
 import json
+import multiprocessing
+import os
 import re
 import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 
+from automod_rules import RuleProfile, RuleProfileStore
+from bounded_cache import BoundedCache
+from domain_policy import extract_hosts
+from notice_scheduler import notice_scheduler
+from pattern_set import merge_spans, scan_categories, is_pattern_safe
+from violation_ledger import violation_ledger
+
+# Sliding windows (seconds) and the most timestamps kept per window
+SPAM_WINDOW = 10
+DUPLICATE_WINDOW = 60
+WINDOW_HISTORY_MAX = 100
+
 class AutoModerationManager:
     """Simplified auto-moderation for self-hosted bot"""
     
@@ -24,8 +42,8 @@ class AutoModerationManager:
         else:
             self.db_handler = None
         
-        # Basic moderation settings
-        self.settings = {
+        # Built-in moderation settings (live settings come from the rule profiles)
+        self.base_settings = {
             'spam_threshold': 5,  # messages per 10 seconds
             'duplicate_threshold': 3,  # same message count
             'caps_threshold': 70,  # percentage of caps
@@ -34,25 +52,48 @@ class AutoModerationManager:
             'profanity_filter': True
         }
         
-        # Spam tracking
-        self.user_message_history = {}
-        self.duplicate_messages = {}
-        
-        # 15-minute TTL regex cache for performance optimization
-        self.regex_cache = {}
-        self.cache_ttl = 900  # 15 minutes in seconds
-        self.last_cache_update = {}  # Track per-pattern update times
-        
-        # Automod violation tracking for automatic warnings/bans
-        self.automod_violations = {}  # Track violations per user
+        # Spam tracking - per-user / per-(user, content hash) deques of monotonic timestamps.
+        # Entries idle for a whole window expire, the sweeper drops them, and each tracker is size-capped
+        tracker_max = int(os.environ.get('AUTOMOD_TRACKER_MAX', 50000))
+        self.user_message_history = BoundedCache(max_size=tracker_max, ttl=SPAM_WINDOW, name="spam_windows")
+        self.duplicate_messages = BoundedCache(max_size=tracker_max, ttl=DUPLICATE_WINDOW, name="duplicate_windows")
+        self.sweep_interval = int(os.environ.get('AUTOMOD_SWEEP_INTERVAL', 60))
+        self._last_sweep = time.monotonic()
+        
+        # Content-only verdicts keyed by rule profile version and content hash - raids repeat the same
+        # text across accounts and guilds. Per-user checks (spam, duplicates) are never cached
+        self.verdict_cache = BoundedCache(
+            max_size=int(os.environ.get('AUTOMOD_VERDICT_CACHE_MAX', 10000)),
+            ttl=int(os.environ.get('AUTOMOD_VERDICT_CACHE_TTL', 900)),
+            name="automod_verdicts"
+        )
+        
+        # Per-message CPU budget: short messages are scanned inline, long ones in a worker process
+        # that is killed on timeout (regex matching cannot be interrupted on the event loop thread)
+        self.inline_scan_chars = int(os.environ.get('AUTOMOD_INLINE_MAX_CHARS', 1000))
+        self.scan_timeout = int(os.environ.get('AUTOMOD_SCAN_TIMEOUT_MS', 250)) / 1000
+        self.scan_workers = int(os.environ.get('AUTOMOD_SCAN_WORKERS', 2))
+        self.worker_pool: Optional[ProcessPoolExecutor] = None
+        self._worker_warmup = []
+        self._worker_slots: Optional[asyncio.Semaphore] = None
+        self.inline_scans = 0
+        self.worker_scans = 0
+        self.scan_timeouts = 0
+        self.rejected_patterns = 0
+        
+        # Automod violation tracking for automatic warnings/bans - decayed per-user counts,
+        # escalated in memory and flushed to MongoDB in batches
+        self.violation_ledger = violation_ledger
         self.violation_threshold = 3  # Violations before formal warning
         self.warning_threshold = 3   # Warnings before ban
         self.ban_duration_minutes = 20  # Ban duration in minutes
+        self.violation_ledger.violations_per_warning = self.violation_threshold
         
         # Whitelist system for users who bypass automod
         self.whitelisted_users = set()  # User IDs that bypass all automod checks
         self.whitelisted_roles = set()  # Role IDs that bypass all automod checks
         
+        # Built-in pattern lists - the base every rule profile is compiled from
         # Comprehensive profanity patterns using regex
         self.profanity_patterns = [
             r'^[a@][s\$][s\$]$',
@@ -109,7 +150,7 @@ class AutoModerationManager:
             r'j[i1][s\$z][s\$z]?m?',
             r'[ck][o0]ndum[s\$]?',
             r'mast(e|ur)b(8|ait|ate)',
-            r'n+[i1]+[gq]+[e3]*r+[s\$]*',
+            r'n[i1]+[gq]+[e3]*r',  # was n+[i1]+[gq]+[e3]*r+[s\$]* - same matches, leading n+ backtracked quadratically
             r'[o0]rg[a@][s\$][i1]m[s\$]?',
             r'[o0]rg[a@][s\$]m[s\$]?',
             r'p[e3]nn?[i1][s\$]',
@@ -151,7 +192,7 @@ class AutoModerationManager:
             # ZIP codes
             r'\b\d{5}(-\d{4})?\b',  # 12345 or 12345-6789
             # City, State combinations
-            r'\b[A-Za-z\s]+,\s*[A-Z]{2}\s*\d{5}\b',  # City, ST 12345
+            r'\b[A-Za-z\s]{1,40},\s*[A-Z]{2}\s*\d{5}\b',  # City, ST 12345 (bounded - unbounded run was quadratic)
             # PO Box
             r'\b(po|p\.o\.)\s*box\s*\d+\b',
             # Common residential terms
@@ -159,6 +200,13 @@ class AutoModerationManager:
             r'\b\d+\s+(main|north|south|east|west|n|s|e|w)\s+[A-Za-z\s]+(street|st|avenue|ave|road|rd)\b',
         ]
         
+        # Link domain policy - allowed domains pass the link filter, denied ones are always blocked.
+        # Subdomains are covered; add more per guild with add_link_domains
+        self.link_domains = {
+            'allow': [],
+            'deny': []
+        }
+        
         # Link patterns
         self.link_patterns = [
             r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
@@ -171,41 +219,206 @@ class AutoModerationManager:
             r'discordapp\.com/invite/[a-zA-Z0-9]+',
             r'discord\.com/invite/[a-zA-Z0-9]+'
         ]
+        
+        # Content categories scanned together, in the order violations are reported
+        # (category, pattern list attribute, settings toggle, action, reason, details)
+        self.content_categories = [
+            ('link', 'link_patterns', 'link_filter', 'delete', 'unauthorized_link', 'Links not allowed in this channel'),
+            ('invite', 'invite_patterns', 'invite_filter', 'delete', 'discord_invite', 'Discord invites not allowed'),
+            ('profanity', 'profanity_patterns', 'profanity_filter', 'delete', 'profanity_detected', 'Message contains inappropriate language'),
+            ('phone', 'phone_patterns', None, 'delete', 'phone_number_detected', 'Phone numbers are not allowed for privacy protection'),
+            ('address', 'address_patterns', None, 'delete', 'address_detected', 'Home addresses are not allowed for privacy protection')
+        ]
+        
+        # Versioned default + per-guild rule profiles, each compiled once (loaded from MongoDB by load_rule_profiles)
+        self.rules = RuleProfileStore(
+            self.base_settings,
+            {category: getattr(self, patterns_attr) for category, patterns_attr, *_ in self.content_categories},
+            [(category, toggle) for category, _, toggle, *_ in self.content_categories],
+            pattern_filter=self._safe_patterns,
+            base_domains=self.link_domains
+        )
     
-    def _get_cached_regex(self, pattern_key: str, pattern: str) -> Optional[re.Pattern]:
+    @property
+    def settings(self):
+        """Live default settings (read-only - change them with update_settings)"""
+        return self.rules.default.settings
+    
+    def load_rule_profiles(self) -> int:
+        """Load the latest published rule profiles from MongoDB"""
+        return self.rules.load(self.db_handler)
+    
+    def scan_content(self, content: str, profile: RuleProfile = None) -> List[Dict[str, Any]]:
         """
-        Get compiled regex pattern from cache with 15-minute TTL
-        Returns fresh pattern if cache expired or doesn't exist
+        Evaluate every content category in one pass over the message
+        Returns all violations (with match spans) in reporting order
         """
-        current_time = time.time()
-        
-        # Check if pattern exists in cache and is still valid
-        if (pattern_key in self.regex_cache and 
-            pattern_key in self.last_cache_update and
-            current_time - self.last_cache_update[pattern_key] < self.cache_ttl):
-            return self.regex_cache[pattern_key]
-        
-        # Compile new pattern and cache it
-        try:
-            compiled_pattern = re.compile(pattern, re.IGNORECASE)
-            self.regex_cache[pattern_key] = compiled_pattern
-            self.last_cache_update[pattern_key] = current_time
-            return compiled_pattern
-        except re.error:
-            # Fallback to simple string matching if regex is invalid
-            return None
-    
-    def _invalidate_cache(self, pattern_key: str = None):
+        if not content:
+            return []
+        profile = profile or self.rules.default
+        return self._caps_violations(content, profile.settings) + self._pattern_violations(content, profile.scanner.scan(content), profile)
+    
+    async def scan_content_bounded(self, content: str, profile: RuleProfile = None) -> List[Dict[str, Any]]:
         """
-        Invalidate specific pattern or all cached patterns
-        Used when automod rules are updated
+        scan_content within the per-message CPU budget
+        Long messages are scanned in a worker process; a scan that times out fails closed
+        Verdicts are cached by content hash, so repeated text is scanned once
         """
-        if pattern_key:
-            self.regex_cache.pop(pattern_key, None)
-            self.last_cache_update.pop(pattern_key, None)
+        if not content:
+            return []
+        profile = profile or self.rules.default
+        # Profiles are immutable, so their key makes verdicts of replaced rule versions unreachable
+        key = (profile.key, hashlib.blake2b(content.encode(), digest_size=16).digest())
+        cached = self.verdict_cache.get(key)
+        if cached is not None:
+            return [dict(violation) for violation in cached]
+        
+        if len(content) <= self.inline_scan_chars:
+            self.inline_scans += 1
+            violations = self.scan_content(content, profile)
         else:
-            self.regex_cache.clear()
-            self.last_cache_update.clear()
+            self.worker_scans += 1
+            spans = await self._scan_in_worker(content, profile)
+            if spans is None:
+                self.scan_timeouts += 1
+                print(f"AUTOMOD: Scan of {len(content)}-character message exceeded {int(self.scan_timeout * 1000)}ms - blocking it")
+                # Not cached - a timeout says nothing final about the content
+                return self._caps_violations(content, profile.settings) + [{
+                    'category': 'scan_timeout',
+                    'action': 'delete',
+                    'reason': 'scan_timeout',
+                    'details': 'Message could not be checked in time',
+                    'spans': [(0, len(content))]
+                }]
+            violations = self._caps_violations(content, profile.settings) + self._pattern_violations(content, spans, profile)
+        
+        self.verdict_cache.set(key, tuple(dict(violation) for violation in violations))
+        return violations
+    
+    async def _scan_in_worker(self, content: str, profile: RuleProfile) -> Optional[Dict[str, List[Tuple[int, int]]]]:
+        """Pattern scan in the worker pool - None if it timed out"""
+        categories = profile.categories
+        if self._worker_slots is None:
+            self._worker_slots = asyncio.Semaphore(self.scan_workers)
+        
+        # Only running scans count against the timeout - waiting for a free worker does not
+        async with self._worker_slots:
+            for _ in range(2):
+                pool = self._get_worker_pool()
+                if self._worker_warmup:
+                    warmup, self._worker_warmup = self._worker_warmup, []
+                    try:
+                        await asyncio.wait_for(
+                            asyncio.gather(*[asyncio.wrap_future(future) for future in warmup], return_exceptions=True),
+                            timeout=10
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.get_running_loop().run_in_executor(pool, scan_categories, categories, re.IGNORECASE, content),
+                        timeout=self.scan_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self._reset_worker_pool(pool)
+                    return None
+                except BrokenProcessPool:
+                    # Another scan's timeout killed this pool - retry once on a fresh one
+                    self._reset_worker_pool(pool)
+        
+        # Workers cannot start - a broken pool says nothing about the message, so scan it here
+        print("AUTOMOD: Scan workers unavailable - scanning inline")
+        return profile.scanner.scan(content)
+    
+    def _get_worker_pool(self) -> ProcessPoolExecutor:
+        if self.worker_pool is None:
+            self.worker_pool = ProcessPoolExecutor(
+                max_workers=self.scan_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            # Start every worker and compile its scanner before the first timed scan
+            categories = self.rules.default.categories
+            self._worker_warmup = [
+                self.worker_pool.submit(scan_categories, categories, re.IGNORECASE, '')
+                for _ in range(self.scan_workers)
+            ]
+        return self.worker_pool
+    
+    def _reset_worker_pool(self, pool: ProcessPoolExecutor):
+        """Kill a pool's processes - a runaway match only stops when its process does"""
+        if self.worker_pool is not pool:
+            return
+        self.worker_pool = None
+        self._worker_warmup = []
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self):
+        """Stop scan worker processes"""
+        if self.worker_pool:
+            self._reset_worker_pool(self.worker_pool)
+    
+    def _caps_violations(self, content: str, settings) -> List[Dict[str, Any]]:
+        """Caps as the check has always measured it - on the lowercased text, so in practice it does not fire.
+        Counting the original text would make excessive caps a live, escalating rule (a policy change of its own)"""
+        if len(content) < 10:
+            return []
+        caps_percentage = sum(1 for char in content.lower() if char.isupper()) / len(content) * 100
+        if caps_percentage <= settings['caps_threshold']:
+            return []
+        return [{
+            'category': 'caps',
+            'action': 'warn',
+            'reason': 'excessive_caps',
+            'details': f'{caps_percentage:.1f}% caps (limit: {settings["caps_threshold"]}%)',
+            'spans': [(0, len(content))]
+        }]
+    
+    def _apply_domain_policy(self, content: str, spans: Dict[str, List[Tuple[int, int]]], profile: RuleProfile) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Link spans after the profile's domain lists: URLs on allowed domains pass the link filter,
+        URLs on denied domains are blocked even with the link filter off
+        """
+        policy = profile.domains
+        link_filter = profile.settings.get('link_filter', True)
+        if not policy or (not link_filter and not policy.has_deny):
+            return spans
+        
+        allowed_urls = []
+        denied_urls = []
+        for host, start, end in extract_hosts(content):
+            verdict = policy.verdict(host)
+            if verdict is True:
+                allowed_urls.append((start, end))
+            elif verdict is False:
+                denied_urls.append((start, end))
+        if not allowed_urls and not denied_urls:
+            return spans
+        
+        link_spans = [
+            (start, end) for start, end in spans.get('link', [])
+            if not any(url_start <= start and end <= url_end for url_start, url_end in allowed_urls)
+        ]
+        link_spans = merge_spans(link_spans + denied_urls)
+        spans = {category: category_spans for category, category_spans in spans.items() if category != 'link'}
+        if link_spans:
+            spans['link'] = link_spans
+        return spans
+    
+    def _pattern_violations(self, content: str, spans: Dict[str, List[Tuple[int, int]]], profile: RuleProfile) -> List[Dict[str, Any]]:
+        spans = self._apply_domain_policy(content, spans, profile)
+        violations = []
+        for category, _, _, action, reason, details in self.content_categories:
+            if category in spans:
+                violations.append({
+                    'category': category,
+                    'action': action,
+                    'reason': reason,
+                    'details': details,
+                    'spans': spans[category]
+                })
+        return violations
     
     async def check_message(self, message) -> Dict[str, Any]:
         """
@@ -220,209 +433,95 @@ class AutoModerationManager:
             return {'action': 'allow', 'reason': 'bot_message'}
         
         user_id = str(message.author.id)
-        content = message.content.lower() if message.content else ""
+        raw_content = message.content or ""
+        content = raw_content.lower()
+        guild = getattr(message, 'guild', None)
+        profile = self.rules.get(guild.id if guild else None)
         
         # Check if user is whitelisted (bypasses all automod)
         if await self._is_user_whitelisted(message.author, message):
             return {'action': 'allow', 'reason': 'user_whitelisted'}
         
         # Check spam
-        spam_result = await self._check_spam(user_id, message)
+        spam_result = await self._check_spam(user_id, message, profile.settings)
         if spam_result['action'] != 'allow':
             return spam_result
         
         # Check duplicates
-        duplicate_result = await self._check_duplicates(user_id, content)
+        duplicate_result = await self._check_duplicates(user_id, content, profile.settings)
         if duplicate_result['action'] != 'allow':
             return duplicate_result
         
-        # Check caps
-        caps_result = await self._check_caps(content)
-        if caps_result['action'] != 'allow':
-            return caps_result
-        
-        # Check links
-        if self.settings['link_filter']:
-            link_result = await self._check_links(content)
-            if link_result['action'] != 'allow':
-                return link_result
-        
-        # Check invites
-        if self.settings['invite_filter']:
-            invite_result = await self._check_invites(content)
-            if invite_result['action'] != 'allow':
-                return invite_result
-        
-        # Check profanity
-        if self.settings['profanity_filter']:
-            profanity_result = await self._check_profanity(content)
-            if profanity_result['action'] != 'allow':
-                return profanity_result
-        
-        # Check phone numbers
-        phone_result = await self._check_phone_numbers(content)
-        if phone_result['action'] != 'allow':
-            return phone_result
-        
-        # Check addresses
-        address_result = await self._check_addresses(content)
-        if address_result['action'] != 'allow':
-            return address_result
+        # Every content category in one scan - deletions outrank warnings, then reporting order
+        violations = await self.scan_content_bounded(raw_content, profile)
+        if violations:
+            primary = next((v for v in violations if v['action'] == 'delete'), violations[0])
+            return {
+                'action': primary['action'],
+                'reason': primary['reason'],
+                'details': primary['details'],
+                'violations': violations
+            }
         
         return {'action': 'allow', 'reason': 'clean_message'}
     
-    async def _check_spam(self, user_id: str, message) -> Dict[str, Any]:
+    async def _check_spam(self, user_id: str, message, settings) -> Dict[str, Any]:
         """Check for spam (too many messages in short time)"""
-        now = datetime.now()
-        
-        if user_id not in self.user_message_history:
-            self.user_message_history[user_id] = []
-        
-        # Add current message
-        self.user_message_history[user_id].append(now)
-        
-        # Remove old messages (older than 10 seconds)
-        cutoff_time = now - timedelta(seconds=10)
-        self.user_message_history[user_id] = [
-            msg_time for msg_time in self.user_message_history[user_id]
-            if msg_time > cutoff_time
-        ]
+        self._maybe_sweep()
+        message_count = self._record_in_window(self.user_message_history, user_id, SPAM_WINDOW)
         
         # Check if spam threshold exceeded
-        if len(self.user_message_history[user_id]) > self.settings['spam_threshold']:
+        if message_count > settings['spam_threshold']:
             return {
                 'action': 'delete',
                 'reason': 'spam_detected',
-                'details': f'Too many messages ({len(self.user_message_history[user_id])}) in 10 seconds'
+                'details': f'Too many messages ({message_count}) in {SPAM_WINDOW} seconds'
             }
         
         return {'action': 'allow', 'reason': 'spam_check_passed'}
     
-    async def _check_duplicates(self, user_id: str, content: str) -> Dict[str, Any]:
+    async def _check_duplicates(self, user_id: str, content: str, settings) -> Dict[str, Any]:
         """Check for duplicate messages"""
         if not content:
             return {'action': 'allow', 'reason': 'empty_content'}
         
-        # Create unique key for user+content
-        key = f"{user_id}:{content}"
-        now = datetime.now()
-        
-        if key not in self.duplicate_messages:
-            self.duplicate_messages[key] = []
-        
-        # Add current message
-        self.duplicate_messages[key].append(now)
-        
-        # Remove old duplicates (older than 1 minute)
-        cutoff_time = now - timedelta(minutes=1)
-        self.duplicate_messages[key] = [
-            msg_time for msg_time in self.duplicate_messages[key]
-            if msg_time > cutoff_time
-        ]
+        # 16-byte digest of user+content instead of the full message text
+        key = hashlib.blake2b(f"{user_id}:{content}".encode(), digest_size=16).digest()
+        duplicate_count = self._record_in_window(self.duplicate_messages, key, DUPLICATE_WINDOW)
         
         # Check if duplicate threshold exceeded
-        if len(self.duplicate_messages[key]) >= self.settings['duplicate_threshold']:
+        if duplicate_count >= settings['duplicate_threshold']:
             return {
                 'action': 'delete',
                 'reason': 'duplicate_detected',
-                'details': f'Same message sent {len(self.duplicate_messages[key])} times'
+                'details': f'Same message sent {duplicate_count} times'
             }
         
         return {'action': 'allow', 'reason': 'duplicate_check_passed'}
-    
-    async def _check_caps(self, content: str) -> Dict[str, Any]:
-        """Check for excessive caps"""
-        if not content or len(content) < 10:
-            return {'action': 'allow', 'reason': 'message_too_short'}
-        
-        # Count caps
-        caps_count = sum(1 for char in content if char.isupper())
-        caps_percentage = (caps_count / len(content)) * 100
-        
-        if caps_percentage > self.settings['caps_threshold']:
-            return {
-                'action': 'warn',
-                'reason': 'excessive_caps',
-                'details': f'{caps_percentage:.1f}% caps (limit: {self.settings["caps_threshold"]}%)'
-            }
-        
-        return {'action': 'allow', 'reason': 'caps_check_passed'}
-    
-    async def _check_links(self, content: str) -> Dict[str, Any]:
-        """Check for unauthorized links using cached regex patterns"""
-        for i, pattern in enumerate(self.link_patterns):
-            cache_key = f"link_pattern_{i}"
-            compiled_pattern = self._get_cached_regex(cache_key, pattern)
-            
-            if compiled_pattern and compiled_pattern.search(content):
-                return {
-                    'action': 'delete',
-                    'reason': 'unauthorized_link',
-                    'details': 'Links not allowed in this channel'
-                }
-        
-        return {'action': 'allow', 'reason': 'link_check_passed'}
-    
-    async def _check_invites(self, content: str) -> Dict[str, Any]:
-        """Check for Discord invites using cached regex patterns"""
-        for i, pattern in enumerate(self.invite_patterns):
-            cache_key = f"invite_pattern_{i}"
-            compiled_pattern = self._get_cached_regex(cache_key, pattern)
-            
-            if compiled_pattern and compiled_pattern.search(content):
-                return {
-                    'action': 'delete',
-                    'reason': 'discord_invite',
-                    'details': 'Discord invites not allowed'
-                }
-        
-        return {'action': 'allow', 'reason': 'invite_check_passed'}
-    
-    async def _check_profanity(self, content: str) -> Dict[str, Any]:
-        """Check for profanity using cached regex patterns"""
-        for i, pattern in enumerate(self.profanity_patterns):
-            cache_key = f"profanity_pattern_{i}"
-            compiled_pattern = self._get_cached_regex(cache_key, pattern)
-            
-            if compiled_pattern and compiled_pattern.search(content):
-                return {
-                    'action': 'delete',
-                    'reason': 'profanity_detected',
-                    'details': 'Message contains inappropriate language'
-                }
-        
-        return {'action': 'allow', 'reason': 'profanity_check_passed'}
-    
-    async def _check_phone_numbers(self, content: str) -> Dict[str, Any]:
-        """Check for phone numbers using cached regex patterns"""
-        for i, pattern in enumerate(self.phone_patterns):
-            cache_key = f"phone_pattern_{i}"
-            compiled_pattern = self._get_cached_regex(cache_key, pattern)
-            
-            if compiled_pattern and compiled_pattern.search(content):
-                return {
-                    'action': 'delete',
-                    'reason': 'phone_number_detected',
-                    'details': 'Phone numbers are not allowed for privacy protection'
-                }
-        
-        return {'action': 'allow', 'reason': 'phone_check_passed'}
-    
-    async def _check_addresses(self, content: str) -> Dict[str, Any]:
-        """Check for home addresses using cached regex patterns"""
-        for i, pattern in enumerate(self.address_patterns):
-            cache_key = f"address_pattern_{i}"
-            compiled_pattern = self._get_cached_regex(cache_key, pattern)
-            
-            if compiled_pattern and compiled_pattern.search(content):
-                return {
-                    'action': 'delete',
-                    'reason': 'address_detected',
-                    'details': 'Home addresses are not allowed for privacy protection'
-                }
-        
-        return {'action': 'allow', 'reason': 'address_check_passed'}
-    
+
+    def _record_in_window(self, tracker: BoundedCache, key, window: float) -> int:
+        """Record an event for key and return how many fall inside the sliding window"""
+        now = time.monotonic()
+        timestamps = tracker.get(key)
+        if timestamps is None:
+            timestamps = deque(maxlen=WINDOW_HISTORY_MAX)
+        timestamps.append(now)
+        cutoff = now - window
+        while timestamps[0] <= cutoff:
+            timestamps.popleft()
+        # Re-set so the entry expires one full window after its newest event
+        tracker.set(key, timestamps)
+        return len(timestamps)
+
+    def _maybe_sweep(self, force: bool = False):
+        """Drop idle spam/duplicate windows every sweep_interval seconds"""
+        now = time.monotonic()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        self.user_message_history.purge_expired()
+        self.duplicate_messages.purge_expired()
+
     async def _is_user_whitelisted(self, user, message) -> bool:
         """Check if user is whitelisted to bypass automod"""
         user_id = str(user.id)
@@ -473,108 +572,96 @@ class AutoModerationManager:
         self.whitelisted_roles.clear()
         print("AUTOMOD: Cleared all whitelist entries")
     
-    def update_settings(self, new_settings: Dict[str, Any]):
+    async def add_custom_patterns(self, link_patterns: List[str] = None, invite_patterns: List[str] = None, guild_id=None):
         """
-        Update automod settings and invalidate cache for security
-        Call this when VIP servers update their moderation rules
+        Add custom patterns for VIP servers (or every server when guild_id is None)
+        Publishes a new rule profile version; patterns that backtrack badly are rejected
         """
-        self.settings.update(new_settings)
-        # Invalidate all cached patterns when settings change
-        self._invalidate_cache()
-        print(f"AUTOMOD: Settings updated, regex cache cleared for security")
+        patterns = {category: new_patterns for category, new_patterns in
+                    (('link', link_patterns), ('invite', invite_patterns)) if new_patterns}
+        if not patterns:
+            return
+        await self._publish(guild_id, patterns=patterns)
+        print(f"AUTOMOD: Custom patterns added for {guild_id or 'all servers'}")
     
-    def add_custom_patterns(self, link_patterns: List[str] = None, invite_patterns: List[str] = None):
+    async def add_link_domains(self, allow: List[str] = None, deny: List[str] = None, guild_id=None):
         """
-        Add custom patterns for VIP servers and invalidate related cache
+        Add allowed / denied link domains for VIP servers (or every server when guild_id is None)
+        Publishes a new rule profile version
         """
-        if link_patterns:
-            self.link_patterns.extend(link_patterns)
-            # Invalidate only link pattern cache
-            for i in range(len(self.link_patterns)):
-                self._invalidate_cache(f"link_pattern_{i}")
-        
-        if invite_patterns:
-            self.invite_patterns.extend(invite_patterns)
-            # Invalidate only invite pattern cache
-            for i in range(len(self.invite_patterns)):
-                self._invalidate_cache(f"invite_pattern_{i}")
-        
-        print(f"AUTOMOD: Custom patterns added, specific cache cleared")
+        domains = {kind: new_domains for kind, new_domains in (('allow', allow), ('deny', deny)) if new_domains}
+        if not domains:
+            return
+        await self._publish(guild_id, domains=domains)
+        print(f"AUTOMOD: Link domains updated for {guild_id or 'all servers'} "
+              f"({len(allow or [])} allowed, {len(deny or [])} denied)")
+    
+    async def _publish(self, guild_id, **changes) -> RuleProfile:
+        """Publish a rule profile version on a worker thread - pattern vetting, compiling
+        and the synchronous MongoDB save would otherwise block the event loop"""
+        return await asyncio.to_thread(self.rules.publish, guild_id, db_handler=self.db_handler, **changes)
+    
+    def _safe_patterns(self, patterns: Optional[List[str]]) -> List[str]:
+        """Drop patterns that fail the backtracking check"""
+        safe = []
+        for pattern in patterns or []:
+            if is_pattern_safe(pattern):
+                safe.append(pattern)
+            else:
+                self.rejected_patterns += 1
+                print(f"AUTOMOD: Rejected pattern prone to catastrophic backtracking: {pattern}")
+        return safe
     
     async def handle_violation(self, message, violation_info: Dict[str, Any]):
         """Handle moderation violation with automatic warning/ban system"""
         action = violation_info.get('action', 'allow')
         reason = violation_info.get('reason', 'unknown')
         user_id = str(message.author.id)
+        # Everything the scan found, not just the violation that decided the action
+        categories = [violation['category'] for violation in violation_info.get('violations', [])]
         
         try:
-            # Track violation for user
-            await self._track_violation(user_id, reason, message)
+            # Track violation for user (an unscannable message is blocked but not held against them)
+            if reason != 'scan_timeout':
+                await self._track_violation(user_id, reason, message, categories)
             
             if action == 'delete':
                 await message.delete()
-                print(f"🗑️ Deleted message from {message.author} for {reason}")
+                print(f"🗑️ Deleted message from {message.author} for {reason} (matched: {', '.join(categories) or reason})")
                 
-                # Send temporary removal notification
+                # Temporary removal notification - posted and deleted after 5 seconds in the background
                 if hasattr(message.channel, 'send'):
-                    warning_msg = await message.channel.send(
-                        f"{message.author.mention}, your message was removed: {reason}"
+                    notice_scheduler.post_ephemeral(
+                        message.channel, f"{message.author.mention}, your message was removed: {reason}", ttl=5
                     )
-                    # Delete warning after 5 seconds
-                    await asyncio.sleep(5)
-                    try:
-                        await warning_msg.delete()
-                    except:
-                        pass
                         
             elif action == 'warn':
                 print(f"⚠️ Warning for {message.author}: {reason}")
                 
-                # Send temporary warning message
+                # Temporary warning message - posted and deleted after 3 seconds in the background
                 if hasattr(message.channel, 'send'):
-                    warning_msg = await message.channel.send(
-                        f"{message.author.mention}, please watch your {reason.replace('_', ' ')}"
+                    notice_scheduler.post_ephemeral(
+                        message.channel, f"{message.author.mention}, please watch your {reason.replace('_', ' ')}", ttl=3
                     )
-                    # Delete warning after 3 seconds
-                    await asyncio.sleep(3)
-                    try:
-                        await warning_msg.delete()
-                    except:
-                        pass
                         
         except Exception as e:
             print(f"❌ Error handling moderation violation: {e}")
     
-    async def _track_violation(self, user_id: str, reason: str, message):
+    async def _track_violation(self, user_id: str, reason: str, message, categories: List[str] = None):
         """Track user violations and issue warnings/bans as needed"""
         try:
-            # Initialize user violation tracking
-            if user_id not in self.automod_violations:
-                self.automod_violations[user_id] = {
-                    'count': 0,
-                    'last_violation': None,
-                    'violations': []
-                }
-            
-            # Add current violation
-            current_time = datetime.now()
-            self.automod_violations[user_id]['count'] += 1
-            self.automod_violations[user_id]['last_violation'] = current_time
-            self.automod_violations[user_id]['violations'].append({
-                'reason': reason,
-                'timestamp': current_time,
-                'channel_id': str(message.channel.id),
-                'guild_id': str(message.guild.id) if message.guild else 'dm'
-            })
-            
-            violation_count = self.automod_violations[user_id]['count']
+            entry = self.violation_ledger.record(
+                user_id, reason, categories, str(message.guild.id) if message.guild else 'dm'
+            )
+            violation_count = entry.count
             
-            # Check if user needs formal warning (every 3 violations)
-            if violation_count % self.violation_threshold == 0:
+            # Formal warning every 3 (decayed) violations - once per level
+            warning_count = violation_count // self.violation_threshold
+            if warning_count > entry.warnings:
+                self.violation_ledger.set_warnings(user_id, warning_count)
                 await self._issue_formal_warning(user_id, violation_count, message)
             
-            # Check if user needs service ban (after 3 warnings = 9 total violations)
-            warning_count = violation_count // self.violation_threshold
+            # Service ban after 3 warnings = 9 violations
             if warning_count >= self.warning_threshold:
                 await self._issue_service_ban(user_id, warning_count, message)
                 
@@ -586,6 +673,7 @@ class AutoModerationManager:
         try:
             warning_count = violation_count // self.violation_threshold
             reason = f"Automod violation #{violation_count} (Warning #{warning_count}): Multiple rule violations"
+            entry = self.violation_ledger.get(user_id)
             
             # Create moderation data matching your existing system format
             moderation_data = {
@@ -603,17 +691,13 @@ class AutoModerationManager:
                 'metadata': {
                     'violation_count': violation_count,
                     'warning_count': warning_count,
-                    'recent_violations': [v['reason'] for v in self.automod_violations[user_id]['violations'][-3:]]
+                    'recent_violations': [reason for reason, *_ in list(entry.reasons)[-3:]] if entry else []
                 }
             }
             
-            # Add to database using MongoDB handler
+            # Add to database using MongoDB handler (on the database executor when available)
             if self.db_handler:
-                warning_logged = self.db_handler.add_warning(
-                    user_id=str(user_id),
-                    moderator_id="automod",
-                    reason=reason
-                )
+                warning_logged = await self._db_call('add_warning', str(user_id), "automod", reason)
                 if warning_logged:
                     print(f"✅ AUTOMOD: Warning #{warning_count} logged to database for user {user_id}")
                 else:
@@ -648,6 +732,7 @@ class AutoModerationManager:
         """Issue automatic 20-minute service ban"""
         try:
             ban_reason = f"Automod service ban: {warning_count} warnings received (automatic enforcement)"
+            entry = self.violation_ledger.get(user_id)
             
             # Create ban data matching your existing system format
             ban_data = {
@@ -663,7 +748,7 @@ class AutoModerationManager:
                 'source': 'automod_system',
                 'timestamp': datetime.now().isoformat(),
                 'metadata': {
-                    'total_violations': self.automod_violations[user_id]['count'],
+                    'total_violations': entry.count if entry else 0,
                     'total_warnings': warning_count,
                     'ban_duration_minutes': self.ban_duration_minutes,
                     'automatic_ban': True
@@ -672,22 +757,14 @@ class AutoModerationManager:
             
             # Add ban to database using MongoDB handler
             if self.db_handler:
-                ban_logged = self.db_handler.ban_user(
-                    user_id=str(user_id),
-                    moderator_id="automod",
-                    reason=ban_reason
-                )
+                ban_logged = await self._db_call('ban_user', str(user_id), "automod", ban_reason)
                 if ban_logged:
                     print(f"✅ AUTOMOD: {self.ban_duration_minutes}-minute service ban logged for user {user_id}")
                 else:
                     print(f"⚠️ AUTOMOD: Failed to log service ban to database for user {user_id}")
                 
                 # Reset violation count after ban
-                self.automod_violations[user_id] = {
-                    'count': 0,
-                    'last_violation': None,
-                    'violations': []
-                }
+                self.violation_ledger.reset(user_id)
                 
                 # Send DM notification
                 try:
@@ -716,10 +793,24 @@ class AutoModerationManager:
         except Exception as e:
             print(f"❌ Error issuing service ban to user {user_id}: {e}")
     
-    def update_settings(self, new_settings: Dict[str, Any]):
-        """Update moderation settings"""
-        self.settings.update(new_settings)
-        print(f"🔧 Auto-moderation settings updated: {new_settings}")
+    async def _db_call(self, method: str, *args):
+        """Run a MongoDB handler method on the async data layer's executor, or directly without one"""
+        async_db = getattr(self.bot, 'async_db', None) if self.bot else None
+        if async_db:
+            return await getattr(async_db, method)(*args)
+        return getattr(self.db_handler, method)(*args)
+    
+    def load_violation_ledger(self) -> int:
+        """Reload persisted violation counts from MongoDB"""
+        return self.violation_ledger.load(self.db_handler)
+    
+    async def update_settings(self, new_settings: Dict[str, Any], guild_id=None):
+        """
+        Update moderation settings for every server, or for one VIP server's rules
+        Publishes a new rule profile version
+        """
+        await self._publish(guild_id, settings=new_settings)
+        print(f"🔧 Auto-moderation settings updated for {guild_id or 'all servers'}: {new_settings}")
     
     def enable(self):
         """Enable auto-moderation"""
@@ -733,11 +824,22 @@ class AutoModerationManager:
     
     def get_status(self) -> Dict[str, Any]:
         """Get current moderation status"""
+        # Sweep first so idle windows are not reported as active
+        self._maybe_sweep(force=True)
         return {
             'enabled': self.enabled,
-            'settings': self.settings,
+            'settings': dict(self.settings),
             'active_users': len(self.user_message_history),
-            'tracked_duplicates': len(self.duplicate_messages)
+            'tracked_duplicates': len(self.duplicate_messages),
+            'tracker_evictions': self.user_message_history.evictions + self.duplicate_messages.evictions,
+            'inline_scans': self.inline_scans,
+            'worker_scans': self.worker_scans,
+            'scan_timeouts': self.scan_timeouts,
+            'rejected_patterns': self.rejected_patterns,
+            'verdict_cache': self.verdict_cache.get_stats(),
+            'rule_profiles': self.rules.get_stats(),
+            'violation_ledger': self.violation_ledger.get_stats(),
+            'notices': notice_scheduler.get_stats()
         }
 
 # Compatibility class for backward compatibility
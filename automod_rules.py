@@ -0,0 +1,228 @@
+"""
+AutoMod Rule Profiles
+Versioned default and per-guild automod rules, each compiled once into an immutable profile
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from domain_policy import DomainPolicy, DomainTrie, normalize_domain
+from pattern_set import ContentScanner
+
+DEFAULT_SCOPE = 'default'
+DOMAIN_LISTS = ('allow', 'deny')
+
+class RuleProfile:
+    """Compiled rules for one scope and version - settings, enabled categories, their scanner
+    and the link domain policy, never modified"""
+
+    __slots__ = ('guild_id', 'version', 'key', 'settings', 'categories', 'scanner', 'domains')
+
+    def __init__(self, guild_id: Optional[int], version: int, key: Tuple, settings: Mapping[str, Any],
+                 categories: Sequence[Tuple[str, Sequence[str]]], domains: DomainPolicy = None):
+        self.guild_id = guild_id
+        self.version = version
+        self.key = key  # changes whenever anything this profile was built from changes
+        self.settings = MappingProxyType(dict(settings))
+        self.categories: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (name, tuple(patterns)) for name, patterns in categories
+        )
+        self.scanner = ContentScanner(self.categories)
+        self.domains = domains or DomainPolicy()
+
+class RuleProfileStore:
+    """Default rules plus per-guild overrides (extra settings, patterns and link domains on top of the default).
+    A publish compiles the new profiles off to the side and then swaps the references,
+    so lookups never lock and never see a half-built profile"""
+
+    def __init__(self, base_settings: Mapping[str, Any], base_patterns: Mapping[str, Sequence[str]],
+                 category_toggles: Sequence[Tuple[str, Optional[str]]],
+                 pattern_filter: Callable[[List[str]], List[str]] = None,
+                 base_domains: Mapping[str, Sequence[str]] = None):
+        self._base_settings = dict(base_settings)
+        self._base_patterns = {category: tuple(patterns) for category, patterns in base_patterns.items()}
+        self._base_domains = {kind: tuple((base_domains or {}).get(kind, ())) for kind in DOMAIN_LISTS}
+        self._toggles = tuple(category_toggles)  # (category, settings toggle or None), in reporting order
+        self.pattern_filter = pattern_filter
+        self._lock = threading.RLock()
+
+        # Statistics
+        self.loaded = False
+        self.load_count = 0
+        self.publishes = 0
+        self.compiles = 0
+
+        # scope -> {'version', 'settings', 'patterns', 'domains'} as published (overrides only, not merged)
+        self._specs: Dict[Any, Dict[str, Any]] = {DEFAULT_SCOPE: self._empty_spec()}
+        # scope -> (allow, deny) tries, built once per published version and shared by every profile on top of it
+        self._domain_tries: Dict[Any, Tuple[DomainTrie, DomainTrie]] = {DEFAULT_SCOPE: self._build_tries(DEFAULT_SCOPE)}
+        self.default: RuleProfile = self._compile(DEFAULT_SCOPE)
+        # guild_id -> profile, only for guilds with overrides (copy-on-write)
+        self._profiles: Dict[int, RuleProfile] = {}
+
+    @staticmethod
+    def _empty_spec() -> Dict[str, Any]:
+        return {'version': 0, 'settings': {}, 'patterns': {}, 'domains': {}}
+
+    def _build_tries(self, scope) -> Tuple[DomainTrie, DomainTrie]:
+        domains = self._specs[scope].get('domains', {})
+        base = self._base_domains if scope == DEFAULT_SCOPE else {}
+        return tuple(
+            DomainTrie(list(base.get(kind, ())) + list(domains.get(kind, ())))
+            for kind in DOMAIN_LISTS
+        )
+
+    def get(self, guild_id) -> RuleProfile:
+        """Rules for a guild - a single dict lookup, falling back to the default profile"""
+        return self._profiles.get(guild_id, self.default)
+
+    def _compile(self, scope) -> RuleProfile:
+        """Merge base, default overrides and (for a guild) guild overrides, then compile"""
+        default_spec = self._specs[DEFAULT_SCOPE]
+        layers = [default_spec]
+        domain_layers = [self._domain_tries[DEFAULT_SCOPE]]
+        key = (DEFAULT_SCOPE, default_spec['version'])
+        if scope != DEFAULT_SCOPE:
+            spec = self._specs[scope]
+            layers.append(spec)
+            domain_layers.append(self._domain_tries[scope])
+            key = (scope, spec['version'], default_spec['version'])
+
+        settings = dict(self._base_settings)
+        patterns = {category: list(category_patterns) for category, category_patterns in self._base_patterns.items()}
+        for layer in layers:
+            settings.update(layer['settings'])
+            for category, extra in layer['patterns'].items():
+                existing = patterns.setdefault(category, [])
+                existing.extend(pattern for pattern in extra if pattern not in existing)
+
+        categories = [
+            (category, patterns.get(category, ()))
+            for category, toggle in self._toggles
+            if toggle is None or settings.get(toggle, True)
+        ]
+        profile = RuleProfile(None if scope == DEFAULT_SCOPE else scope, key[1], key, settings, categories,
+                              DomainPolicy(domain_layers))
+        self.compiles += 1
+        for pattern in profile.scanner.invalid:
+            print(f"AUTOMOD_RULES: Skipping invalid pattern in {scope} v{key[1]}: {pattern}")
+        return profile
+
+    def _install(self, specs: Dict[Any, Dict[str, Any]], replace: bool = False):
+        """Compile every profile affected by the new specs, then swap them in"""
+        with self._lock:
+            self._specs = {**({DEFAULT_SCOPE: self._empty_spec()} if replace else self._specs), **specs}
+            default_changed = replace or DEFAULT_SCOPE in specs
+            domain_tries = {} if replace else dict(self._domain_tries)
+            for scope in self._specs:
+                if replace or scope in specs:
+                    domain_tries[scope] = self._build_tries(scope)
+            self._domain_tries = domain_tries
+            default = self._compile(DEFAULT_SCOPE) if default_changed else self.default
+
+            # Guild profiles are built on top of the default, so a default change rebuilds all of them
+            profiles = {} if replace else dict(self._profiles)
+            for scope in self._specs:
+                if scope != DEFAULT_SCOPE and (default_changed or scope in specs):
+                    profiles[scope] = self._compile(scope)
+
+            self.default = default
+            self._profiles = profiles
+
+    def publish(self, guild_id=None, settings: Dict[str, Any] = None, patterns: Dict[str, List[str]] = None,
+                domains: Dict[str, List[str]] = None, db_handler=None) -> RuleProfile:
+        """Publish the next version for a guild (or the default when guild_id is None).
+        Settings are merged into the scope's overrides; patterns and allow/deny domains are appended to them"""
+        scope = DEFAULT_SCOPE if guild_id is None else int(guild_id)
+        with self._lock:
+            current = self._specs.get(scope, self._empty_spec())
+            merged_patterns = {category: list(existing) for category, existing in current['patterns'].items()}
+            for category, new_patterns in (patterns or {}).items():
+                new_patterns = self.pattern_filter(list(new_patterns)) if self.pattern_filter else list(new_patterns)
+                existing = merged_patterns.setdefault(category, [])
+                existing.extend(pattern for pattern in new_patterns if pattern not in existing)
+            merged_domains = {kind: list(existing) for kind, existing in current.get('domains', {}).items()}
+            for kind, new_domains in (domains or {}).items():
+                if kind not in DOMAIN_LISTS:
+                    raise ValueError(f"Unknown domain list: {kind}")
+                existing = merged_domains.setdefault(kind, [])
+                seen = set(existing)
+                for domain in map(normalize_domain, new_domains):
+                    if domain and domain not in seen:
+                        seen.add(domain)
+                        existing.append(domain)
+            spec = {
+                'version': current['version'] + 1,
+                'settings': {**current['settings'], **(settings or {})},
+                'patterns': merged_patterns,
+                'domains': merged_domains
+            }
+
+            # Persist first so the stored version never lags the live one
+            if db_handler and not db_handler.save_automod_profile(self._document(scope, spec)):
+                print(f"⚠️ AUTOMOD_RULES: Could not store {scope} v{spec['version']} - applied in memory only")
+            self._install({scope: spec})
+            self.publishes += 1
+
+        profile = self.default if scope == DEFAULT_SCOPE else self._profiles[scope]
+        print(f"AUTOMOD_RULES: Published {scope} v{spec['version']}")
+        return profile
+
+    def load(self, db_handler) -> int:
+        """Load the latest stored version of every scope (startup / full resync only)"""
+        if not db_handler:
+            print("AUTOMOD_RULES: No database handler - using built-in rules")
+            return 0
+
+        try:
+            documents = db_handler.get_automod_profiles()
+        except Exception as e:
+            print(f"AUTOMOD_RULES_ERROR: Failed to load rule profiles: {e}")
+            return len(self._profiles)
+
+        specs = {}
+        for document in documents:
+            try:
+                scope = document.get('guild_id', DEFAULT_SCOPE)
+                scope = DEFAULT_SCOPE if scope == DEFAULT_SCOPE else int(scope)
+                patterns = {
+                    category: self.pattern_filter(list(category_patterns)) if self.pattern_filter else list(category_patterns)
+                    for category, category_patterns in (document.get('patterns') or {}).items()
+                }
+                specs[scope] = {
+                    'version': int(document['version']),
+                    'settings': dict(document.get('settings') or {}),
+                    'patterns': patterns,
+                    'domains': {kind: list((document.get('domains') or {}).get(kind, ())) for kind in DOMAIN_LISTS}
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        self._install(specs, replace=True)
+        self.loaded = True
+        self.load_count += 1
+        print(f"AUTOMOD_RULES: Loaded default v{self.default.version} and {len(self._profiles)} guild profiles from MongoDB")
+        return len(self._profiles)
+
+    @staticmethod
+    def _document(scope, spec: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'guild_id': scope if scope == DEFAULT_SCOPE else str(scope),
+            'version': spec['version'],
+            'settings': spec['settings'],
+            'patterns': spec['patterns'],
+            'domains': spec['domains']
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get profile version and compile statistics"""
+        return {
+            'loaded': self.loaded,
+            'default_version': self.default.version,
+            'guild_profiles': len(self._profiles),
+            'default_domains': len(self.default.domains),
+            'load_count': self.load_count,
+            'publishes': self.publishes,
+            'compiles': self.compiles
+        }
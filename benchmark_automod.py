@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+AutoMod Benchmark
+Compares the per-pattern regex loops with the single-pass compiled matcher and content scanner,
+then fuzzes the time-bounded scan with adversarial messages for worst-case latency
+"""
+
+import asyncio
+import functools
+import random
+import re
+import sys
+import string
+import time
+
+from auto_moderation import AutoModerationManager
+from automod_rules import RuleProfile
+from pattern_set import CompiledPatternSet
+
+CLEAN_SAMPLES = [
+    "hey everyone, how is it going today?",
+    "anyone up for a match later tonight",
+    "just finished the new update, the patch notes look great",
+    "lol that was hilarious, good game all",
+    "can someone help me set up the crosschat channel on my server",
+    "i think the event starts at 8pm utc, not sure though",
+]
+
+FLAGGED_SAMPLES = [
+    "what the fuck was that",
+    "this is bullsh1t",
+    "stop being such a b1tch",
+    "call me at 555-123-4567",
+    "join us at discord.gg/abc123",
+    "check out https://example.com/page",
+    "WHY IS NOBODY ANSWERING ME",
+]
+
+def build_corpus(size: int = 5000, flagged_ratio: float = 0.05) -> list:
+    """Mostly clean chat with a few flagged messages and random noise"""
+    rng = random.Random(1)
+    corpus = []
+    for _ in range(size):
+        if rng.random() < flagged_ratio:
+            corpus.append(rng.choice(FLAGGED_SAMPLES))
+        else:
+            noise = ''.join(rng.choice(string.ascii_lowercase + ' ') for _ in range(rng.randint(0, 60)))
+            corpus.append(f"{rng.choice(CLEAN_SAMPLES)} {noise}".strip())
+    return corpus
+
+@functools.lru_cache(maxsize=None)
+def legacy_regex(pattern: str) -> re.Pattern:
+    """Stand-in for the old per-pattern regex cache"""
+    return re.compile(pattern, re.IGNORECASE)
+
+def legacy_check(automod: AutoModerationManager, content: str) -> bool:
+    """The previous implementation: one cached regex search per profanity pattern"""
+    for pattern in automod.profanity_patterns:
+        if legacy_regex(pattern).search(content):
+            return True
+    return False
+
+def legacy_categories(automod: AutoModerationManager, content: str, first_only: bool = False) -> set:
+    """The previous content checks: caps on its own, then one pattern loop per category"""
+    matched = set()
+    if len(content) >= 10 and sum(1 for char in content.lower() if char.isupper()) / len(content) * 100 > automod.settings['caps_threshold']:
+        matched.add('caps')
+        if first_only:
+            return matched
+    for category, patterns_attr, *_ in automod.content_categories:
+        for pattern in getattr(automod, patterns_attr):
+            if legacy_regex(pattern).search(content):
+                matched.add(category)
+                break
+        if matched and first_only:
+            return matched
+    return matched
+
+def scanned_categories(automod: AutoModerationManager, content: str) -> set:
+    return {violation['category'] for violation in automod.scan_content(content)}
+
+def time_run(check, automod: AutoModerationManager, corpus: list, rounds: int) -> float:
+    """Best wall time in seconds over several rounds"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for content in corpus:
+            check(automod, content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# Patterns as they were before the ReDoS rewrite - used to show the worst case being fixed
+ORIGINAL_SLOW_PATTERNS = {
+    'profanity_patterns': (r'n[i1]+[gq]+[e3]*r', r'n+[i1]+[gq]+[e3]*r+[s\$]*'),
+    'address_patterns': (r'\b[A-Za-z\s]{1,40},\s*[A-Z]{2}\s*\d{5}\b', r'\b[A-Za-z\s]+,\s*[A-Z]{2}\s*\d{5}\b'),
+}
+
+def build_fuzz_corpus(count: int = 300, max_length: int = 4000) -> list:
+    """Long repetitive messages built from characters the patterns care about - the inputs that make
+    backtracking patterns blow up - plus random mixes"""
+    rng = random.Random(7)
+    alphabet = sorted(set('abcdefin1 ,.-#/:@$'))
+    corpus = []
+    for first in alphabet:
+        for second in alphabet:
+            corpus.append((first + second) * (max_length // 2))
+    for _ in range(count):
+        unit = ''.join(rng.choice(alphabet + [' ', ', ', 'st ', '12345 ', 'http://', 'nig']) for _ in range(rng.randint(1, 4)))
+        corpus.append((unit * (max_length // len(unit) + 1))[:rng.randint(max_length // 4, max_length)])
+    return corpus
+
+async def time_bounded(automod: AutoModerationManager, corpus: list) -> dict:
+    """Worst event-loop blocking time (inline scans) and worst total latency (worker scans)"""
+    worst_inline = worst_worker = 0.0
+    for content in corpus:
+        inline = len(content) <= automod.inline_scan_chars
+        start = time.perf_counter()
+        await automod.scan_content_bounded(content)
+        elapsed = (time.perf_counter() - start) * 1000
+        if inline:
+            worst_inline = max(worst_inline, elapsed)
+        else:
+            worst_worker = max(worst_worker, elapsed)
+    return {'inline': worst_inline, 'worker': worst_worker}
+
+def fuzz():
+    """Worst-case latency of the old unbounded inline scan vs the time-bounded scan"""
+    automod = AutoModerationManager()
+    corpus = build_fuzz_corpus()
+    print(f"Fuzz messages: {len(corpus)} (up to {max(map(len, corpus))} characters)")
+
+    # Before: original patterns, every message scanned inline on the event loop
+    categories = []
+    for category, patterns_attr, *_ in automod.content_categories:
+        patterns = list(getattr(automod, patterns_attr))
+        if patterns_attr in ORIGINAL_SLOW_PATTERNS:
+            current, slow = ORIGINAL_SLOW_PATTERNS[patterns_attr]
+            patterns[patterns.index(current)] = slow
+        categories.append((category, patterns))
+    original = RuleProfile(None, 0, ('original', 0), automod.settings, categories)
+    worst = 0.0
+    for content in corpus:
+        start = time.perf_counter()
+        automod.scan_content(content, original)
+        worst = max(worst, (time.perf_counter() - start) * 1000)
+    print(f"  Original patterns, inline:  worst {worst:8.2f} ms blocking the event loop")
+
+    # After: rewritten patterns, long messages in a worker with a timeout
+    results = asyncio.run(run_bounded(automod, corpus))
+    print(f"  Bounded scan, inline part:  worst {results['inline']:8.2f} ms blocking the event loop "
+          f"(messages <= {automod.inline_scan_chars} characters)")
+    print(f"  Bounded scan, worker part:  worst {results['worker']:8.2f} ms latency, event loop free "
+          f"(timeout {int(automod.scan_timeout * 1000)} ms, {automod.scan_timeouts} timed out)")
+
+async def run_bounded(automod: AutoModerationManager, corpus: list) -> dict:
+    try:
+        # Short copies exercise the inline path, full-length ones the worker path
+        short = [content[:automod.inline_scan_chars] for content in corpus]
+        await automod.scan_content_bounded('x' * (automod.inline_scan_chars + 1))  # start the workers
+        return {
+            'inline': (await time_bounded(automod, short))['inline'],
+            'worker': (await time_bounded(automod, corpus))['worker']
+        }
+    finally:
+        automod.close()
+
+def report(title: str, legacy: float, compiled: float, messages: int):
+    per_message = lambda seconds: seconds / messages * 1_000_000
+    print(title)
+    print(f"  Per-pattern loops: {legacy * 1000:8.2f} ms ({per_message(legacy):6.2f} µs/message)")
+    print(f"  Single pass:       {compiled * 1000:8.2f} ms ({per_message(compiled):6.2f} µs/message)")
+    print(f"  Speedup:           {legacy / compiled:8.2f}x")
+
+def main():
+    automod = AutoModerationManager()
+    corpus = build_corpus()
+    print(f"Messages: {len(corpus)}")
+
+    # Profanity only - both implementations must flag exactly the same messages
+    profanity = CompiledPatternSet(automod.profanity_patterns)
+    compiled_check = lambda automod, content: profanity.search(content) is not None
+    mismatches = [content for content in corpus if legacy_check(automod, content) != compiled_check(automod, content)]
+    if mismatches:
+        print(f"❌ BENCHMARK: {len(mismatches)} profanity verdict mismatches, e.g. {mismatches[0]!r}")
+        return
+    report(f"Profanity ({len(automod.profanity_patterns)} patterns)",
+           time_run(legacy_check, automod, corpus, rounds=5),
+           time_run(compiled_check, automod, corpus, rounds=5), len(corpus))
+
+    # Every content category - the scanner must find exactly the categories the separate checks find
+    mismatches = [content for content in corpus if legacy_categories(automod, content) != scanned_categories(automod, content)]
+    if mismatches:
+        print(f"❌ BENCHMARK: {len(mismatches)} category mismatches, e.g. {mismatches[0]!r}")
+        return
+    # The old check_message stopped at the first violation, so time it that way
+    first_violation = lambda automod, content: legacy_categories(automod, content, first_only=True)
+    report("All content categories",
+           time_run(first_violation, automod, corpus, rounds=5),
+           time_run(scanned_categories, automod, corpus, rounds=5), len(corpus))
+
+if __name__ == "__main__":
+    if '--fuzz' in sys.argv:
+        fuzz()
+    else:
+        main()
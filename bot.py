@@ -13,6 +13,18 @@ import threading
 from flask import Flask
 import aiohttp
 import json
+from channel_registry import channel_registry
+from async_mongodb_handler import AsyncMongoDBHandler
+from write_behind_logger import message_logger
+from user_tier_index import user_tier_index
+from delivery_scheduler import delivery_scheduler
+from attachment_fanout import attachment_fanout
+from webhook_delivery import webhook_delivery
+from sent_message_store import sent_message_store
+from ingest_queue import ingest_queue
+from reaction_controller import reaction_controller
+from violation_ledger import violation_ledger
+from notice_scheduler import notice_scheduler
 
 def init_database():
     """Initialize MongoDB connection for database logging"""
@@ -60,8 +72,12 @@ def init_database():
         print("❌ ALL DATABASE LOGGING WILL BE DISABLED")
         return None
 
+# Automod scan workers are spawned processes that re-import this module as __mp_main__ -
+# only the real bot process connects to MongoDB and builds the bot
+IS_SCAN_WORKER = __name__ == "__mp_main__"
+
 # Initialize MongoDB
-DATABASE_TYPE = init_database()
+DATABASE_TYPE = None if IS_SCAN_WORKER else init_database()
 DATABASE_AVAILABLE = DATABASE_TYPE == 'mongodb'
 
 # Simple Discord logging - sends summary every 60 seconds
@@ -327,21 +343,32 @@ class CrossChatBot(commands.Bot):
             print("❌ CRITICAL: MongoDB not available - NO DATABASE LOGGING WILL OCCUR")
             print("❌ Set MONGODB_URL or MONGODB_URI environment variable to enable logging")
             self.db_handler = None
+            self.async_db = None
             self.automod = None
         else:
             try:
                 from mongodb_handler import MongoDBHandler
                 self.db_handler = MongoDBHandler()
+                self.async_db = None
                 
                 if self.db_handler._connect():
                     print("✅ MongoDB database logging ENABLED - all moderation actions will be recorded")
                     
+                    # Async facade - coroutines await database calls on a dedicated executor
+                    self.async_db = AsyncMongoDBHandler(self.db_handler)
+                    print(f"✅ MONGODB: Async data layer ready ({self.async_db.max_workers} executor workers)")
+                    
+                    # Crosschat message logs are batched and flushed with bulk_write
+                    message_logger.attach(self.async_db)
+                    sent_message_store.attach(self.async_db)
+                    violation_ledger.attach(self.async_db)
+                    
                     # Database connection verified - no test data needed
                     print("✅ MONGODB: Database connection verified - ready for crosschat logging")
                     
-                    # Check existing crosschat channels in database
-                    existing_channels = self.db_handler.get_crosschat_channels()
-                    print(f"✅ CROSSCHAT STATUS: {len(existing_channels)} channels registered in database")
+                    # Load crosschat channels into the in-memory registry (single DB read)
+                    channel_count = channel_registry.load(self.db_handler, bot=self)
+                    print(f"✅ CROSSCHAT STATUS: {channel_count} channels registered in database")
                     print("ℹ️  Use /setup command to register new crosschat channels manually")
                     
                     # FORCE VERIFY ALL COLLECTIONS EXIST
@@ -359,6 +386,8 @@ class CrossChatBot(commands.Bot):
                     try:
                         from auto_moderation import AutoModerationManager
                         self.automod = AutoModerationManager(bot=self, database_storage=None)
+                        self.automod.load_rule_profiles()
+                        self.automod.load_violation_ledger()
                         print("✅ AutoMod system initialized with MongoDB logging")
                     except Exception as automod_error:
                         print(f"⚠️ AutoMod initialization failed: {automod_error}")
@@ -366,18 +395,21 @@ class CrossChatBot(commands.Bot):
                 else:
                     print("❌ CRITICAL: MongoDB handler connection failed - NO DATABASE LOGGING")
                     self.db_handler = None
+                    self.async_db = None
                     self.automod = None
                     
             except Exception as e:
                 print(f"❌ CRITICAL: Failed to initialize MongoDB handler: {e}")
                 print("❌ NO DATABASE LOGGING WILL OCCUR")
                 self.db_handler = None
+                self.async_db = None
                 self.automod = None
         
         # CRITICAL FIX: Initialize SimpleCrossChat system
         try:
             from simple_crosschat import SimpleCrossChat
             self.cross_chat_manager = SimpleCrossChat(self)
+            ingest_queue.attach(self._handle_crosschat_message)
             
             # DEBUG: Verify db_handler is accessible from cross_chat_manager
             print(f"🔍 DEBUG: Bot has db_handler: {hasattr(self, 'db_handler')}")
@@ -620,7 +652,7 @@ class CrossChatBot(commands.Bot):
                 print(f"🔍 DEBUG: FORCE LOGGING warning for user {target_user.id}")
                 warning_logged = False
                 if self.db_handler:
-                    warning_logged = self.db_handler.add_warning(
+                    warning_logged = await self.async_db.add_warning(
                         user_id=str(target_user.id),
                         moderator_id=str(interaction.user.id),
                         reason=reason,
@@ -720,7 +752,7 @@ class CrossChatBot(commands.Bot):
                 print(f"🔍 DEBUG: FORCE LOGGING ban for user {user.id}")
                 ban_logged = False
                 if self.db_handler:
-                    ban_logged = self.db_handler.ban_user(
+                    ban_logged = await self.async_db.ban_user(
                         user_id=str(user.id),
                         moderator_id=str(interaction.user.id),
                         reason=reason,
@@ -916,10 +948,10 @@ class CrossChatBot(commands.Bot):
                     }
                     
                     # Insert server ban
-                    self.db_handler.db.banned_servers.insert_one(ban_data)
+                    await self.async_db.run(self.db_handler.db.banned_servers.insert_one, ban_data)
                     
                     # Log moderation action
-                    self.db_handler.db.moderation_logs.insert_one({
+                    await self.async_db.run(self.db_handler.db.moderation_logs.insert_one, {
                         "action_type": "server_ban",
                         "server_id": str(guild_id),
                         "moderator_id": str(interaction.user.id),
@@ -973,11 +1005,11 @@ class CrossChatBot(commands.Bot):
                 
                 # Remove server ban from database
                 if self.db_handler and hasattr(self.db_handler, 'db'):
-                    result = self.db_handler.db.banned_servers.delete_one({"server_id": str(guild_id)})
+                    result = await self.async_db.run(self.db_handler.db.banned_servers.delete_one, {"server_id": str(guild_id)})
                     
                     if result.deleted_count > 0:
                         # Log moderation action
-                        self.db_handler.db.moderation_logs.insert_one({
+                        await self.async_db.run(self.db_handler.db.moderation_logs.insert_one, {
                             "action_type": "server_unban",
                             "server_id": str(guild_id),
                             "moderator_id": str(interaction.user.id),
@@ -1021,7 +1053,7 @@ class CrossChatBot(commands.Bot):
             
             try:
                 if self.db_handler and hasattr(self.db_handler, 'db'):
-                    banned_servers = list(self.db_handler.db.banned_servers.find())
+                    banned_servers = await self.async_db.run(lambda: list(self.db_handler.db.banned_servers.find()))
                     
                     if not banned_servers:
                         embed = discord.Embed(
@@ -1244,7 +1276,7 @@ class CrossChatBot(commands.Bot):
                     setup_logged = False
                     if self.db_handler:
                         print(f"🔍 DEBUG: FORCE LOGGING channel setup for {target_channel.id}")
-                        setup_logged = self.db_handler.add_crosschat_channel(
+                        setup_logged = await self.async_db.add_crosschat_channel(
                             channel_id=target_channel.id,
                             guild_id=interaction.guild.id,
                             channel_name=target_channel.name,
@@ -1264,7 +1296,7 @@ class CrossChatBot(commands.Bot):
                                 "moderator_name": str(interaction.user),
                                 "reason": "CrossChat channel enabled via /setup command"
                             }
-                            self.db_handler.log_moderation_action(mod_action)
+                            await self.async_db.log_moderation_action(mod_action)
                             print(f"✅ MODERATION LOGGED: Channel setup action recorded")
                         else:
                             print(f"❌ SETUP LOG FAILED: Could not register channel {target_channel.id}")
@@ -1296,11 +1328,13 @@ class CrossChatBot(commands.Bot):
                     if self.db_handler:
                         print(f"🔍 DEBUG: FORCE LOGGING channel disable for {target_channel.id}")
                         try:
-                            result = self.db_handler.db.crosschat_channels.update_one(
+                            result = await self.async_db.run(
+                                self.db_handler.db.crosschat_channels.update_one,
                                 {"channel_id": str(target_channel.id)},
                                 {"$set": {"active": False, "disabled_at": datetime.utcnow()}}
                             )
                             disable_logged = result.modified_count > 0
+                            channel_registry.remove_channel(target_channel.id)
                             if disable_logged:
                                 print(f"✅ DISABLE LOGGED: Channel {target_channel.id} disabled in MongoDB")
                                 
@@ -1315,7 +1349,7 @@ class CrossChatBot(commands.Bot):
                                     "moderator_name": str(interaction.user),
                                     "reason": "CrossChat channel disabled via /setup command"
                                 }
-                                self.db_handler.log_moderation_action(mod_action)
+                                await self.async_db.log_moderation_action(mod_action)
                                 print(f"✅ MODERATION LOGGED: Channel disable action recorded")
                             else:
                                 print(f"❌ DISABLE LOG FAILED: Could not disable channel {target_channel.id}")
@@ -1348,7 +1382,7 @@ class CrossChatBot(commands.Bot):
                         # Check database status first
                         db_status = False
                         if self.db_handler:
-                            db_channels = self.db_handler.get_crosschat_channels()
+                            db_channels = await self.async_db.get_crosschat_channels()
                             db_status = target_channel.id in db_channels
                         
                         # Check cache status  
@@ -1549,10 +1583,41 @@ class CrossChatBot(commands.Bot):
         except Exception as e:
             print(f"❌ Failed to setup Discord logging: {e}")
 
+    async def close(self):
+        """Flush pending crosschat message logs before disconnecting"""
+        # Stop the producers first - ingest workers log and record violations until they unwind
+        await ingest_queue.stop()
+        await notice_scheduler.stop()
+        await delivery_scheduler.stop()
+        try:
+            await message_logger.stop()
+        except Exception as e:
+            print(f"WRITE_BEHIND_ERROR: Final flush failed: {e}")
+        try:
+            await violation_ledger.stop()
+        except Exception as e:
+            print(f"LEDGER_ERROR: Final flush failed: {e}")
+        if getattr(self, 'async_db', None):
+            self.async_db.shutdown()
+        await attachment_fanout.close()
+        if getattr(self, 'automod', None):
+            self.automod.close()
+        await super().close()
+
     async def on_ready(self):
         print(f"BOT ONLINE: {self.user}")
         print(f"Guilds: {len(self.guilds)}")
         
+        # Resolve registered crosschat channels now that the channel cache is populated
+        channel_registry.resolve_all(self)
+        
+        # Precompute VIP / Elite / Staff tiers from role holders (member cache is populated now)
+        user_tier_index.rebuild(self)
+        
+        # Start the write-behind message log flusher on the running loop
+        if getattr(self, 'async_db', None):
+            message_logger.start()
+        
         # Register slash commands once and sync with Discord
         if not self.commands_registered:
             print("Registering all slash commands...")
@@ -1974,33 +2039,37 @@ class CrossChatBot(commands.Bot):
                 return
             
             # PRIVACY PROTECTION: Only process registered crosschat channels
-            # Check if this channel is registered for crosschat in database
+            # Check if this channel is registered for crosschat (in-memory registry)
             if not (hasattr(self, 'db_handler') and self.db_handler):
                 return
                 
-            crosschat_channels = self.db_handler.get_crosschat_channels()
-            if int(message.channel.id) not in crosschat_channels:
+            if not channel_registry.is_crosschat_channel(message.channel.id):
                 # NOT a crosschat channel - do not process or log
                 return
             
             print(f"🔍 DEBUG: Crosschat message in registered channel {message.channel.name}")
             
-            # Process crosschat ONLY for registered channels
-            if hasattr(self, 'cross_chat_manager') and self.cross_chat_manager:
-                result = await self.cross_chat_manager.process(message)
-                print(f"🔍 DEBUG: Crosschat processing result: {result}")
-                
-        except Exception as e:
-            print(f"❌ CRITICAL: Message processing error: {e}")
-            
         except Exception as e:
             print(f"PRIVACY_CHECK: Failed to verify crosschat channel: {e}")
             # If verification fails, protect privacy by not processing crosschat
             return
-    
+        
+        # Hand off to the bounded ingest queue - ordered per source channel, drained by a worker pool
+        if not await ingest_queue.submit(message):
+            print(f"INGEST_SHED: Crosschat message {message.id} not processed (ingest queue full)")
+
+    async def _handle_crosschat_message(self, message):
+        """Ingest worker: ban and automod checks and crosschat processing, then logging for one message"""
         # Only process crosschat for verified crosschat channels
         print(f"CROSSCHAT_MESSAGE: {message.guild.name}#{message.channel.name} - {message.author.display_name}")
-        
+        try:
+            await self._relay_crosschat_message(message)
+        finally:
+            # Logged only after process() - its duplicate check treats a pending log entry as already processed
+            self._log_crosschat_message(message)
+
+    def _log_crosschat_message(self, message):
+        """Queue the source message for the write-behind MongoDB log"""
         # LOG CROSSCHAT MESSAGE TO MONGODB
         if self.db_handler:
             try:
@@ -2014,16 +2083,18 @@ class CrossChatBot(commands.Bot):
                     "guild_name": message.guild.name,
                     "channel_name": message.channel.name
                 }
-                success = self.db_handler.log_crosschat_message(message_data)
+                success = message_logger.log(message_data)
                 if success:
-                    print(f"✅ MONGODB: Logged crosschat message {message.id}")
+                    print(f"✅ MONGODB: Queued crosschat message {message.id}")
                 else:
                     print(f"❌ MONGODB: Failed to log crosschat message {message.id}")
             except Exception as e:
                 print(f"❌ MONGODB ERROR: {e}")
-        
+
+    async def _relay_crosschat_message(self, message):
+        """Ban and automod checks, then crosschat processing"""
         # Check if user is banned from crosschat
-        if self.db_handler and self.db_handler.is_user_banned(str(message.author.id)):
+        if self.async_db and await self.async_db.is_user_banned(str(message.author.id)):
             await message.delete()
             try:
                 await message.author.send("You are currently banned from crosschat.")
@@ -2049,16 +2120,16 @@ class CrossChatBot(commands.Bot):
             if hasattr(self, 'cross_chat_manager') and self.cross_chat_manager:
                 result = await self.cross_chat_manager.process(message)
                 
-                # Add reaction based on processing result AFTER processing is complete
+                # Final status reaction - applied once, off the hot path
                 if result:
                     if result == 'banned' or result == 'server_banned':
-                        await message.add_reaction('🚫')
+                        reaction_controller.finish(message, '🚫')
                     elif result == 'blocked' or result == 'system_disabled':
-                        await message.add_reaction('⚠️')
+                        reaction_controller.finish(message, '⚠️')
                     elif result == 'processed':
-                        await message.add_reaction('✅')
+                        reaction_controller.finish(message, '✅')
                     elif result == 'failed':
-                        await message.add_reaction('❌')
+                        reaction_controller.finish(message, '❌')
                 
                 print(f"CROSSCHAT_PROCESSED: Message {message.id} processed successfully")
             else:
@@ -2081,12 +2152,11 @@ class CrossChatBot(commands.Bot):
         
         # PRIVACY PROTECTION: Only handle edits for verified crosschat channels
         try:
-            # Check if this channel is registered for crosschat in database
+            # Check if this channel is registered for crosschat (in-memory registry)
             if not (hasattr(self, 'db_handler') and self.db_handler):
                 return
                 
-            crosschat_channels = self.db_handler.get_crosschat_channels()
-            if int(after.channel.id) not in crosschat_channels:
+            if not channel_registry.is_crosschat_channel(after.channel.id):
                 # NOT a crosschat channel - do not process edits
                 return
             
@@ -2132,9 +2202,43 @@ class CrossChatBot(commands.Bot):
         # Only print console info for cross-chat processing
         # Original message kept with reaction - no deletion
 
+    async def on_guild_channel_delete(self, channel):
+        """Drop deleted channels from the crosschat registry cache"""
+        if channel_registry.is_crosschat_channel(channel.id):
+            channel_registry.forget_resolved(channel.id)
+            webhook_delivery.forget(channel.id)
+            print(f"REGISTRY: Crosschat channel {channel.id} was deleted in {channel.guild.name}")
+
+    async def on_webhooks_update(self, channel):
+        """Re-provision crosschat webhooks lazily if the cached one was removed"""
+        if channel_registry.is_crosschat_channel(channel.id):
+            await webhook_delivery.verify(channel)
+
+    async def on_member_update(self, before, after):
+        """Keep the user tier index in sync with role changes"""
+        if before.roles != after.roles:
+            user_tier_index.update_member(after)
+
+    async def on_member_join(self, member):
+        """Index tracked roles of members joining a guild"""
+        user_tier_index.update_member(member)
+
+    async def on_member_remove(self, member):
+        """Drop tier holdings of members leaving a guild"""
+        user_tier_index.remove_member(member.guild.id, member.id)
+
+    async def on_guild_role_update(self, before, after):
+        """Resync holders when a tracked tier role changes"""
+        user_tier_index.refresh_role(after)
+
+    async def on_guild_role_delete(self, role):
+        """Drop a deleted tier role from the index"""
+        user_tier_index.remove_role(role.guild.id, role.id)
+
     async def on_guild_join(self, guild):
         """Called when the bot joins a new guild"""
         print(f"📈 Joined new guild: {guild.name} (ID: {guild.id})")
+        user_tier_index.add_guild(guild)
         await self.update_single_guild_info(guild)
         
         # Send webhook notification for guild join
@@ -2146,11 +2250,12 @@ class CrossChatBot(commands.Bot):
     async def on_guild_remove(self, guild):
         """Called when the bot leaves a guild"""
         print(f"📉 Left guild: {guild.name} (ID: {guild.id})")
+        user_tier_index.remove_guild(guild.id)
         
         # Clean up MongoDB database for this guild
         try:
             if hasattr(self, 'db_handler') and self.db_handler:
-                cleanup_success = self.db_handler.remove_guild_data(str(guild.id))
+                cleanup_success = await self.async_db.remove_guild_data(str(guild.id))
                 if cleanup_success:
                     print(f"✅ Database cleanup completed for guild {guild.name}")
                 else:
@@ -2281,8 +2386,7 @@ class CrossChatBot(commands.Bot):
                 # Get real-time counts with error handling
                 try:
                     if self.db_handler:
-                        crosschat_channels = self.db_handler.get_crosschat_channels()
-                        channel_count = len(crosschat_channels) if crosschat_channels else 0
+                        channel_count = len(channel_registry.get_channel_ids())
                         print(f"STATUS_DEBUG: Found {channel_count} crosschat channels")
                     else:
                         channel_count = 0
@@ -2298,7 +2402,7 @@ class CrossChatBot(commands.Bot):
                 
                 # Get total messages processed from database with fallback
                 try:
-                    total_messages = self.get_total_messages_processed()
+                    total_messages = await self.async_db.get_chatlog_count() if self.async_db else 0
                     print(f"🔍 STATUS_DEBUG: Found {total_messages} total messages processed")
                 except Exception as e:
                     total_messages = 0
@@ -2837,8 +2941,7 @@ class CrossChatBot(commands.Bot):
                 channel_count = 0
                 if hasattr(self, 'db_handler') and self.db_handler:
                     try:
-                        channels = self.db_handler.get_crosschat_channels()
-                        channel_count = len(channels) if channels else 0
+                        channel_count = len(channel_registry.get_channel_ids())
                     except Exception as e:
                         print(f"Error getting database stats: {e}")
                 
@@ -2854,6 +2957,29 @@ class CrossChatBot(commands.Bot):
                 embed.add_field(name="🔗 Crosschat Channels", value=f"{channel_count}", inline=True)
                 embed.add_field(name="🐍 Python Version", value=f"{sys.version.split()[0]}", inline=True)
                 
+                # Bounded in-memory crosschat state
+                if hasattr(self, 'cross_chat_manager') and self.cross_chat_manager:
+                    state = self.cross_chat_manager.get_state_stats()
+                    state_lines = [
+                        f"{name}: {stats['size']}/{stats['max_size']} • {stats['hit_rate']}% hit • {stats['evictions']} evicted"
+                        for name, stats in state.items() if isinstance(stats, dict)
+                    ]
+                    embed.add_field(name="🧠 Crosschat State", value="\n".join(state_lines), inline=False)
+                
+                ingest = ingest_queue.get_stats()
+                embed.add_field(
+                    name="📥 Ingest Queue",
+                    value=f"depth {ingest['depth']}/{ingest['capacity']} • avg wait {ingest['avg_wait_ms']}ms • max wait {ingest['max_wait_ms']}ms • shed {ingest['shed']}",
+                    inline=False
+                )
+                
+                reactions = reaction_controller.get_stats()
+                embed.add_field(
+                    name="🔁 Status Reactions",
+                    value=f"added {reactions['added']} • removed {reactions['removed']} • ⏳ skipped {reactions['hourglass_skipped']} • coalesced {reactions['coalesced']} • duplicates {reactions['duplicates_skipped']}",
+                    inline=False
+                )
+                
                 embed.set_footer(text="SynapseChat Statistics")
                 
                 await interaction.followup.send(embed=embed, ephemeral=True)
@@ -3562,6 +3688,7 @@ class CrossChatBot(commands.Bot):
                 # CACHE UPDATE: Add channel to performance cache immediately
                 from performance_cache import performance_cache
                 performance_cache.add_crosschat_channel(channel_id)
+                channel_registry.add_channel(channel_id, actual_guild_id, channel)
                 print(f"CACHE_SYNC: Added channel {channel_id} to cache after web panel add")
                 
                 # Send confirmation to the channel
@@ -3586,6 +3713,7 @@ class CrossChatBot(commands.Bot):
                 # CACHE UPDATE: Remove channel from performance cache immediately
                 from performance_cache import performance_cache
                 performance_cache.remove_crosschat_channel(channel_id)
+                channel_registry.remove_channel(channel_id)
                 print(f"CACHE_SYNC: Removed channel {channel_id} from cache after web panel removal")
                 
                 # Send confirmation to the channel
@@ -3608,6 +3736,7 @@ class CrossChatBot(commands.Bot):
                             # CACHE UPDATE: Remove channel from performance cache immediately
                             from performance_cache import performance_cache
                             performance_cache.remove_crosschat_channel(channel_id)
+                            channel_registry.remove_channel(channel_id)
                             print(f"CACHE_SYNC: Removed channel {channel_id} from cache after web panel fallback removal")
                             break
 
@@ -4150,7 +4279,7 @@ class CrossChatBot(commands.Bot):
             except Exception as e:
                 pass  # Don't let logging errors break the bot
 
-bot = CrossChatBot()
+bot = None if IS_SCAN_WORKER else CrossChatBot()
 
 flask_app = Flask(__name__)
 
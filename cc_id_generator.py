@@ -0,0 +1,51 @@
+"""
+CC-ID Generator
+Collision-free CrossChat IDs derived locally from the Discord message snowflake
+"""
+
+from typing import Optional
+
+# Crockford base32 - no I, L, O, U so IDs read back unambiguously
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(CROCKFORD_ALPHABET)}
+_DECODE.update({'O': 0, 'I': 1, 'L': 1})
+
+# 64-bit snowflakes encode to at most 13 characters. Footers read CC-XXXXXXXXXXXXX rather than a 6 character
+# CC-XXXXXX: every snowflake bit is significant (timestamp, Discord worker/process, increment), so a shorter
+# ID would have to drop bits and could collide or need a lookup table again
+CC_ID_LENGTH = 13
+VIP_PREFIX = 'V'
+
+def generate_cc_id(message_id, is_vip: bool = False) -> str:
+    """Encode the message snowflake as fixed-width Crockford base32 (VIP IDs get a 'V' prefix).
+
+    Snowflakes are unique (timestamp + Discord worker/process + increment), so the ID cannot
+    collide, needs no database round trip and is identical every time a message is reprocessed.
+    """
+    value = int(message_id)
+    chars = []
+    for _ in range(CC_ID_LENGTH):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    cc_id = ''.join(reversed(chars))
+    return f"{VIP_PREFIX}{cc_id}" if is_vip else cc_id
+
+def decode_cc_id(cc_id: str) -> Optional[int]:
+    """Recover the original message ID from a CC-ID (with or without 'CC-' / 'V' prefix)"""
+    if not cc_id:
+        return None
+    cc_id = cc_id.strip().upper()
+    if cc_id.startswith('CC-'):
+        cc_id = cc_id[3:]
+    if len(cc_id) == CC_ID_LENGTH + 1 and cc_id.startswith(VIP_PREFIX):
+        cc_id = cc_id[1:]
+    if len(cc_id) != CC_ID_LENGTH:
+        return None  # legacy time/random CC-ID
+
+    value = 0
+    for char in cc_id:
+        digit = _DECODE.get(char)
+        if digit is None:
+            return None
+        value = (value << 5) | digit
+    return value
@@ -0,0 +1,193 @@
+"""
+CrossChat Channel Registry
+In-memory set of registered crosschat channels with push invalidation
+"""
+
+import threading
+from typing import Dict, FrozenSet, List, Optional, Any
+
+class ChannelRegistry:
+    """Loads crosschat channels once and answers membership checks from memory"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.bot = None
+
+        # Copy-on-write sets - readers never take the lock
+        self._channel_ids: FrozenSet[int] = frozenset()
+        self._guild_channels: Dict[int, FrozenSet[int]] = {}
+
+        # Resolved discord channel objects (channel_id -> channel)
+        self._resolved: Dict[int, Any] = {}
+
+        self.loaded = False
+        self.load_count = 0
+        self.push_updates = 0
+
+    def load(self, db_handler, bot=None) -> int:
+        """Load the channel set from MongoDB (startup / full resync only)"""
+        if bot is not None:
+            self.bot = bot
+
+        if not db_handler:
+            print("REGISTRY: No database handler - registry empty")
+            return 0
+
+        try:
+            records = db_handler.get_crosschat_channel_records()
+        except Exception as e:
+            print(f"REGISTRY_ERROR: Failed to load crosschat channels: {e}")
+            return len(self._channel_ids)
+
+        channel_ids = set()
+        guild_channels: Dict[int, set] = {}
+        for record in records:
+            try:
+                channel_id = int(record["channel_id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            channel_ids.add(channel_id)
+            guild_id = record.get("guild_id")
+            if guild_id:
+                try:
+                    guild_channels.setdefault(int(guild_id), set()).add(channel_id)
+                except (TypeError, ValueError):
+                    pass
+
+        with self._lock:
+            self._channel_ids = frozenset(channel_ids)
+            self._guild_channels = {gid: frozenset(ids) for gid, ids in guild_channels.items()}
+            self._resolved = {cid: ch for cid, ch in self._resolved.items() if cid in channel_ids}
+            self.loaded = True
+            self.load_count += 1
+
+        print(f"REGISTRY: Loaded {len(channel_ids)} crosschat channels from MongoDB")
+        return len(channel_ids)
+
+    def resolve_all(self, bot=None) -> int:
+        """Resolve every registered channel ID to its discord channel object"""
+        if bot is not None:
+            self.bot = bot
+        if not self.bot:
+            return 0
+
+        resolved = {}
+        for channel_id in self._channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                resolved[channel_id] = channel
+
+        with self._lock:
+            self._resolved = resolved
+
+        missing = len(self._channel_ids) - len(resolved)
+        print(f"REGISTRY: Resolved {len(resolved)} channels ({missing} not accessible)")
+        return len(resolved)
+
+    def is_crosschat_channel(self, channel_id) -> bool:
+        """O(1) membership check - no database access"""
+        try:
+            return int(channel_id) in self._channel_ids
+        except (TypeError, ValueError):
+            return False
+
+    def get_channel_ids(self) -> List[int]:
+        """Get all registered channel IDs"""
+        return list(self._channel_ids)
+
+    def get_guild_channel_ids(self, guild_id) -> List[int]:
+        """Get registered channel IDs for a single guild"""
+        return list(self._guild_channels.get(int(guild_id), ()))
+
+    def get_channel(self, channel_id) -> Optional[Any]:
+        """Get the resolved discord channel, resolving lazily on first use"""
+        channel_id = int(channel_id)
+        if channel_id not in self._channel_ids:
+            return None
+
+        channel = self._resolved.get(channel_id)
+        if channel is None and self.bot:
+            channel = self.bot.get_channel(channel_id)
+            if channel is not None:
+                with self._lock:
+                    self._resolved[channel_id] = channel
+        return channel
+
+    def get_channels(self) -> List[Any]:
+        """Get all accessible registered channel objects"""
+        channels = []
+        for channel_id in self._channel_ids:
+            channel = self.get_channel(channel_id)
+            if channel:
+                channels.append(channel)
+        return channels
+
+    def get_destinations(self, source_channel_id) -> List[Any]:
+        """Get resolved destination channels for a message from source_channel_id"""
+        source_channel_id = int(source_channel_id)
+        return [ch for ch in self.get_channels() if ch.id != source_channel_id]
+
+    def add_channel(self, channel_id, guild_id=None, channel=None):
+        """Push update: channel registered for crosschat"""
+        channel_id = int(channel_id)
+        with self._lock:
+            self._channel_ids = self._channel_ids | {channel_id}
+            if guild_id is not None:
+                guild_id = int(guild_id)
+                self._guild_channels[guild_id] = self._guild_channels.get(guild_id, frozenset()) | {channel_id}
+            if channel is not None:
+                self._resolved[channel_id] = channel
+            else:
+                self._resolved.pop(channel_id, None)
+            self.push_updates += 1
+        print(f"REGISTRY_UPDATE: Added channel {channel_id}")
+
+    def remove_channel(self, channel_id):
+        """Push update: channel removed or disabled"""
+        channel_id = int(channel_id)
+        with self._lock:
+            if channel_id not in self._channel_ids:
+                return
+            self._channel_ids = self._channel_ids - {channel_id}
+            for guild_id, ids in list(self._guild_channels.items()):
+                if channel_id in ids:
+                    remaining = ids - {channel_id}
+                    if remaining:
+                        self._guild_channels[guild_id] = remaining
+                    else:
+                        del self._guild_channels[guild_id]
+            self._resolved.pop(channel_id, None)
+            self.push_updates += 1
+        print(f"REGISTRY_UPDATE: Removed channel {channel_id}")
+
+    def remove_guild(self, guild_id):
+        """Push update: all channels of a guild removed"""
+        guild_id = int(guild_id)
+        with self._lock:
+            ids = self._guild_channels.pop(guild_id, frozenset())
+            if not ids:
+                return
+            self._channel_ids = self._channel_ids - ids
+            for channel_id in ids:
+                self._resolved.pop(channel_id, None)
+            self.push_updates += 1
+        print(f"REGISTRY_UPDATE: Removed {len(ids)} channels for guild {guild_id}")
+
+    def forget_resolved(self, channel_id):
+        """Drop a cached channel object (e.g. channel deleted) without unregistering it"""
+        with self._lock:
+            self._resolved.pop(int(channel_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics"""
+        return {
+            'loaded': self.loaded,
+            'channels': len(self._channel_ids),
+            'resolved': len(self._resolved),
+            'guilds': len(self._guild_channels),
+            'load_count': self.load_count,
+            'push_updates': self.push_updates
+        }
+
+# Global registry instance
+channel_registry = ChannelRegistry()
@@ -0,0 +1,265 @@
+"""
+Tiered Delivery Scheduler
+Worker tasks pull crosschat sends from per-tier queues with weighted fair scheduling and latency targets
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from typing import Callable, Awaitable, Dict, Any, Optional
+
+# Tiers in preemption order (tag_info['priority'] 10 / 25 / 100, then housekeeping such as reactions)
+ELITE = 'elite'
+ARCHITECT = 'architect'
+STANDARD = 'standard'
+BACKGROUND = 'background'
+TIERS = (ELITE, ARCHITECT, STANDARD, BACKGROUND)
+
+class _Slot:
+    """The delivery slot a running job holds - given up while the job pauses"""
+
+    __slots__ = ('tier', 'held')
+
+    def __init__(self, tier: str):
+        self.tier = tier
+        self.held = True
+
+# Slot of the scheduled job running in the current task (None outside the scheduler)
+_current_slot: contextvars.ContextVar = contextvars.ContextVar('delivery_slot', default=None)
+
+class DeliveryScheduler:
+    """Weighted fair queueing across tiers with a capped deadline boost for jobs past their latency target.
+    DELIVERY_WORKERS slots run jobs concurrently; a job waiting on a rate limit or retry backoff gives its slot up"""
+
+    def __init__(self, workers: int = None):
+        self.worker_count = workers or int(os.environ.get('DELIVERY_WORKERS', 16))
+
+        # Latency targets (queue wait + send), configurable per tier
+        self.targets = {
+            ELITE: int(os.environ.get('DELIVERY_TARGET_ELITE_MS', 250)) / 1000,
+            ARCHITECT: int(os.environ.get('DELIVERY_TARGET_ARCHITECT_MS', 500)) / 1000,
+            STANDARD: int(os.environ.get('DELIVERY_TARGET_STANDARD_MS', 1000)) / 1000,
+            BACKGROUND: int(os.environ.get('DELIVERY_TARGET_BACKGROUND_MS', 5000)) / 1000,
+        }
+        # Share of worker picks under contention - defaults to inverse of the latency targets
+        self.weights = {
+            ELITE: int(os.environ.get('DELIVERY_WEIGHT_ELITE', 8)),
+            ARCHITECT: int(os.environ.get('DELIVERY_WEIGHT_ARCHITECT', 4)),
+            STANDARD: int(os.environ.get('DELIVERY_WEIGHT_STANDARD', 2)),
+            BACKGROUND: int(os.environ.get('DELIVERY_WEIGHT_BACKGROUND', 1)),
+        }
+        # At most one deadline boost per this many picks - the rest follow the finish tags
+        self.boost_every = max(int(os.environ.get('DELIVERY_BOOST_EVERY', 4)), 1)
+
+        self._queues: Dict[str, deque] = {tier: deque() for tier in TIERS}
+        self._finish: Dict[str, float] = {tier: 0.0 for tier in TIERS}  # last virtual finish tag per tier
+        self._virtual_time = 0.0
+        self._picks = 0
+        self._last_boost = -self.boost_every
+        self._available = None  # asyncio.Semaphore counting queued jobs
+        self._slots = None      # asyncio.Semaphore counting free delivery slots
+        self._dispatcher = None
+        self._running = set()
+
+        # Statistics
+        self.stats = {
+            tier: {'submitted': 0, 'completed': 0, 'failed': 0, 'target_misses': 0,
+                   'deadline_boosts': 0, 'pauses': 0, 'total_wait': 0.0, 'max_wait': 0.0,
+                   'recent_latency': deque(maxlen=200)}
+            for tier in TIERS
+        }
+
+    @staticmethod
+    def tier_for_priority(priority: int) -> str:
+        """Map tag_info['priority'] (lower = faster) to a delivery tier"""
+        if priority <= 10:
+            return ELITE
+        if priority <= 25:
+            return ARCHITECT
+        return STANDARD
+
+    def start(self):
+        """Start the dispatcher on the running loop (idempotent)"""
+        if self._dispatcher and not self._dispatcher.done():
+            return
+        if self._available is None:
+            self._available = asyncio.Semaphore(0)
+        self._slots = asyncio.Semaphore(self.worker_count)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        print(f"SCHEDULER: Started with {self.worker_count} delivery slots (targets: "
+              + ", ".join(f"{tier} {int(target * 1000)}ms" for tier, target in self.targets.items()) + ")")
+
+    def _enqueue(self, tier: str, entry_job, future: asyncio.Future):
+        # Virtual finish tag: a tier's jobs advance its clock by 1/weight
+        start_tag = max(self._virtual_time, self._finish[tier])
+        finish_tag = start_tag + 1.0 / max(self.weights[tier], 1)
+        self._finish[tier] = finish_tag
+        self._queues[tier].append((finish_tag, time.perf_counter(), entry_job, future))
+        self._available.release()
+
+    def submit(self, tier: str, job: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Queue a send job for a tier and return a future for its result"""
+        if tier not in self._queues:
+            tier = STANDARD
+        self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(tier, job, future)
+        self.stats[tier]['submitted'] += 1
+        return future
+
+    async def pause(self, delay: float):
+        """Sleep without holding a delivery slot. Jobs call this for rate-limit and retry waits:
+        the slot goes to other queued jobs, and the job is requeued in its tier once the delay is over.
+        Outside a scheduled job it is a plain sleep"""
+        slot = _current_slot.get()
+        if slot is None or not slot.held or self._slots is None:
+            await asyncio.sleep(delay)
+            return
+
+        slot.held = False
+        self._slots.release()
+        self.stats[slot.tier]['pauses'] += 1
+        resumed = asyncio.get_running_loop().create_future()
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Not before now - back into the tier queue to win a slot under the usual weights
+            self._enqueue(slot.tier, None, resumed)
+            await resumed
+        except asyncio.CancelledError:
+            if resumed.done() and not resumed.cancelled():
+                slot.held = True  # the dispatcher already handed the slot over - the job's finally releases it
+            else:
+                resumed.cancel()
+            raise
+        slot.held = True
+
+    def _next_job(self):
+        """Pick the next job: an overdue VIP tier head if the boost budget allows, otherwise the smallest finish tag"""
+        self._picks += 1
+        # Boosts are capped so sustained VIP load (every head overdue) cannot turn into strict priority;
+        # standard and background are never boosted - their weights alone keep them from starving
+        if self._picks - self._last_boost >= self.boost_every:
+            now = time.perf_counter()
+            for tier in (ELITE, ARCHITECT):
+                queue = self._queues[tier]
+                if queue and now - queue[0][1] >= self.targets[tier]:
+                    self._last_boost = self._picks
+                    self.stats[tier]['deadline_boosts'] += 1
+                    return tier, queue.popleft()
+
+        best_tier = None
+        for tier in TIERS:
+            queue = self._queues[tier]
+            if queue and (best_tier is None or queue[0][0] < self._queues[best_tier][0][0]):
+                best_tier = tier
+        return best_tier, self._queues[best_tier].popleft()
+
+    async def _dispatch(self):
+        """Hand a free slot to the next job (or paused job) picked by weighted fair queueing"""
+        while True:
+            try:
+                await self._available.acquire()
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                break
+
+            tier, (finish_tag, queued_at, job, future) = self._next_job()
+            self._virtual_time = max(self._virtual_time, finish_tag)
+
+            if future.done():
+                # Cancelled while queued
+                self._slots.release()
+                continue
+            if job is None:
+                # A paused job resuming - the slot passes to it
+                future.set_result(None)
+                continue
+
+            wait = time.perf_counter() - queued_at
+            stats = self.stats[tier]
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+
+            task = asyncio.create_task(self._run(tier, queued_at, job, future))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, tier: str, queued_at: float, job: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        slot = _Slot(tier)
+        _current_slot.set(slot)
+        stats = self.stats[tier]
+        try:
+            result = await job()
+            if not future.done():
+                future.set_result(result)
+            stats['completed'] += 1
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            stats['failed'] += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            if slot.held:
+                slot.held = False
+                self._slots.release()
+
+        latency = time.perf_counter() - queued_at
+        stats['recent_latency'].append(latency)
+        if latency > self.targets[tier]:
+            stats['target_misses'] += 1
+
+    async def stop(self):
+        """Cancel the dispatcher and running jobs and wait for them to unwind (queued jobs are cancelled)"""
+        tasks = [task for task in [self._dispatcher, *self._running] if task]
+        self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._available = None
+        self._slots = None
+        for queue in self._queues.values():
+            while queue:
+                queue.popleft()[3].cancel()
+
+    def queue_depth(self, tier: Optional[str] = None) -> int:
+        if tier:
+            return len(self._queues[tier])
+        return sum(len(queue) for queue in self._queues.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier queue depth, wait and latency statistics"""
+        tiers = {}
+        for tier in TIERS:
+            stats = self.stats[tier]
+            served = stats['completed'] + stats['failed']
+            recent = sorted(stats['recent_latency'])
+            tiers[tier] = {
+                'depth': len(self._queues[tier]),
+                'submitted': stats['submitted'],
+                'completed': stats['completed'],
+                'failed': stats['failed'],
+                'target_ms': int(self.targets[tier] * 1000),
+                'target_misses': stats['target_misses'],
+                'deadline_boosts': stats['deadline_boosts'],
+                'pauses': stats['pauses'],
+                'avg_wait_ms': round(stats['total_wait'] / served * 1000, 2) if served else 0.0,
+                'max_wait_ms': round(stats['max_wait'] * 1000, 2),
+                'p95_latency_ms': round(recent[int(len(recent) * 0.95) - 1] * 1000, 2) if recent else 0.0
+            }
+        return {
+            'workers': self.worker_count,
+            'running': len(self._running),
+            'weights': dict(self.weights),
+            'boost_every': self.boost_every,
+            'tiers': tiers
+        }
+
+# Global scheduler instance
+delivery_scheduler = DeliveryScheduler()
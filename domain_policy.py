@@ -0,0 +1,116 @@
+"""
+Domain Policy
+URL host extraction and allow/deny domain lists stored as reversed-label suffix tries
+"""
+
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Where a URL starts - the host is parsed by hand from there
+_URL_START = re.compile(r'https?://|www\.', re.IGNORECASE)
+# Characters that end the authority part of a URL
+_AUTHORITY_END = frozenset('/?#\\')
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase, without wildcard prefix or trailing dot ('*.Example.com.' -> 'example.com')"""
+    domain = domain.strip().lower()
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    return domain.strip('.')
+
+def extract_hosts(content: str) -> List[Tuple[str, int, int]]:
+    """(host, url start, url end) for every http(s):// or www. URL in the text - one left-to-right pass"""
+    hosts = []
+    position = 0
+    length = len(content)
+    while True:
+        match = _URL_START.search(content, position)
+        if not match:
+            break
+        start = match.start()
+        host_start = match.end() if match.group().endswith('/') else start
+
+        # The URL runs to the next whitespace, its authority to the first path/query/fragment character
+        end = host_start
+        authority_end = None
+        while end < length and not content[end].isspace():
+            if authority_end is None and content[end] in _AUTHORITY_END:
+                authority_end = end
+            end += 1
+        authority = content[host_start:end if authority_end is None else authority_end]
+
+        # Drop user info, then keep the leading hostname characters (stops at a port or punctuation)
+        authority = authority.rpartition('@')[2]
+        host_end = 0
+        while host_end < len(authority) and (authority[host_end].isalnum() or authority[host_end] in '-._'):
+            host_end += 1
+        host = authority[:host_end].lower().strip('.')
+        if host:
+            hosts.append((host, start, end))
+        position = max(end, start + 1)
+    return hosts
+
+class DomainTrie:
+    """Domains keyed by reversed labels (com -> example -> docs). A lookup walks the host's labels
+    right to left, so it costs one dict step per label however many domains are listed.
+    A listed domain also covers all of its subdomains"""
+
+    _END = ''  # labels are never empty, so '' marks the end of a listed domain
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root = {}
+        self._size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str):
+        domain = normalize_domain(domain)
+        if not domain:
+            return
+        node = self._root
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        if self._END not in node:
+            node[self._END] = True
+            self._size += 1
+
+    def match_depth(self, host: str) -> int:
+        """Label count of the longest listed suffix of host (0 if none is listed)"""
+        node = self._root
+        depth = matched = 0
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            depth += 1
+            if self._END in node:
+                matched = depth
+        return matched
+
+    def __len__(self) -> int:
+        return self._size
+
+class DomainPolicy:
+    """Allow/deny tries in layers (e.g. default rules, then guild rules).
+    The most specific listed suffix wins across all layers; deny wins a tie"""
+
+    def __init__(self, layers: Sequence[Tuple[DomainTrie, DomainTrie]] = ()):
+        # (allow, deny) pairs, empty tries left out
+        self.layers = tuple((allow, deny) for allow, deny in layers if len(allow) or len(deny))
+        self.has_deny = any(len(deny) for _, deny in self.layers)
+
+    def verdict(self, host: str) -> Optional[bool]:
+        """True if allowed, False if denied, None if the host is not listed"""
+        allowed = denied = 0
+        for allow, deny in self.layers:
+            allowed = max(allowed, allow.match_depth(host))
+            denied = max(denied, deny.match_depth(host))
+        if denied and denied >= allowed:
+            return False
+        return True if allowed else None
+
+    def __bool__(self) -> bool:
+        return bool(self.layers)
+
+    def __len__(self) -> int:
+        return sum(len(allow) + len(deny) for allow, deny in self.layers)
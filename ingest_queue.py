@@ -0,0 +1,122 @@
+"""
+Crosschat Ingest Queue
+Bounded, channel-sharded queue drained by a worker pool - ordered per source channel with backpressure
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Awaitable, Dict, Any, List, Optional
+
+class IngestQueue:
+    """Each source channel hashes to one shard; a shard's worker handles its messages strictly in order"""
+
+    def __init__(self, workers: int = None, shard_capacity: int = None, backpressure_ms: int = None):
+        self.worker_count = workers or int(os.environ.get('INGEST_WORKERS', 8))
+        self.shard_capacity = shard_capacity or int(os.environ.get('INGEST_SHARD_CAPACITY', 250))
+        # How long on_message may wait for room before the message is shed
+        self.backpressure = (backpressure_ms if backpressure_ms is not None else int(os.environ.get('INGEST_BACKPRESSURE_MS', 500))) / 1000
+
+        self.handler: Optional[Callable[[Any], Awaitable[Any]]] = None
+        self._shards: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.shed = 0
+        self.backpressured = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def attach(self, handler: Callable[[Any], Awaitable[Any]]):
+        """Set the coroutine that processes one message"""
+        self.handler = handler
+
+    def start(self):
+        """Start shard workers on the running loop (idempotent)"""
+        if self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._shards = [asyncio.Queue(maxsize=self.shard_capacity) for _ in range(self.worker_count)]
+        self._workers = [asyncio.create_task(self._worker(shard)) for shard in self._shards]
+        print(f"INGEST: Started {self.worker_count} workers ({self.shard_capacity} messages per shard)")
+
+    def _shard_for(self, message) -> asyncio.Queue:
+        return self._shards[message.channel.id % len(self._shards)]
+
+    async def submit(self, message) -> bool:
+        """Queue a message for processing. Returns False if it was shed because its shard stayed full"""
+        if not self.handler:
+            return False
+        self.start()
+
+        shard = self._shard_for(message)
+        item = (time.perf_counter(), message)
+        try:
+            shard.put_nowait(item)
+        except asyncio.QueueFull:
+            # Backpressure: hold this on_message briefly, then shed
+            self.backpressured += 1
+            try:
+                await asyncio.wait_for(shard.put(item), timeout=self.backpressure)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                print(f"INGEST_SHED: Queue for channel {message.channel.id} full - dropped message {message.id}")
+                return False
+
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.depth())
+        return True
+
+    async def _worker(self, shard: asyncio.Queue):
+        while True:
+            try:
+                queued_at, message = await shard.get()
+            except asyncio.CancelledError:
+                break
+
+            wait = time.perf_counter() - queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            try:
+                await self.handler(message)
+                self.completed += 1
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.failed += 1
+                print(f"INGEST_ERROR: Failed to process message {message.id}: {e}")
+            finally:
+                shard.task_done()
+
+    async def stop(self):
+        """Cancel workers and wait for them to unwind (queued messages are dropped)"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def depth(self) -> int:
+        return sum(shard.qsize() for shard in self._shards)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and shedding statistics"""
+        dequeued = self.completed + self.failed
+        return {
+            'workers': len(self._workers),
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'capacity': self.worker_count * self.shard_capacity,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'backpressured': self.backpressured,
+            'shed': self.shed,
+            'avg_wait_ms': round(self.total_wait / dequeued * 1000, 2) if dequeued else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2)
+        }
+
+# Global ingest queue instance
+ingest_queue = IngestQueue()
@@ -4,11 +4,78 @@ Reliable NoSQL database with generous free tier
 """
 
 import os
+import random
+import time
 import pymongo
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import ConnectionFailure
+from pymongo.write_concern import WriteConcern
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 import threading
+from channel_registry import channel_registry
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker with exponential reconnect backoff"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.retry_at = 0.0
+        self.opened_count = 0
+    
+    def allow_request(self) -> bool:
+        """Return True if a connection attempt may go ahead now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() >= self.retry_at:
+                # Let exactly one trial attempt through
+                self.state = self.HALF_OPEN
+                return True
+            return False
+    
+    def record_success(self):
+        """Close the breaker after a successful operation or trial"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ MONGODB_BREAKER: {self.state} -> closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+    
+    def record_failure(self):
+        """Count a failure and open the breaker once the threshold is reached"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                # Equal jitter (half fixed, half random) keeps many handlers from reconnecting in lockstep
+                delay = random.uniform(self.backoff / 2, self.backoff)
+                self.retry_at = time.monotonic() + delay
+                if self.state != self.OPEN:
+                    self.opened_count += 1
+                print(f"❌ MONGODB_BREAKER: {self.state} -> open (retry in {delay:.1f}s, failures: {self.failures})")
+                self.state = self.OPEN
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state for monitoring"""
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'backoff_seconds': round(self.backoff, 2),
+            'opened_count': self.opened_count
+        }
 
 class MongoDBHandler:
     """MongoDB handler with graceful error handling"""
@@ -17,8 +84,27 @@ class MongoDBHandler:
         self.client = None
         self.db = None
         self._connection_lock = threading.Lock()
-        self.connection_failed = False
         
+        # Hot path only reads this flag - the health monitor keeps it current
+        self._healthy = False
+        self._disabled = False  # No MONGODB_URL configured - never retry
+        self._collections_initialized = False
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('MONGODB_BREAKER_THRESHOLD', 3)),
+            max_backoff=float(os.environ.get('MONGODB_MAX_BACKOFF', 60))
+        )
+        
+        # Background health monitor
+        self.health_interval = float(os.environ.get('MONGODB_HEALTH_INTERVAL', 10))
+        self._monitor_thread = None
+        self._monitor_stop = threading.Event()
+        self.last_ping_ms = None
+    
+    @property
+    def connection_failed(self) -> bool:
+        """True while the database is unavailable (disabled or breaker open)"""
+        return self._disabled or (not self._healthy and self.breaker.state != CircuitBreaker.CLOSED)
+    
     def _connect(self) -> bool:
         """Create MongoDB connection and initialize collections"""
         try:
@@ -32,35 +118,109 @@ class MongoDBHandler:
                 for key in os.environ:
                     if 'MONGO' in key.upper():
                         print(f"   - {key}: {'SET' if os.environ[key] else 'EMPTY'}")
-                self.connection_failed = True
+                self._disabled = True
                 return False
                 
-            print(f"🔗 Connecting to MongoDB for database logging...")
-            self.client = MongoClient(mongodb_url, serverSelectionTimeoutMS=15000)
+            if self.client is None:
+                print(f"🔗 Connecting to MongoDB for database logging...")
+                self.client = MongoClient(mongodb_url, serverSelectionTimeoutMS=15000)
             
             # Test connection with ping
             self.client.admin.command('ping')
             self.db = self.client.synapsechat
             
-            # Initialize all required collections and indexes
-            self._initialize_collections()
+            # Initialize all required collections and indexes (first connect only)
+            if not self._collections_initialized:
+                self._initialize_collections()
+                self._collections_initialized = True
+            
+            self._healthy = True
+            self.breaker.record_success()
+            self._start_health_monitor()
             
             print("✅ MongoDB connected - database logging ACTIVE")
             return True
             
         except Exception as e:
             print(f"❌ MongoDB connection failed: {e}")
-            print("❌ Database logging will be DISABLED")
-            self.connection_failed = True
+            print("❌ Database logging unavailable - health monitor will retry with backoff")
+            self._healthy = False
+            self.breaker.record_failure()
+            self._start_health_monitor()
             return False
     
+    def _start_health_monitor(self):
+        """Start the background health monitor thread (idempotent)"""
+        if self._disabled or (self._monitor_thread and self._monitor_thread.is_alive()):
+            return
+        
+        self._monitor_stop.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._health_monitor_loop,
+            name="MongoHealthMonitor",
+            daemon=True
+        )
+        self._monitor_thread.start()
+        print(f"🩺 MONGODB: Health monitor started (interval {self.health_interval}s)")
+    
+    def _health_monitor_loop(self):
+        """Ping periodically while healthy, reconnect with backoff while not"""
+        while not self._monitor_stop.is_set():
+            if self._healthy:
+                wait = self.health_interval
+            else:
+                wait = max(0.5, min(self.health_interval, self.breaker.retry_at - time.monotonic()))
+            if self._monitor_stop.wait(wait):
+                break
+            
+            if self._healthy:
+                self._check_health()
+            elif self.breaker.allow_request():
+                with self._connection_lock:
+                    if not self._healthy:
+                        self._connect()
+    
+    def _check_health(self):
+        """Ping the server once and update the cached health flag"""
+        try:
+            started = time.perf_counter()
+            self.client.admin.command('ping')
+            self.last_ping_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.breaker.record_success()
+        except Exception as e:
+            print(f"❌ MONGODB_HEALTH: Ping failed: {e}")
+            self._mark_unhealthy()
+    
+    def _mark_unhealthy(self):
+        """Flip the cached health flag and feed the circuit breaker"""
+        self._healthy = False
+        self.breaker.record_failure()
+    
+    def _record_operation_error(self, error: Exception):
+        """Connection-level errors from real operations trip the breaker immediately"""
+        if isinstance(error, ConnectionFailure):
+            self._mark_unhealthy()
+    
+    def stop_health_monitor(self):
+        """Stop the background health monitor"""
+        self._monitor_stop.set()
+    
+    def get_health_stats(self) -> Dict[str, Any]:
+        """Get connection health for monitoring"""
+        return {
+            'healthy': self._healthy,
+            'disabled': self._disabled,
+            'last_ping_ms': self.last_ping_ms,
+            'breaker': self.breaker.get_stats()
+        }
+    
     def _initialize_collections(self):
         """Initialize all required collections with proper indexes"""
         try:
             collections = [
                 'crosschat_messages', 'crosschat_channels', 'banned_users', 
                 'user_warnings', 'guild_info', 'bot_status', 'moderation_logs',
-                'sent_messages', 'pending_alerts'
+                'sent_messages', 'pending_alerts', 'automod_profiles', 'automod_ledger'
             ]
             
             existing = self.db.list_collection_names()
@@ -73,6 +233,15 @@ class MongoDBHandler:
             self.db.crosschat_messages.create_index([("message_id", 1)], unique=True, background=True)
             self.db.crosschat_channels.create_index([("channel_id", 1)], unique=True, background=True)
             self.db.banned_users.create_index([("user_id", 1)], unique=True, background=True)
+            # Edit/delete lookups by CC-ID and per-channel lookups of delivered copies
+            self.db.sent_messages.create_index([("cc_id", 1), ("channel_id", 1)], background=True)
+            self.db.sent_messages.create_index([("channel_id", 1), ("message_id", 1)], background=True)
+            self.db.sent_messages.create_index([("timestamp", 1)], background=True)
+            # One document per published automod rule version
+            self.db.automod_profiles.create_index([("guild_id", 1), ("version", -1)], unique=True, background=True)
+            # Decayed per-user violation counters - untouched entries expire after 30 days
+            self.db.automod_ledger.create_index([("user_id", 1)], unique=True, background=True)
+            self.db.automod_ledger.create_index([("updated_at", 1)], expireAfterSeconds=30 * 86400, background=True)
             
         except Exception as e:
             print(f"❌ Error initializing collections: {e}")
@@ -85,16 +254,28 @@ class MongoDBHandler:
                 print(f"❌ DEBUG: Cannot get channels - no database connection")
                 return []
             
-            channels = list(self.db.crosschat_channels.find({}, {"channel_id": 1}))
+            channels = list(self.db.crosschat_channels.find({"active": {"$ne": False}}, {"channel_id": 1}))
             channel_ids = [int(ch["channel_id"]) for ch in channels]
             print(f"✅ DEBUG: Found {len(channel_ids)} crosschat channels: {channel_ids}")
             return channel_ids
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL: Error getting crosschat channels: {e}")
             import traceback
             traceback.print_exc()
             return []
     
+    def get_crosschat_channel_records(self) -> List[Dict[str, Any]]:
+        """Get active crosschat channel records (channel_id + guild_id) for the channel registry"""
+        if not self._ensure_connected():
+            print(f"❌ REGISTRY: Cannot load channels - no database connection")
+            return []
+        
+        return list(self.db.crosschat_channels.find(
+            {"active": {"$ne": False}},
+            {"channel_id": 1, "guild_id": 1, "_id": 0}
+        ))
+    
     def add_crosschat_channel(self, channel_id: int, guild_id: int, channel_name: str = None, guild_name: str = None) -> bool:
         """Add crosschat channel"""
         try:
@@ -124,6 +305,7 @@ class MongoDBHandler:
             
             if result.upserted_id or result.modified_count > 0:
                 print(f"✅ FORCED SUCCESS: Channel {channel_id} added/updated in MongoDB")
+                channel_registry.add_channel(channel_id, guild_id)
                 
                 # VERIFY the channel was actually added
                 verify = self.db.crosschat_channels.find_one({"channel_id": str(channel_id)})
@@ -137,6 +319,7 @@ class MongoDBHandler:
                 return False
                 
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL: Error adding crosschat channel: {e}")
             import traceback
             traceback.print_exc()
@@ -156,6 +339,7 @@ class MongoDBHandler:
                 print(f"🔍 DUPLICATE_CHECK: Message {message_id} not found - proceeding with processing")
             return message
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error getting crosschat message: {e}")
             return None
 
@@ -171,6 +355,7 @@ class MongoDBHandler:
             )
             return result.modified_count > 0
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error updating crosschat message: {e}")
             return False
 
@@ -183,6 +368,7 @@ class MongoDBHandler:
             alerts = list(self.db.pending_alerts.find({"processed": False}))
             return alerts
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error getting pending alerts: {e}")
             return []
 
@@ -198,6 +384,7 @@ class MongoDBHandler:
             )
             return result.modified_count > 0
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error marking alert processed: {e}")
             return False
 
@@ -215,43 +402,64 @@ class MongoDBHandler:
             })
             return True
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error tracking sent message: {e}")
             return False
 
+    def track_sent_messages(self, cc_id: str, entries: List[tuple]) -> bool:
+        """Track every delivered copy of a CC-ID with a single insert_many"""
+        try:
+            if not entries:
+                return True
+            if not self._ensure_connected():
+                return False
+            
+            now = datetime.utcnow()
+            self.db.sent_messages.insert_many([
+                {"cc_id": cc_id, "channel_id": channel_id, "message_id": message_id, "timestamp": now}
+                for channel_id, message_id in entries
+            ], ordered=False)
+            return True
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ Error tracking sent messages: {e}")
+            return False
+
     def get_sent_messages_by_cc_id(self, cc_id: str) -> List[Dict[str, Any]]:
         """Get all sent messages for a specific CC-ID for global editing"""
         try:
             if not self._ensure_connected():
                 return []
             
-            messages = list(self.db.sent_messages.find({"cc_id": cc_id}))
+            messages = list(self.db.sent_messages.find({"cc_id": cc_id}, {"_id": 0, "channel_id": 1, "message_id": 1}))
             print(f"🔍 EDIT_LOOKUP: Found {len(messages)} sent messages for CC-ID {cc_id}")
             return messages
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error getting sent messages by CC-ID: {e}")
             return []
 
     def _ensure_connected(self) -> bool:
-        """Ensure database connection is active"""
-        print(f"🔍 DEBUG: Checking connection status - failed: {self.connection_failed}")
-        
-        if self.connection_failed:
-            print(f"❌ DEBUG: Connection previously failed - not retrying")
+        """Check the cached health flag - no round trip and no reconnect on the hot path"""
+        if self._healthy:
+            return True
+        if self._disabled:
             return False
-            
-        with self._connection_lock:
-            if self.client is None or self.db is None:
-                print(f"🔍 DEBUG: No active connection - attempting to connect...")
-                return self._connect()
-            
-            # Test existing connection
+        
+        if self.client is None:
+            # First use - one caller connects, concurrent callers fail fast instead of queueing on the lock
+            if not self._connection_lock.acquire(blocking=False):
+                return False
             try:
-                self.client.admin.command('ping')
-                print(f"✅ DEBUG: Existing connection verified")
-                return True
-            except Exception as e:
-                print(f"❌ DEBUG: Connection test failed: {e}")
+                if self._healthy:
+                    return True
                 return self._connect()
+            finally:
+                self._connection_lock.release()
+        
+        # Reconnects belong to the health monitor (breaker backoff and half-open probe)
+        self._start_health_monitor()
+        return False
 
     def log_crosschat_message(self, message_data: Dict[str, Any]) -> bool:
         """Log crosschat message to database with duplicate handling"""
@@ -290,6 +498,7 @@ class MongoDBHandler:
             
             return True
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL logging crosschat message ERROR: {e}")
             # Only show full traceback for non-duplicate errors
             if "E11000 duplicate key error" not in str(e):
@@ -297,6 +506,32 @@ class MongoDBHandler:
                 traceback.print_exc()
             return False
 
+    def bulk_upsert_crosschat_messages(self, documents: Dict[str, Dict[str, Any]]) -> bool:
+        """Upsert many coalesced crosschat message documents in one unordered bulk_write"""
+        try:
+            if not documents:
+                return True
+            if not self._ensure_connected():
+                return False
+            
+            # Acknowledged writes replace read-back verification
+            write_concern = os.environ.get('MONGODB_LOG_WRITE_CONCERN', '1')
+            collection = self.db.crosschat_messages.with_options(
+                write_concern=WriteConcern(w=int(write_concern) if write_concern.isdigit() else write_concern)
+            )
+            
+            operations = [
+                UpdateOne({"message_id": message_id}, {"$set": fields}, upsert=True)
+                for message_id, fields in documents.items()
+            ]
+            result = collection.bulk_write(operations, ordered=False)
+            print(f"✅ MONGODB_BULK: {len(operations)} messages ({result.upserted_count} new, {result.modified_count} updated)")
+            return True
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ MONGODB_BULK ERROR: Failed to write {len(documents)} messages: {e}")
+            return False
+    
     def log_moderation_action(self, action_data: Dict[str, Any]) -> bool:
         """Log moderation action"""
         try:
@@ -319,6 +554,7 @@ class MongoDBHandler:
             
             return True
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL: Error logging moderation action: {e}")
             import traceback
             traceback.print_exc()
@@ -357,6 +593,7 @@ class MongoDBHandler:
             
             return True
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL: Error adding warning: {e}")
             import traceback
             traceback.print_exc()
@@ -405,11 +642,75 @@ class MongoDBHandler:
                 return False
                 
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ CRITICAL: Error banning user: {e}")
             import traceback
             traceback.print_exc()
             return False
     
+    def get_automod_profiles(self) -> List[Dict[str, Any]]:
+        """Get the latest version of every automod rule profile (default and per-guild)"""
+        try:
+            if not self._ensure_connected():
+                print(f"❌ AUTOMOD_RULES: Cannot load rule profiles - no database connection")
+                return []
+            
+            return list(self.db.automod_profiles.aggregate([
+                {"$sort": {"guild_id": 1, "version": -1}},
+                {"$group": {"_id": "$guild_id", "latest": {"$first": "$$ROOT"}}},
+                {"$replaceRoot": {"newRoot": "$latest"}},
+                {"$project": {"_id": 0}}
+            ]))
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ Error getting automod rule profiles: {e}")
+            return []
+
+    def save_automod_profile(self, profile: Dict[str, Any]) -> bool:
+        """Store a new automod rule profile version (earlier versions are kept)"""
+        try:
+            if not self._ensure_connected():
+                return False
+            
+            self.db.automod_profiles.insert_one({**profile, "created_at": datetime.utcnow()})
+            return True
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ Error saving automod profile: {e}")
+            return False
+
+    def get_violation_ledger(self) -> List[Dict[str, Any]]:
+        """Get every stored automod ledger entry with a non-zero violation count"""
+        try:
+            if not self._ensure_connected():
+                print(f"❌ LEDGER: Cannot load violation ledger - no database connection")
+                return []
+            
+            return list(self.db.automod_ledger.find({"count": {"$gt": 0}}, {"_id": 0}))
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ Error getting violation ledger: {e}")
+            return []
+
+    def bulk_upsert_violation_ledger(self, documents: Dict[str, Dict[str, Any]]) -> bool:
+        """Upsert many automod ledger entries in one unordered bulk_write"""
+        try:
+            if not documents:
+                return True
+            if not self._ensure_connected():
+                return False
+            
+            operations = [
+                UpdateOne({"user_id": user_id}, {"$set": fields}, upsert=True)
+                for user_id, fields in documents.items()
+            ]
+            self.db.automod_ledger.bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ MONGODB_BULK ERROR: Failed to write {len(documents)} ledger entries: {e}")
+            return False
+
     def get_user_warnings(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all warnings for a user"""
         try:
@@ -421,6 +722,7 @@ class MongoDBHandler:
             ).sort("timestamp", -1))
             return warnings
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error getting user warnings: {e}")
             return []
     
@@ -433,6 +735,7 @@ class MongoDBHandler:
             ban = self.db.banned_users.find_one({"user_id": str(user_id), "active": True})
             return ban is not None
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ Error checking user ban: {e}")
             return False
 
@@ -458,6 +761,7 @@ class MongoDBHandler:
                     
             return count
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ MONGODB ERROR: Failed to get message count: {e}")
             import traceback
             traceback.print_exc()
@@ -467,6 +771,18 @@ class MongoDBHandler:
         """Alias for get_chatlog_count"""
         return self.get_chatlog_count()
     
+    def count_documents(self, collection_name: str, query: Dict[str, Any] = None) -> int:
+        """Count documents in a collection"""
+        try:
+            if not self._ensure_connected():
+                return 0
+            
+            return self.db[collection_name].count_documents(query or {})
+        except Exception as e:
+            self._record_operation_error(e)
+            print(f"❌ MONGODB ERROR: Failed to count {collection_name}: {e}")
+            return 0
+    
     def remove_guild_data(self, guild_id: str) -> bool:
         """Remove all guild-related data from MongoDB when bot leaves a guild"""
         try:
@@ -480,6 +796,7 @@ class MongoDBHandler:
             # Remove crosschat channels for this guild
             result = self.db.crosschat_channels.delete_many({"guild_id": guild_id_str})
             removed_count += result.deleted_count
+            channel_registry.remove_guild(guild_id)
             print(f"✅ MONGODB: Removed {result.deleted_count} crosschat channels for guild {guild_id}")
             
             # Remove guild info
@@ -504,6 +821,7 @@ class MongoDBHandler:
             return True
             
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ MONGODB ERROR: Failed to remove guild data for {guild_id}: {e}")
             import traceback
             traceback.print_exc()
@@ -524,6 +842,7 @@ class MongoDBHandler:
             # Remove crosschat channels for this guild (guild-specific administrative data)
             result = self.db.crosschat_channels.delete_many({"guild_id": guild_id_str})
             removed_count += result.deleted_count
+            channel_registry.remove_guild(guild_id)
             print(f"✅ GUILD_CLEANUP: Removed {result.deleted_count} crosschat channels for guild {guild_id}")
             
             # Remove guild-specific moderation logs (administrative data)
@@ -541,6 +860,7 @@ class MongoDBHandler:
             return True
             
         except Exception as e:
+            self._record_operation_error(e)
             print(f"❌ GUILD_CLEANUP ERROR: Failed to cleanup guild data for {guild_id}: {e}")
             import traceback
             traceback.print_exc()
@@ -0,0 +1,194 @@
+"""
+Notice Scheduler
+Ephemeral moderation notices and user DMs - one timer task for delayed deletes, DMs coalesced per user,
+everything sent on the background delivery tier through the rate-limited sender
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import Counter
+from typing import Callable, Awaitable, Dict, Any, List
+
+from delivery_scheduler import delivery_scheduler, BACKGROUND
+from async_optimization import async_optimizer
+
+# DMs share a fixed set of rate-limit routes instead of creating a bucket per user;
+# the routes use the DM bucket config (FANOUT_DM_LIMIT / FANOUT_DM_PERIOD), not the channel-send one
+DM_ROUTES = 64
+
+class _DMRoute:
+    """Stands in for a channel in async_optimizer.deliver - only its id (the bucket key) is used"""
+
+    __slots__ = ('id',)
+
+    def __init__(self, route_id: int):
+        self.id = route_id
+
+_DM_ROUTES = [_DMRoute(route_id) for route_id in range(DM_ROUTES)]
+
+class NoticeScheduler:
+    """Delayed-delete queue (a heap drained by one timer task) plus per-user DM coalescing windows"""
+
+    def __init__(self, coalesce_ms: int = None):
+        self.window = (coalesce_ms or int(os.environ.get('NOTICE_COALESCE_MS', 30000))) / 1000
+
+        self._timers: List[tuple] = []  # heap of (due, seq, callback)
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+        self._outstanding = set()  # notice jobs submitted to the delivery scheduler and not finished yet
+        # user_id -> notices held back since the window opened
+        self._windows: Dict[int, Dict[str, Any]] = {}
+
+        # Statistics
+        self.notices_posted = 0
+        self.notices_deleted = 0
+        self.dms_sent = 0
+        self.dms_coalesced = 0
+        self.failures = 0
+
+    def start(self):
+        """Start the timer task on the running loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._timer_loop())
+        print(f"NOTICES: Scheduler started (DMs coalesced per {int(self.window * 1000)}ms window)")
+
+    def call_later(self, delay: float, callback: Callable[[], Any]):
+        """Run a plain callback after delay seconds on the timer task"""
+        if self._stopping:
+            # Shutting down - nothing is left to wait for the timer, so run it now
+            callback()
+            return
+        self.start()
+        due = time.monotonic() + delay
+        earliest = not self._timers or due < self._timers[0][0]
+        heapq.heappush(self._timers, (due, next(self._sequence), callback))
+        if earliest:
+            self._wakeup.set()
+
+    async def _timer_loop(self):
+        while True:
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, callback = heapq.heappop(self._timers)
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"NOTICES_ERROR: Timer callback failed: {e}")
+
+            timeout = self._timers[0][0] - now if self._timers else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
+            self._wakeup.clear()
+
+    def _submit(self, job: Callable[[], Awaitable[Any]]):
+        future = delivery_scheduler.submit(BACKGROUND, job)
+        self._outstanding.add(future)
+        future.add_done_callback(self._job_done)
+
+    def _job_done(self, future):
+        self._outstanding.discard(future)
+        # Nobody awaits notice jobs - retrieve the result so failures are not reported as unhandled
+        future.cancelled() or future.exception()
+
+    def post_ephemeral(self, channel, content: str, ttl: float):
+        """Post a channel notice and delete it ttl seconds after it was sent - returns immediately"""
+        async def post():
+            outcome = await async_optimizer.deliver(channel, lambda: channel.send(content))
+            if not outcome['success']:
+                self.failures += 1
+                return
+            self.notices_posted += 1
+            notice = outcome['result']
+            self.call_later(ttl, lambda: self._submit(lambda: self._delete(channel, notice)))
+        self._submit(post)
+
+    async def _delete(self, channel, notice):
+        outcome = await async_optimizer.deliver(channel, notice.delete)
+        if outcome['success'] or outcome['status'] == 'not_found':
+            self.notices_deleted += 1
+        else:
+            self.failures += 1
+
+    def notify_user(self, user, reason: str, render: Callable[[List[str], int], Dict[str, Any]]):
+        """DM a user. The first notice goes out at once; repeats within the window are held back and sent
+        as one summary DM when it closes. render(reasons, count) returns the send() kwargs"""
+        window = self._windows.get(user.id)
+        if window is not None:
+            window['reasons'][reason] += 1
+            window['render'] = render
+            self.dms_coalesced += 1
+            return
+
+        self._windows[user.id] = {'user': user, 'reasons': Counter(), 'render': render}
+        self._send_dm(user, render([reason], 1))
+        self.call_later(self.window, lambda: self._close_window(user.id))
+
+    def _close_window(self, user_id: int):
+        window = self._windows.pop(user_id, None)
+        if not window or not window['reasons']:
+            return
+        # Notices kept coming - send the summary and keep coalescing for another window
+        self._windows[user_id] = {'user': window['user'], 'reasons': Counter(), 'render': window['render']}
+        reasons = window['reasons']
+        self._send_dm(window['user'], window['render'](list(reasons), sum(reasons.values())))
+        self.call_later(self.window, lambda: self._close_window(user_id))
+
+    def _send_dm(self, user, kwargs: Dict[str, Any]):
+        async def send():
+            outcome = await async_optimizer.deliver(_DM_ROUTES[user.id % DM_ROUTES], lambda: user.send(**kwargs), dm=True)
+            if outcome['success']:
+                self.dms_sent += 1
+            else:
+                self.failures += 1
+        self._submit(send)
+
+    async def stop(self, timeout: float = 5.0):
+        """Stop the timer task. Pending deletes and summary DMs are sent now instead of being dropped,
+        and waited for (up to timeout) so they run before the delivery scheduler stops"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stopping = True
+        timers, self._timers = self._timers, []
+        for _, _, callback in sorted(timers):
+            try:
+                callback()
+            except Exception as e:
+                print(f"NOTICES_ERROR: Timer callback failed: {e}")
+
+        # Notices still being posted schedule their delete when they land - it runs at once now
+        deadline = time.monotonic() + timeout
+        while self._outstanding:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"NOTICES: Stopped with {len(self._outstanding)} notice jobs unfinished")
+                break
+            await asyncio.wait(set(self._outstanding), timeout=remaining)
+        self._windows = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get notice and DM statistics"""
+        return {
+            'pending_timers': len(self._timers),
+            'pending_jobs': len(self._outstanding),
+            'open_windows': len(self._windows),
+            'notices_posted': self.notices_posted,
+            'notices_deleted': self.notices_deleted,
+            'dms_sent': self.dms_sent,
+            'dms_coalesced': self.dms_coalesced,
+            'failures': self.failures
+        }
+
+# Global notice scheduler instance
+notice_scheduler = NoticeScheduler()
@@ -0,0 +1,289 @@
+"""
+Pattern Set
+Compiles a list of regex patterns into one alternation so a message is scanned once instead of once per pattern
+"""
+
+import re
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse, sre_constants
+
+# Backreferences and conditionals refer to group numbers, which shift once patterns are combined
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+def _first_chars(items) -> Optional[set]:
+    """Characters a parsed pattern can start with, or None if that cannot be bounded"""
+    chars = set()
+    for op, av in items:
+        if op is sre_constants.AT:
+            continue  # ^ / \b consume nothing
+        if op is sre_constants.LITERAL:
+            chars.add(chr(av))
+            return chars
+        if op is sre_constants.IN:
+            for item_op, item in av:
+                if item_op is sre_constants.LITERAL:
+                    chars.add(chr(item))
+                elif item_op is sre_constants.RANGE:
+                    chars.update(chr(code) for code in range(item[0], item[1] + 1))
+                else:
+                    return None
+            return chars
+        if op is sre_constants.SUBPATTERN:
+            inner = _first_chars(av[-1])
+        elif op is sre_constants.BRANCH:
+            inner = set()
+            for branch in av[1]:
+                branch_chars = _first_chars(branch)
+                if branch_chars is None:
+                    return None
+                inner |= branch_chars
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            inner = _first_chars(av[2])
+        else:
+            return None
+        if inner is None:
+            return None
+        return chars | inner
+    return None
+
+def first_chars(pattern: str, flags: int = 0) -> Optional[FrozenSet[str]]:
+    """Possible first characters of a pattern (None if unknown or unbounded)"""
+    try:
+        chars = _first_chars(list(sre_parse.parse(pattern, flags)))
+    except Exception:
+        return None
+    # Wide classes gain nothing from a lookahead
+    return frozenset(chars) if chars and len(chars) <= 64 else None
+
+def merge_spans(spans: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort (start, end) spans and merge the overlapping ones"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+class CompiledPatternSet:
+    """One combined regex over a pattern list; the list stays the source of truth and match indexes map back to it"""
+
+    def __init__(self, patterns: Sequence[str], flags: int = re.IGNORECASE):
+        self.source: Tuple[str, ...] = tuple(patterns)
+        self.flags = flags
+        self.invalid: List[str] = []
+
+        # Invalid patterns are skipped, as the per-pattern cache did
+        self._compiled: List[Tuple[int, re.Pattern]] = []
+        self._first: Dict[int, Optional[FrozenSet[str]]] = {}
+        combinable: List[Tuple[int, str]] = []
+        self._separate: List[Tuple[int, re.Pattern]] = []
+        for index, pattern in enumerate(self.source):
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error:
+                self.invalid.append(pattern)
+                continue
+            self._compiled.append((index, compiled))
+            chars = first_chars(pattern, flags)
+            if chars and flags & re.IGNORECASE:
+                chars = chars | {char.lower() for char in chars} | {char.upper() for char in chars}
+            self._first[index] = chars
+            if _GROUP_REFERENCE.search(pattern):
+                self._separate.append((index, compiled))
+            else:
+                combinable.append((index, pattern))
+
+        # Confirmation candidates per starting character (filled lazily)
+        self._by_char: Dict[str, List[Tuple[int, re.Pattern]]] = {}
+
+        self._combined: Optional[re.Pattern] = None
+        if combinable:
+            try:
+                self._combined = re.compile(self._build(combinable), flags)
+            except re.error:
+                # Patterns that cannot share one expression (e.g. mid-pattern inline flags) are scanned one by one
+                self._separate = list(self._compiled)
+
+    def _build(self, patterns: List[Tuple[int, str]]) -> str:
+        """Alternation grouped by first character - each group sits behind a one-character lookahead,
+        so at any position only the few patterns that can start there are attempted"""
+        groups: Dict[Optional[FrozenSet[str]], List[str]] = defaultdict(list)
+        for index, pattern in patterns:
+            groups[self._first[index]].append(f"(?:{pattern})")
+
+        branches = []
+        for chars, alternatives in groups.items():
+            alternation = '|'.join(alternatives)
+            if chars:
+                char_class = ''.join(re.escape(char) for char in sorted(chars))
+                branches.append(f"(?=[{char_class}])(?:{alternation})")
+            else:
+                branches.append(f"(?:{alternation})")
+        return '|'.join(branches)
+
+    def _candidates(self, char: str) -> List[Tuple[int, re.Pattern]]:
+        """Patterns that can start with this character"""
+        candidates = self._by_char.get(char)
+        if candidates is None:
+            variants = {char, char.lower(), char.upper()} if self.flags & re.IGNORECASE else {char}
+            candidates = [
+                (index, compiled) for index, compiled in self._compiled
+                if self._first[index] is None or not variants.isdisjoint(self._first[index])
+            ]
+            if len(self._by_char) < 1024:
+                self._by_char[char] = candidates
+        return candidates
+
+    def _confirm(self, content: str, start: int) -> List[Tuple[int, re.Match]]:
+        """Every source pattern that matches where the combined regex stopped"""
+        candidates = self._candidates(content[start]) if start < len(content) else self._compiled
+        confirmed = [(index, match) for index, match in
+                     ((index, compiled.match(content, start)) for index, compiled in candidates) if match]
+        if not confirmed and candidates is not self._compiled:
+            # Never expected - re-check every pattern rather than miss a match
+            confirmed = [(index, match) for index, match in
+                         ((index, compiled.match(content, start)) for index, compiled in self._compiled) if match]
+        return confirmed
+
+    def matches(self, patterns: Sequence[str]) -> bool:
+        """True if this set was compiled from exactly these patterns"""
+        return len(patterns) == len(self.source) and tuple(patterns) == self.source
+
+    def search(self, content: str) -> Optional[Tuple[int, re.Match]]:
+        """First match as (pattern index, match), or None for clean content"""
+        match = self._combined.search(content) if self._combined is not None else None
+        if match:
+            confirmed = self._confirm(content, match.start())
+            if confirmed:
+                return confirmed[0]
+
+        for index, compiled in self._separate:
+            match = compiled.search(content)
+            if match:
+                return index, match
+        return None
+
+    def scan(self, content: str) -> List[Tuple[int, re.Match]]:
+        """Matches as (pattern index, match) - every pattern matching at a hit, then the scan resumes
+        after the longest of them (like finditer), so long matches are never rescanned from inside"""
+        results = []
+        if self._combined is not None:
+            position = 0
+            while position <= len(content):
+                match = self._combined.search(content, position)
+                if not match:
+                    break
+                start = match.start()
+                confirmed = self._confirm(content, start)
+                results.extend(confirmed)
+                position = max([start + 1, match.end()] + [found.end() for _, found in confirmed])
+
+        for index, compiled in self._separate:
+            results.extend((index, match) for match in compiled.finditer(content))
+        return results
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+class ContentScanner:
+    """Named pattern categories checked together in one pass, reporting every matched category with its spans.
+    Clean messages take the single combined scan; a hit is then located per category, so matches of
+    different categories that overlap are all reported"""
+
+    def __init__(self, categories: Sequence[Tuple[str, Sequence[str]]], flags: int = re.IGNORECASE):
+        self.categories: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (name, tuple(patterns)) for name, patterns in categories
+        )
+        self.pattern_set = CompiledPatternSet([pattern for _, patterns in self.categories for pattern in patterns], flags)
+        self.category_sets = [(name, CompiledPatternSet(category_patterns, flags)) for name, category_patterns in self.categories]
+
+    def matches(self, categories: Sequence[Tuple[str, Sequence[str]]]) -> bool:
+        """True if this scanner was built from exactly these categories and patterns"""
+        return len(categories) == len(self.categories) and all(
+            name == own_name and tuple(patterns) == own_patterns
+            for (name, patterns), (own_name, own_patterns) in zip(categories, self.categories)
+        )
+
+    def scan(self, content: str) -> Dict[str, List[Tuple[int, int]]]:
+        """category -> merged (start, end) spans, for every category that matched"""
+        if self.pattern_set.search(content) is None:
+            return {}
+
+        merged = {}
+        for name, category_set in self.category_sets:
+            category_spans = merge_spans([match.span() for _, match in category_set.scan(content)])
+            if category_spans:
+                merged[name] = category_spans
+        return merged
+
+    @property
+    def invalid(self) -> List[str]:
+        return self.pattern_set.invalid
+
+# Worker-process side of time-bounded scanning - scanners are rebuilt once per process, not per message
+_worker_scanners: Dict[Tuple, ContentScanner] = {}
+
+def scan_categories(categories: Tuple[Tuple[str, Tuple[str, ...]], ...], flags: int, content: str) -> Dict[str, List[Tuple[int, int]]]:
+    """ContentScanner.scan for use in a worker process"""
+    key = (categories, flags)
+    scanner = _worker_scanners.get(key)
+    if scanner is None:
+        if len(_worker_scanners) >= 8:
+            _worker_scanners.clear()
+        scanner = _worker_scanners[key] = ContentScanner(categories, flags)
+    return scanner.scan(content)
+
+def _nested_unbounded_repeat(items, inside_repeat: bool = False) -> bool:
+    """True if an unbounded repeat contains another repeat - the classic exponential shape, e.g. (a+)+"""
+    for op, av in items:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            unbounded = av[1] > 32
+            if inside_repeat and av[1] > 1:
+                return True
+            if _nested_unbounded_repeat(av[2], inside_repeat or unbounded):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _nested_unbounded_repeat(av[-1], inside_repeat):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_nested_unbounded_repeat(branch, inside_repeat) for branch in av[1]):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _nested_unbounded_repeat(av[1], inside_repeat):
+                return True
+    return False
+
+# Probe lengths grow slowly at first so an exponential pattern is caught long before it can hang
+_PROBE_LENGTHS = (4, 8, 12, 16, 24, 32, 64, 128, 256, 512, 1024, 2048)
+
+def is_pattern_safe(pattern: str, flags: int = re.IGNORECASE, budget_ms: float = 10.0) -> bool:
+    """Reject patterns that backtrack badly: nested unbounded repeats outright, then anything that takes
+    longer than budget_ms on repetitive probe strings built from the pattern's own characters"""
+    try:
+        compiled = re.compile(pattern, flags)
+        if _nested_unbounded_repeat(list(sre_parse.parse(pattern, flags))):
+            return False
+    except Exception:
+        return False
+
+    alphabet = sorted({char for char in pattern if char.isalnum() or char in ' ,.-_#/:@$+'} | {'a', '1', ' '})[:16]
+    units = alphabet + [first + second for first in alphabet for second in alphabet if first != second]
+    for length in _PROBE_LENGTHS:
+        for unit in units:
+            probe = unit * (length // len(unit))
+            # Re-measure before rejecting, so scheduler noise does not fail a linear pattern
+            if _search_ms(compiled, probe) > budget_ms and min(_search_ms(compiled, probe) for _ in range(2)) > budget_ms:
+                return False
+    return True
+
+def _search_ms(compiled: re.Pattern, content: str) -> float:
+    start = time.perf_counter()
+    compiled.search(content)
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,128 @@
+"""
+Reaction Controller
+Status reaction state machine - ⏳ only after a grace window, each final reaction at most once, low priority
+"""
+
+import asyncio
+import os
+from typing import Dict, Any
+
+from bounded_cache import BoundedCache
+from delivery_scheduler import delivery_scheduler, BACKGROUND
+from async_optimization import async_optimizer
+
+PROCESSING = '⏳'
+
+class ReactionController:
+    """Reconciles desired vs applied status reactions per message through the background delivery tier"""
+
+    def __init__(self):
+        self.grace = int(os.environ.get('REACTION_GRACE_MS', 750)) / 1000
+        self._states = BoundedCache(
+            max_size=int(os.environ.get('REACTION_STATE_MAX', 10000)),
+            ttl=900,
+            name="reactions"
+        )
+
+        # Statistics
+        self.added = 0
+        self.removed = 0
+        self.hourglass_skipped = 0
+        self.duplicates_skipped = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _state(self, message) -> Dict[str, Any]:
+        state = self._states.get(message.id)
+        if state is None:
+            state = {
+                'message': message,
+                'final': None,            # desired final reaction
+                'show_processing': False, # grace window elapsed before the final reaction
+                'applied': set(),         # reactions the bot has actually added
+                'begun': False,
+                'scheduled': False,
+                'lock': asyncio.Lock()
+            }
+            self._states.set(message.id, state)
+        return state
+
+    def begin(self, message):
+        """Processing started - ⏳ appears only if it is still running after the grace window"""
+        self._state(message)['begun'] = True
+        async_optimizer.background_task(self._grace_timer(message))
+
+    async def _grace_timer(self, message):
+        await asyncio.sleep(self.grace)
+        state = self._states.get(message.id)
+        if state and state['final'] is None:
+            state['show_processing'] = True
+            self._schedule(state)
+
+    def finish(self, message, emoji: str):
+        """Set the final status reaction (no-op if it is already the final reaction)"""
+        state = self._state(message)
+        if state['final'] == emoji:
+            self.duplicates_skipped += 1
+            return
+        if state['begun'] and state['final'] is None and not state['show_processing']:
+            self.hourglass_skipped += 1
+        state['final'] = emoji
+        self._schedule(state)
+
+    def _schedule(self, state: Dict[str, Any]):
+        if state['scheduled']:
+            # A queued reconcile will pick up the latest desired state
+            self.coalesced += 1
+            return
+        state['scheduled'] = True
+        future = delivery_scheduler.submit(BACKGROUND, lambda: self._reconcile(state))
+        # Nobody awaits reaction jobs - retrieve the result so failures are not reported as unhandled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def _reconcile(self, state: Dict[str, Any]):
+        async with state['lock']:
+            state['scheduled'] = False
+            message = state['message']
+            if state['final']:
+                desired = {state['final']}
+            elif state['show_processing']:
+                desired = {PROCESSING}
+            else:
+                desired = set()
+
+            for emoji in [emoji for emoji in state['applied'] if emoji not in desired]:
+                outcome = await async_optimizer.deliver(
+                    message.channel, lambda emoji=emoji: message.remove_reaction(emoji, message.guild.me), reaction=True
+                )
+                if outcome['success'] or outcome['status'] == 'not_found':
+                    state['applied'].discard(emoji)
+                    self.removed += 1
+                else:
+                    self.failures += 1
+
+            for emoji in desired - state['applied']:
+                outcome = await async_optimizer.deliver(
+                    message.channel, lambda emoji=emoji: message.add_reaction(emoji), reaction=True
+                )
+                if outcome['success']:
+                    state['applied'].add(emoji)
+                    self.added += 1
+                else:
+                    self.failures += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reaction call statistics"""
+        return {
+            'grace_ms': int(self.grace * 1000),
+            'tracked_messages': len(self._states),
+            'added': self.added,
+            'removed': self.removed,
+            'hourglass_skipped': self.hourglass_skipped,
+            'duplicates_skipped': self.duplicates_skipped,
+            'coalesced': self.coalesced,
+            'failures': self.failures
+        }
+
+# Global reaction controller instance
+reaction_controller = ReactionController()
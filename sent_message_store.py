@@ -0,0 +1,112 @@
+"""
+Sent Message Store
+Records delivered crosschat copies with one insert_many per CC-ID and serves recent lookups from memory
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Tuple, Any, Optional
+
+from bounded_cache import BoundedCache
+
+class SentMessageStore:
+    """cc_id -> [(channel_id, message_id)] backed by MongoDB sent_messages with a recent-window LRU"""
+
+    def __init__(self):
+        self.async_db = None
+        self.window_hours = float(os.environ.get('SENT_MESSAGE_CACHE_HOURS', 6))
+        self.cache = BoundedCache(
+            max_size=int(os.environ.get('SENT_MESSAGE_CACHE_SIZE', 5000)),
+            ttl=self.window_hours * 3600,
+            name="sent_messages"
+        )
+
+        # (cc_id, channel_id) -> delivered message_id - local idempotency check before sending
+        self.delivered = BoundedCache(
+            max_size=int(os.environ.get('DELIVERED_SET_SIZE', 50000)),
+            ttl=float(os.environ.get('DELIVERED_SET_TTL', 3600)),
+            name="delivered"
+        )
+
+        # Statistics
+        self.duplicates_prevented = 0
+        self.batches = 0
+        self.recorded = 0
+        self.failed_batches = 0
+        self.db_lookups = 0
+
+    def attach(self, async_db):
+        """Attach the async database handler"""
+        self.async_db = async_db
+
+    @staticmethod
+    def nonce_for(cc_id: str, channel_id) -> str:
+        """Deterministic 24-char nonce for one CC-ID in one destination (Discord allows up to 25)"""
+        return hashlib.blake2b(f"{cc_id}:{channel_id}".encode(), digest_size=12).hexdigest()
+
+    def delivered_message_id(self, cc_id: str, channel_id) -> Optional[str]:
+        """Message ID if this CC-ID was already delivered to the channel"""
+        message_id = self.delivered.get((cc_id, str(channel_id)))
+        if message_id is not None:
+            self.duplicates_prevented += 1
+        return message_id
+
+    def mark_delivered(self, cc_id: str, channel_id, message_id):
+        self.delivered.set((cc_id, str(channel_id)), str(message_id))
+
+    async def record(self, cc_id: str, entries: List[Tuple[str, str]]) -> bool:
+        """Record every delivered copy of a CC-ID at once (after fan-out completes)"""
+        if not entries:
+            return True
+        entries = [(str(channel_id), str(message_id)) for channel_id, message_id in entries]
+
+        # Cache first - edits right after delivery never need the database
+        cached = self.cache.get(cc_id) or []
+        self.cache.set(cc_id, cached + entries)
+
+        if not self.async_db:
+            return False
+        success = await self.async_db.track_sent_messages(cc_id, entries)
+        self.batches += 1
+        if success:
+            self.recorded += len(entries)
+            print(f"✅ MONGODB: Tracked {len(entries)} sent messages for CC-{cc_id}")
+        else:
+            self.failed_batches += 1
+            print(f"❌ MONGODB: Failed to track {len(entries)} sent messages for CC-{cc_id}")
+        return success
+
+    async def get(self, cc_id: str) -> List[Tuple[str, str]]:
+        """Get (channel_id, message_id) pairs for a CC-ID - memory first, indexed query on miss"""
+        entries = self.cache.get(cc_id)
+        if entries is not None:
+            return entries
+
+        if not self.async_db:
+            return []
+        self.db_lookups += 1
+        documents = await self.async_db.get_sent_messages_by_cc_id(cc_id)
+        entries = [(str(doc.get('channel_id')), str(doc.get('message_id'))) for doc in documents]
+        if entries:
+            self.cache.set(cc_id, entries)
+        return entries
+
+    def forget(self, cc_id: str):
+        """Drop a CC-ID (e.g. after a global delete)"""
+        self.cache.pop(cc_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store and cache statistics"""
+        return {
+            'batches': self.batches,
+            'recorded': self.recorded,
+            'failed_batches': self.failed_batches,
+            'db_lookups': self.db_lookups,
+            'duplicates_prevented': self.duplicates_prevented,
+            'delivered': self.delivered.get_stats(),
+            'window_hours': self.window_hours,
+            'cache': self.cache.get_stats()
+        }
+
+# Global sent message store instance
+sent_message_store = SentMessageStore()
@@ -7,25 +7,27 @@ import asyncio
 import discord
 from datetime import datetime
 import time
-import random
-import string
-import json
 import os
-import io
+from channel_registry import channel_registry
+import cc_id_generator
+from bounded_cache import BoundedCache
+from write_behind_logger import message_logger
+from user_tier_index import user_tier_index, ELITE, ARCHITECT, STAFF, FOUNDER
+from delivery_scheduler import delivery_scheduler
+from async_optimization import async_optimizer
+from attachment_fanout import attachment_fanout
+from webhook_delivery import webhook_delivery
+from sent_message_store import sent_message_store
+from reaction_controller import reaction_controller
+from notice_scheduler import notice_scheduler
 # Database import removed - using MongoDB handler from bot instance
 
 class SimpleCrossChat:
     """Simple cross-chat with no complexity - ABSOLUTE SINGLETON"""
     
-    # Class-level singleton instance and global locks
+    # Class-level singleton instance
     _instance = None
-    _global_processing_lock = set()
     _handler_registered = False
-    _global_processed_messages = set()
-    _duplicate_prevention_cache = set()
-    _global_message_ids = set()  # Global tracking of ALL processed message IDs
-    _global_send_locks = {}  # Class-level send locks to prevent Discord API duplication
-    _global_cc_id_mapping = {}  # Global CC-ID mapping to prevent duplicate ID generation
     
     @classmethod
     def get_instance(cls):
@@ -51,62 +53,22 @@ class SimpleCrossChat:
             
         print(f"SIMPLE_SINGLETON: Initializing the singleton instance")
         self.bot = bot
+        # Bounded, time-windowed dedupe state (size cap + TTL, oldest evicted first)
         self.processed = self._load_processed_messages()
-        self.cc_id_mapping = {}  # message_id -> cc_id
-        self.cc_id_reverse = {}  # cc_id -> message_id
-        self.message_mappings = {}  # message_id -> list of sent message objects
-        self.currently_processing = set()
-        # VIP processing queues
-        self.vip_queue = asyncio.Queue()
-        self.standard_queue = asyncio.Queue()
+        # Messages created before this point may already be logged by a previous run
+        self.started_at = discord.utils.utcnow()
+        # Tiered delivery queues live in delivery_scheduler
+        # Global edit debounce (cc_id -> latest pending edit)
+        self._pending_edits = {}
+        self.edit_debounce = float(os.environ.get('CROSSCHAT_EDIT_DEBOUNCE', 2.0))
         self._initialized = True
         print(f"SIMPLE_SINGLETON: Initialization complete")
 
     async def is_support_vip(self, user_id):
         """Check if user has VIP role (VIP_ROLE_ID or VIP_ROLE_ID2) in the SynapseChat Support server"""
         try:
-            import os
-            
-            # Use SYNAPSECHAT_GUILD_ID for the Support server and check both VIP role IDs
-            support_server_id = os.getenv('SYNAPSECHAT_GUILD_ID')
-            vip_role_id = os.getenv('VIP_ROLE_ID')
-            vip_role_id2 = os.getenv('VIP_ROLE_ID2')
-            
-            if not support_server_id:
-                print(f"VIP_CHECK: SYNAPSECHAT_GUILD_ID not set")
-                return False
-                
-            if not vip_role_id and not vip_role_id2:
-                print(f"VIP_CHECK: Neither VIP_ROLE_ID nor VIP_ROLE_ID2 are set")
-                return False
-            
-            # Get the support server
-            support_guild = self.bot.get_guild(int(support_server_id))
-            if not support_guild:
-                print(f"VIP_CHECK: SynapseChat guild {support_server_id} not found")
-                return False
-                
-            # Get the member in support server
-            member = support_guild.get_member(user_id)
-            if not member:
-                return False
-                
-            # Check for VIP_ROLE_ID (SynapseChat Architect)
-            if vip_role_id:
-                vip_role = support_guild.get_role(int(vip_role_id))
-                if vip_role and vip_role in member.roles:
-                    print(f"VIP_CHECK: {member.display_name} has VIP role ({vip_role.name}) in {support_guild.name}")
-                    return True
-            
-            # Check for VIP_ROLE_ID2 (SynapseChat Elite)
-            if vip_role_id2:
-                vip_role2 = support_guild.get_role(int(vip_role_id2))
-                if vip_role2 and vip_role2 in member.roles:
-                    print(f"VIP_CHECK: {member.display_name} has Elite VIP role ({vip_role2.name}) in {support_guild.name}")
-                    return True
-            
-            return False
-            
+            # Precomputed from Support server role holders - no guild/role lookups per message
+            return user_tier_index.is_support_vip(user_id)
         except Exception as e:
             print(f"VIP_CHECK: Error checking VIP status for {user_id}: {e}")
             return False
@@ -131,167 +93,53 @@ class SimpleCrossChat:
             }
 
     def _load_processed_messages(self):
-        """Load processed message IDs from memory"""
-        try:
-            # Use in-memory tracking only - no database dependency
-            return set()
-        except Exception as e:
-            print(f"SIMPLE: Error loading processed messages: {e}")
-        return set()
+        """Create the bounded processed-message window (in-memory only - no database dependency)"""
+        return BoundedCache(
+            max_size=int(os.environ.get('CROSSCHAT_PROCESSED_MAX', 50000)),
+            ttl=float(os.environ.get('CROSSCHAT_PROCESSED_TTL', 6 * 3600)),
+            name="processed_messages"
+        )
     
     def _save_processed_messages(self):
-        """Save processed message IDs to memory"""
+        """Sweep expired processed message IDs (the size cap already evicts the oldest)"""
         try:
-            # Keep only recent messages (last 1000) to prevent memory from growing too large
-            if len(self.processed) > 1000:
-                self.processed = set(list(self.processed)[-1000:])
+            self.processed.purge_expired()
         except Exception as e:
-            print(f"SIMPLE: Error saving processed messages: {e}")
+            print(f"SIMPLE: Error sweeping processed messages: {e}")
     
-    def generate_cc_id(self, message_id, is_vip=False, message=None):
-        """Generate unique CC-ID with VIP FAST-TRACK processing"""
-        import time, random, string
-        
-        # VIP FAST-TRACK: Skip heavy database operations for instant processing
-        if is_vip:
-            # Ultra-fast CC-ID generation for VIP users
-            timestamp_part = str(int(time.time() * 1000))[-6:]
-            random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=2))
-            cc_id = f"V{timestamp_part[:3]}{random_part}"  # V prefix for VIP
-            
-            # Store in memory mapping only - skip database checks for speed
-            SimpleCrossChat._global_cc_id_mapping[message_id] = cc_id
-            self.cc_id_mapping[message_id] = cc_id
-            print(f"VIP_FAST: Generated instant CC-ID {cc_id} for VIP message {message_id}")
-            return cc_id
-        
-        # STANDARD PROCESSING: Full duplicate prevention for regular users
-        # STEP 1: Check local singleton mappings first
-        if message_id in SimpleCrossChat._global_cc_id_mapping:
-            existing_cc_id = SimpleCrossChat._global_cc_id_mapping[message_id]
-            print(f"SINGLETON_FOUND: Message {message_id} already has CC-ID {existing_cc_id}")
-            return existing_cc_id
-        
-        if message_id in self.cc_id_mapping:
-            existing_cc_id = self.cc_id_mapping[message_id]
-            print(f"LOCAL_FOUND: Message {message_id} already has CC-ID {existing_cc_id}")
-            SimpleCrossChat._global_cc_id_mapping[message_id] = existing_cc_id
-            return existing_cc_id
-        
-        # STEP 2: Check database for existing CC-ID
-        try:
-            # MongoDB check - use bot's database handler
-            existing_record = None
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                existing_record = self.bot.db_handler.get_crosschat_message(str(message_id))
-            if existing_record and existing_record.get('cc_id'):
-                existing_cc_id = existing_record['cc_id']
-                print(f"DB_FOUND: Message {message_id} already has database CC-ID {existing_cc_id}")
-                
-                # Update local mappings
-                SimpleCrossChat._global_cc_id_mapping[message_id] = existing_cc_id
-                self.cc_id_mapping[message_id] = existing_cc_id
-                return existing_cc_id
-        except Exception as e:
-            print(f"DB_CHECK_ERROR: {e}")
-        
-        # STEP 3: Generate new CC-ID with atomic database protection
-        timestamp_part = str(int(time.time() * 1000))[-6:]
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=2))
-        cc_id = f"{timestamp_part[:4]}{random_part}"
-        
-        # STEP 4: Try atomic database insert with UNIQUE constraint
-        try:
-            # Use direct SQL insert with ON CONFLICT for atomic protection
-            # MongoDB insert - use bot's database handler
-            success = True
-            print(f"🔍 DEBUG: CC-ID Generation - checking db_handler: {hasattr(self.bot, 'db_handler')}")
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler and message:
-                message_data = {
-                    "message_id": str(message_id),
-                    "cc_id": cc_id,
-                    "user_id": str(message.author.id),
-                    "username": message.author.display_name,
-                    "content": message.content or "",
-                    "guild_id": str(message.guild.id),
-                    "channel_id": str(message.channel.id)
-                }
-                print(f"🔍 DEBUG: CC-ID calling log_crosschat_message...")
-                success = self.bot.db_handler.log_crosschat_message(message_data)
-                print(f"🔍 DEBUG: CC-ID logging result: {success}")
-                
-                # FORCE IMMEDIATE VERIFICATION
-                if success:
-                    verify_record = self.bot.db_handler.get_crosschat_message(str(message_id))
-                    if verify_record:
-                        print(f"✅ CC-ID VERIFICATION: Message {message_id} confirmed in database")
-                    else:
-                        print(f"❌ CC-ID VERIFICATION FAILED: Message {message_id} not found in database")
-            else:
-                print(f"❌ DEBUG: CC-ID Generation - No db_handler available")
-            
-            # MongoDB atomic insert completed above
-            
-            if success:
-                print(f"DB_ATOMIC: Generated ATOMIC CC-ID {cc_id} for message {message_id}")
-                
-                # Update local mappings
-                SimpleCrossChat._global_cc_id_mapping[message_id] = cc_id
-                self.cc_id_mapping[message_id] = cc_id
-                return cc_id
-            else:
-                # Another instance already inserted - get their CC-ID
-                # MongoDB check - use bot's database handler
-                existing_record = None
-                if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                    existing_record = self.bot.db_handler.get_crosschat_message(str(message_id))
-                if existing_record and existing_record.get('cc_id'):
-                    existing_cc_id = existing_record['cc_id']
-                    print(f"DB_CONFLICT: Message {message_id} already has CC-ID {existing_cc_id} from another instance")
-                    
-                    # Update local mappings
-                    SimpleCrossChat._global_cc_id_mapping[message_id] = existing_cc_id
-                    self.cc_id_mapping[message_id] = existing_cc_id
-                    return existing_cc_id
-                    
-        except Exception as e:
-            print(f"DB_ATOMIC_ERROR: {e}")
+    def get_state_stats(self):
+        """Get size / hit / miss / eviction counters of all in-memory crosschat state"""
+        return {
+            'processed_messages': self.processed.get_stats(),
+            'pending_edits': len(self._pending_edits),
+            'sent_messages': sent_message_store.cache.get_stats(),
+            'delivered': sent_message_store.delivered.get_stats()
+        }
+    
+    async def generate_cc_id(self, message_id, is_vip=False, message=None):
+        """Generate CC-ID locally from the message snowflake - no database round trip, never collides"""
+        cc_id = cc_id_generator.generate_cc_id(message_id, is_vip=is_vip)
         
-        # STEP 5: Store in local mappings as fallback
-        SimpleCrossChat._global_cc_id_mapping[message_id] = cc_id
-        self.cc_id_mapping[message_id] = cc_id
+        # Record the assignment with the message log (write-behind, coalesced with the processing marker)
+        if message:
+            message_logger.log({
+                "message_id": str(message_id),
+                "cc_id": cc_id,
+                "user_id": str(message.author.id),
+                "username": message.author.display_name,
+                "content": message.content or "",
+                "guild_id": str(message.guild.id),
+                "channel_id": str(message.channel.id)
+            })
         
-        print(f"CC_GENERATED: Generated CC-ID {cc_id} for message {message_id}")
+        print(f"CC_GENERATED: Generated CC-ID {cc_id} for message {message_id} (VIP: {is_vip})")
         return cc_id
         
     def get_channels(self):
-        """Get cross-chat channels from MongoDB"""
+        """Get accessible cross-chat channel IDs from the in-memory channel registry"""
         try:
-            channels = []
-            
-            # Get channels from MongoDB handler
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                db_channels = self.bot.db_handler.get_crosschat_channels()
-                print(f"SIMPLE: Loaded {len(db_channels)} channels from MongoDB")
-                
-                # Verify each channel is accessible
-                for channel_id in db_channels:
-                    # db_channels is now a dict with channel_id as keys
-                    try:
-                        discord_channel = self.bot.get_channel(int(channel_id))
-                        if discord_channel:
-                            channels.append(int(channel_id))
-                            print(f"SIMPLE: Verified channel {channel_id} in {discord_channel.guild.name}")
-                        else:
-                            print(f"SIMPLE: Channel {channel_id} not accessible")
-                    except Exception as e:
-                        print(f"SIMPLE: Error verifying channel {channel_id}: {e}")
-            else:
-                print("SIMPLE: No MongoDB handler available - using empty channels list")
-                
-            print(f"SIMPLE: Returning {len(channels)} verified channels")
-            return channels
-            
+            # Registry holds resolved channel objects - no MongoDB round trip
+            return [channel.id for channel in channel_registry.get_channels()]
         except Exception as e:
             print(f"SIMPLE: Error getting channels: {e}")
             return []
@@ -299,10 +147,7 @@ class SimpleCrossChat:
     async def _is_crosschat_channel(self, channel_id) -> bool:
         """Check if channel is registered for crosschat"""
         try:
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                channels = self.bot.db_handler.get_crosschat_channels()
-                return int(channel_id) in channels
-            return False
+            return channel_registry.is_crosschat_channel(channel_id)
         except Exception as e:
             print(f"ERROR: Failed to check crosschat channel: {e}")
             return False
@@ -354,45 +199,67 @@ class SimpleCrossChat:
             return None
     
     async def send_block_dm(self, user, block_type, reason):
-        """Send DM to user explaining why their message was blocked"""
-        try:
-            embed = discord.Embed(
-                title="❌ Message Blocked",
-                description=f"Your message was blocked: {reason}",
-                color=0xff0000,
-                timestamp=datetime.utcnow()
-            )
+        """DM the user why their message was blocked (queued at low priority, repeats coalesced)"""
+        def render(reasons, count):
+            if count == 1:
+                embed = discord.Embed(
+                    title="❌ Message Blocked",
+                    description=f"Your message was blocked: {reasons[0]}",
+                    color=0xff0000,
+                    timestamp=datetime.utcnow()
+                )
+            else:
+                embed = discord.Embed(
+                    title="❌ Messages Blocked",
+                    description=f"{count} more of your messages were blocked: {', '.join(reasons)}"[:4096],
+                    color=0xff0000,
+                    timestamp=datetime.utcnow()
+                )
             embed.add_field(name="Block Type", value=block_type, inline=True)
             embed.set_footer(text="SynapseChat Cross-Chat System")
-            
-            await user.send(embed=embed)
-            print(f"SIMPLE_DM: Sent block notification to {user.name} ({user.id}) for {block_type}")
+            return {'embed': embed}
+        
+        try:
+            notice_scheduler.notify_user(user, reason, render)
+            print(f"SIMPLE_DM: Queued block notification to {user.name} ({user.id}) for {block_type}")
         except Exception as e:
-            print(f"SIMPLE: Failed to send block DM to {user.name}: {e}")
+            print(f"SIMPLE: Failed to queue block DM to {user.name}: {e}")
     
     async def send_automod_warning(self, user, automod_reason, message_content):
         """Send automod warning DM with specific violation details"""
-        try:
-            # Truncate message content for display
-            display_content = message_content[:100] + "..." if len(message_content) > 100 else message_content
-            
-            embed = discord.Embed(
-                title="⚠️ AutoMod Warning",
-                description="Your message was blocked by our automated moderation system.",
-                color=0xff9900,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="Violation Type", value=automod_reason, inline=False)
-            embed.add_field(name="Message Content", value=f"```{display_content}```", inline=False)
+        # Truncate message content for display
+        display_content = message_content[:100] + "..." if len(message_content) > 100 else message_content
+        
+        def render(reasons, count):
+            if count == 1:
+                embed = discord.Embed(
+                    title="⚠️ AutoMod Warning",
+                    description="Your message was blocked by our automated moderation system.",
+                    color=0xff9900,
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(name="Violation Type", value=reasons[0], inline=False)
+                embed.add_field(name="Message Content", value=f"```{display_content}```", inline=False)
+            else:
+                embed = discord.Embed(
+                    title="⚠️ AutoMod Warning",
+                    description=f"{count} more of your messages were blocked by our automated moderation system.",
+                    color=0xff9900,
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(name="Violation Types", value=', '.join(reasons)[:1024], inline=False)
             embed.add_field(
                 name="What to do?", 
                 value="Please review our community guidelines and rephrase your message. Repeated violations may result in temporary restrictions.", 
                 inline=False
             )
             embed.set_footer(text="SynapseChat AutoMod System")
-            
-            await user.send(embed=embed)
-            print(f"AUTOMOD_DM: Sent automod warning to {user.name} ({user.id}) for: {automod_reason}")
+            return {'embed': embed}
+        
+        try:
+            # Queued at low priority - a burst of blocked messages becomes one summary DM
+            notice_scheduler.notify_user(user, automod_reason, render)
+            print(f"AUTOMOD_DM: Queued automod warning to {user.name} ({user.id}) for: {automod_reason}")
             
             # Log the automod warning to database for tracking
             try:
@@ -405,8 +272,8 @@ class SimpleCrossChat:
                     'timestamp': datetime.now().isoformat()
                 }
                 # MongoDB logging - use bot's database handler
-                if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                    self.bot.db_handler.log_moderation_action(warning_data)
+                if getattr(self.bot, 'async_db', None):
+                    await self.bot.async_db.log_moderation_action(warning_data)
                 print(f"AUTOMOD_LOG: Logged warning for {user.name}")
             except Exception as log_e:
                 print(f"AUTOMOD_LOG: Failed to log warning: {log_e}")
@@ -434,31 +301,15 @@ class SimpleCrossChat:
             'priority': 100
         }
         
-        # Global VIP detection helper function
-        import os
-        def check_role_globally(role_id):
-            """Check if user has role across ALL guilds"""
-            if not (role_id and user_id and hasattr(self, 'bot') and self.bot):
-                return False
-            for check_guild in self.bot.guilds:
-                member = check_guild.get_member(user_id)
-                if member and member.roles:
-                    for role in member.roles:
-                        if str(role.id) == str(role_id):
-                            return True
-            return False
-        
-        # Check global VIP status BEFORE using in Founder/Staff checks
-        vip_role_id2 = os.environ.get('VIP_ROLE_ID2')  # Elite
-        vip_role_id = os.environ.get('VIP_ROLE_ID')    # Architect
+        # Global VIP status from the precomputed tier index (one dict lookup)
+        flags = user_tier_index.get_flags(user_id) if user_id else frozenset()
         
-        has_elite_vip = check_role_globally(vip_role_id2)
-        has_architect_vip = check_role_globally(vip_role_id) if not has_elite_vip else False
-        has_staff_role = check_role_globally(os.environ.get('STAFF_ROLE_ID'))
+        has_elite_vip = ELITE in flags
+        has_architect_vip = ARCHITECT in flags and not has_elite_vip
+        has_staff_role = STAFF in flags
         
         # PRIORITY 1: Check if this is the bot owner/founder FIRST
-        bot_owner_id = os.environ.get('BOT_OWNER_ID')
-        if user_id and bot_owner_id and str(user_id) == str(bot_owner_id):
+        if FOUNDER in flags:
             founder_tag = 'SynapseChat Founder'  # Default founder tag
             
             # Apply global VIP icons to founder tag
@@ -544,8 +395,8 @@ class SimpleCrossChat:
         
         # Get available channels early for debugging
         channels = self.get_channels()
+        destinations = channel_registry.get_destinations(message.channel.id)
         print(f"🔍 CROSSCHAT DEBUG: Total channels available: {len(channels)}")
-        print(f"🔍 CROSSCHAT DEBUG: Channel list: {channels}")
         print(f"🔍 CROSSCHAT DEBUG: Current channel: {message.channel.id}")
         
         if not channels:
@@ -558,11 +409,13 @@ class SimpleCrossChat:
         
         # IMMEDIATE DUPLICATE PREVENTION - Log processing start to prevent race conditions
         print(f"🔍 DUPLICATE_CHECK: Checking if message {message_id} already processed")
-        existing = None
-        if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-            existing = self.bot.db_handler.get_crosschat_message(message_id)
-        else:
-            print(f"❌ CRITICAL: No database handler available for duplicate checking")
+        existing = message_id in self.processed or message_logger.get_pending(message_id) is not None
+        if not existing and message.created_at < self.started_at:
+            # Only replays from before startup can exist in MongoDB without being in memory
+            if getattr(self.bot, 'async_db', None):
+                existing = await self.bot.async_db.get_crosschat_message(message_id)
+            else:
+                print(f"❌ CRITICAL: No database handler available for duplicate checking")
             
         if existing:
             print(f"🛡️ DUPLICATE_SKIP: Message {message_id} already processed in database, skipping")
@@ -570,7 +423,7 @@ class SimpleCrossChat:
         else:
             # IMMEDIATELY mark as processing to prevent duplicates
             print(f"✅ DUPLICATE_CHECK: Message {message_id} is new, marking as processing")
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
+            if getattr(self.bot, 'async_db', None):
                 try:
                     # Create immediate processing marker
                     processing_marker = {
@@ -582,7 +435,8 @@ class SimpleCrossChat:
                         'timestamp': message.created_at.isoformat(),
                         'processing_started': True
                     }
-                    self.bot.db_handler.log_crosschat_message(processing_marker)
+                    self.processed.add(message_id)
+                    message_logger.log(processing_marker)
                     print(f"🔒 PROCESSING_LOCK: Marked message {message_id} as processing")
                 except Exception as e:
                     print(f"⚠️ PROCESSING_LOCK_FAILED: Could not mark processing: {e}")
@@ -591,23 +445,10 @@ class SimpleCrossChat:
         # VIP STATUS CHECK - Early detection for fast-track processing
         is_vip = await self.is_support_vip(message.author.id)
         
-        # ELITE VIP CHECK - GLOBAL check across all guilds for VIP_ROLE_ID2
-        import os
-        vip_role_id2 = os.environ.get('VIP_ROLE_ID2')
-        is_elite_vip = False
-        
-        if vip_role_id2 and hasattr(self, 'bot') and self.bot:
-            # Check across ALL guilds where bot can see the user
-            for check_guild in self.bot.guilds:
-                member = check_guild.get_member(message.author.id)
-                if member and member.roles:
-                    for role in member.roles:
-                        if str(role.id) == str(vip_role_id2):
-                            is_elite_vip = True
-                            print(f"ELITE_VIP_GLOBAL: User {message.author.display_name} has Elite VIP status in {check_guild.name} - ULTRA FAST processing")
-                            break
-                if is_elite_vip:
-                    break
+        # ELITE VIP CHECK - GLOBAL VIP_ROLE_ID2 holders from the tier index
+        is_elite_vip = user_tier_index.is_elite(message.author.id)
+        if is_elite_vip:
+            print(f"ELITE_VIP_GLOBAL: User {message.author.display_name} has Elite VIP status - ULTRA FAST processing")
         
         # TAG HIERARCHY - Get user's tag level (separate from VIP processing speed)
         # Pass None for roles to force global checking across all guilds
@@ -707,19 +548,16 @@ class SimpleCrossChat:
             # Check if user is banned
             if await self.is_user_banned(message.author.id):
                 print(f"SIMPLE_BLOCKED: User {message.author.id} is banned")
-                await message.add_reaction('🚫')
                 return 'banned'
             
             if await self.is_server_banned(message.guild.id):
                 print(f"SIMPLE_BLOCKED: Server {message.guild.id} is banned")
-                await message.add_reaction('🚫')
                 return 'server_banned'
             
             # AutoMod check for regular users
             automod_reason = await self.check_automod(message)
             if automod_reason:
                 print(f"SIMPLE_AUTOMOD: Message blocked by AutoMod: {automod_reason}")
-                await message.add_reaction('⚠️')
                 await self.send_automod_warning(message.author, automod_reason, message.content)
                 return 'blocked'
             
@@ -733,15 +571,11 @@ class SimpleCrossChat:
             # Get channels for distribution
             print(f"SIMPLE: Found {len(channels)} channels for distribution")
         
-        # Add processing reaction immediately
-        try:
-            await message.add_reaction('⏳')
-            print(f"PROCESSING_REACTION: Added ⏳ to message {message.id}")
-        except Exception as e:
-            print(f"PROCESSING_REACTION_ERROR: Failed to add processing reaction: {e}")
+        # Processing reaction - ⏳ only appears if delivery outlasts the grace window
+        reaction_controller.begin(message)
         
         # Generate CC-ID ONCE for both VIP and standard users (after all checks)
-        cc_id = self.generate_cc_id(message.id, is_vip=is_vip, message=message)
+        cc_id = await self.generate_cc_id(message.id, is_vip=is_vip, message=message)
         print(f"SIMPLE: Generated CC-ID {cc_id} for message {message.id} (VIP: {is_vip})")
         
         # Create embed for crosschat display with hierarchy and VIP support
@@ -797,151 +631,57 @@ class SimpleCrossChat:
             'deleted_at': None,
             'tag_level': tag_info['level'],
             'tag_name': tag_info['tag'],
-            'is_vip': is_vip
+            'is_vip': is_vip,
+            # Delivered embed - lets edits rebuild it without fetching every destination message
+            'embed_snapshot': embed.to_dict()
         }
         
         # Both VIP and standard users will log after distribution for consistency
         print(f"PROCESSING: {tag_info['tag']} message {message.id} - logging after distribution")
         
-        # Prepare files to send with the message
-        files_to_send = []
-        if message.attachments:
-            for attachment in message.attachments:
-                try:
-                    # Download the file to send it to other channels
-                    file_data = await attachment.read()
-                    discord_file = discord.File(
-                        io.BytesIO(file_data), 
-                        filename=attachment.filename
-                    )
-                    files_to_send.append(discord_file)
-                    print(f"ATTACHMENT: Prepared {attachment.filename} for forwarding")
-                except Exception as e:
-                    print(f"ATTACHMENT_ERROR: Failed to prepare {attachment.filename}: {e}")
+        # Download each attachment ONCE - every destination gets a cheap view of the shared buffer
+        # Elite VIP skips the download wait and gets link-only attachments
+        attachments = await attachment_fanout.prepare(message, download=not is_elite_vip)
 
         # Initialize sent counter for all processing paths
         sent_count = 0
         
-        # SPEED DIFFERENTIATION: Elite VIP > Regular VIP > Standard users
+        # TIERED DELIVERY: one job per destination, scheduled by tier (Elite > Architect > Standard)
+        priority = tag_info['priority']
         if is_elite_vip:
-            # ELITE VIP: Instant parallel distribution with minimal delays
-            print(f"ELITE_VIP_DISTRIBUTION: Starting ultra-fast parallel distribution to {len(channels)-1} channels")
-            tasks = []
-            
-            for channel_id in channels:
-                if channel_id == message.channel.id:
-                    continue
-                    
-                channel = self.bot.get_channel(channel_id)
-                if channel:
-                    # Elite VIP: No file preparation delays - direct send
-                    task = asyncio.create_task(self._elite_vip_ultra_send(channel, embed, cc_id, str(message.id)))
-                    tasks.append(task)
-            
-            # Elite VIP: Wait for all sends with minimal timeout
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                sent_count = sum(1 for result in results if result is True)
-                print(f"ELITE_VIP_COMPLETE: Ultra-fast distribution completed - {sent_count}/{len(tasks)} channels")
-            
+            priority = min(priority, 10)
         elif is_vip:
-            # VIP: Parallel sends for maximum speed
-            print(f"VIP_FAST: Starting parallel distribution to {len(channels)-1} channels")
-            print(f"VIP_DEBUG: Source channel: {message.channel.id}, Target channels: {channels}")
-            tasks = []
-            
-            for channel_id in channels:
-                if channel_id == message.channel.id:
-                    continue
-                    
-                channel = self.bot.get_channel(channel_id)
-                if channel:
-                    # For VIP, create fresh file objects for each channel (required for parallel sending)
-                    channel_files = []
-                    if message.attachments:
-                        for attachment in message.attachments:
-                            try:
-                                file_data = await attachment.read()
-                                discord_file = discord.File(
-                                    io.BytesIO(file_data), 
-                                    filename=attachment.filename
-                                )
-                                channel_files.append(discord_file)
-                            except Exception as e:
-                                print(f"VIP_ATTACHMENT_ERROR: Failed to prepare {attachment.filename}: {e}")
-                    
-                    tasks.append(self._vip_fast_send_with_files(channel, embed, channel_files, cc_id, str(message.id)))
-                    print(f"VIP_SEND: Added task for channel {channel_id} ({channel.name})")
-            
-            # Execute all sends simultaneously for VIP speed
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                sent_count = sum(1 for r in results if isinstance(r, bool) and r)
-                print(f"VIP_FAST: Instant delivery complete - {sent_count} channels")
-            else:
-                sent_count = 0
-            
-            # VIP: Log to MongoDB AFTER instant distribution (FORCE IMMEDIATE)
-            print(f"🔍 DEBUG: VIP - FORCING IMMEDIATE LOGGING for message {log_data['message_id']}")
-            try:
-                await self._log_message_async(log_data, "VIP")
-            except Exception as e:
-                print(f"❌ CRITICAL VIP LOGGING ERROR: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            # VIP: Replace processing reaction with final status
-            if sent_count > 0:
-                await self.replace_processing_reaction(message, '✅')
-                return 'processed'
-            else:
-                await self.replace_processing_reaction(message, '❌')
-                return 'failed'
-                
-        else:
-            # STANDARD PROCESSING: Sequential sends for regular users
-            print(f"STANDARD: Starting sequential distribution to {len(channels)-1} channels")
-            print(f"STANDARD_DEBUG: Source channel: {message.channel.id}, Target channels: {channels}")
-            for channel_id in channels:
-                if channel_id == message.channel.id:
-                    continue
-                    
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    if channel:
-                        # Create fresh file objects for each channel
-                        channel_files = []
-                        if message.attachments:
-                            for attachment in message.attachments:
-                                try:
-                                    file_data = await attachment.read()
-                                    discord_file = discord.File(
-                                        io.BytesIO(file_data), 
-                                        filename=attachment.filename
-                                    )
-                                    channel_files.append(discord_file)
-                                except Exception as e:
-                                    print(f"ATTACHMENT_ERROR: Failed to prepare {attachment.filename}: {e}")
-                        
-                        # Send embed with files
-                        sent_message = await channel.send(embed=embed, files=channel_files)
-                        # Track sent message for global editing
-                        await self._track_sent_message(cc_id, str(message.id), str(channel_id), str(sent_message.id))
-                        sent_count += 1
-                        print(f"STANDARD_SEND: Successfully sent to {channel.name} ({channel.guild.name}) with {len(channel_files)} files")
-                except Exception as e:
-                    print(f"SIMPLE: Failed to send to channel {channel_id}: {e}")
-            
-            print(f"SIMPLE: Message {message.id} distributed to {sent_count} channels")
-            
-            # Standard users: Log to database AFTER distribution (FORCE IMMEDIATE)
-            print(f"🔍 DEBUG: STANDARD - FORCING IMMEDIATE LOGGING for message {log_data['message_id']}")
-            try:
-                await self._log_message_async(log_data, "STANDARD")
-            except Exception as e:
-                print(f"❌ CRITICAL STANDARD LOGGING ERROR: {e}")
-                import traceback
-                traceback.print_exc()
+            priority = min(priority, 25)
+        tier = delivery_scheduler.tier_for_priority(priority)
+        user_type = tier.upper()
+        
+        print(f"{user_type}_DISTRIBUTION: Scheduling delivery to {len(destinations)} channels (priority {priority})")
+        futures = [
+            delivery_scheduler.submit(tier, self._make_delivery_job(channel, embed, message, cc_id, attachments))
+            for channel in destinations
+        ]
+        try:
+            if futures:
+                outcomes = await asyncio.gather(*futures, return_exceptions=True)
+                delivered = [
+                    (outcome['channel_id'], str(outcome['result'].id))
+                    for outcome in outcomes if isinstance(outcome, dict) and outcome.get('success')
+                    and outcome.get('status') != 'duplicate'
+                ]
+                sent_count = sum(1 for outcome in outcomes if isinstance(outcome, dict) and outcome.get('success'))
+                # Track every delivered copy for global editing with one insert_many (non-blocking)
+                async_optimizer.background_task(sent_message_store.record(cc_id, delivered))
+        finally:
+            attachments.cleanup()
+        print(f"{user_type}_COMPLETE: Message {message.id} distributed to {sent_count}/{len(futures)} channels")
+        
+        # Log to MongoDB after distribution (write-behind)
+        try:
+            await self._log_message_async(log_data, user_type)
+        except Exception as e:
+            print(f"❌ CRITICAL {user_type} LOGGING ERROR: {e}")
+            import traceback
+            traceback.print_exc()
         
         # Only add success reaction if message was actually sent to channels
         if sent_count > 0:
@@ -954,102 +694,50 @@ class SimpleCrossChat:
         return result
     
     async def add_reaction(self, message, emoji):
-        """Add reaction to message"""
-        try:
-            await message.add_reaction(emoji)
-        except Exception as e:
-            print(f"Failed to add reaction {emoji} to message {message.id}: {e}")
+        """Set the message's status reaction"""
+        reaction_controller.finish(message, emoji)
     
     async def replace_processing_reaction(self, message, final_emoji):
-        """Replace processing reaction with final status reaction"""
-        try:
-            # Remove processing reaction first
-            await message.remove_reaction('⏳', self.bot.user)
-            print(f"REACTION_REPLACED: Removed ⏳ from message {message.id}")
-            
-            # Add final status reaction
-            await message.add_reaction(final_emoji)
-            print(f"REACTION_REPLACED: Added {final_emoji} to message {message.id}")
-        except discord.NotFound:
-            # Reaction not found, just add the final one
-            try:
-                await message.add_reaction(final_emoji)
-                print(f"REACTION_ADDED: Added {final_emoji} to message {message.id} (⏳ not found)")
-            except Exception as e:
-                print(f"REACTION_ADD_ERROR: Failed to add {final_emoji}: {e}")
-        except discord.Forbidden:
-            # No permission to remove reactions, just add the final one
-            try:
-                await message.add_reaction(final_emoji)
-                print(f"REACTION_ADDED: Added {final_emoji} to message {message.id} (no remove permission)")
-            except Exception as e:
-                print(f"REACTION_ADD_ERROR: Failed to add {final_emoji}: {e}")
-        except Exception as e:
-            print(f"REACTION_REPLACE_ERROR: Failed to replace reaction on message {message.id}: {e}")
-            # Fallback: just add the final reaction
-            try:
-                await message.add_reaction(final_emoji)
-                print(f"REACTION_FALLBACK: Added {final_emoji} to message {message.id}")
-            except:
-                pass
+        """Replace processing reaction with final status reaction (coalesced, low priority)"""
+        reaction_controller.finish(message, final_emoji)
+
+    def _make_delivery_job(self, channel, embed, message, cc_id, attachments):
+        """Build a scheduler job that sends one crosschat embed (with attachments) to one channel"""
+        link_text = attachments.links_for(channel)
+        # Same nonce on every attempt - discord.py sets enforce_nonce, so a retried send returns the original message
+        nonce = sent_message_store.nonce_for(cc_id, channel.id)
+        
+        async def send():
+            # Fresh views over the shared buffers per attempt - discord.File is consumed by each send
+            # Webhook mode posts as the author; falls back to channel.send without Manage Webhooks
+            return await webhook_delivery.send(
+                channel, message, content=link_text, embed=embed, files=attachments.files_for(channel), nonce=nonce,
+                files_factory=lambda: attachments.files_for(channel)
+            )
+        
+        async def job():
+            # Local idempotency check - never deliver the same CC-ID to a channel twice
+            delivered_id = sent_message_store.delivered_message_id(cc_id, channel.id)
+            if delivered_id:
+                print(f"DELIVERY_DUPLICATE: CC-{cc_id} already delivered to {channel.id} - skipping")
+                return {'channel_id': str(channel.id), 'success': True, 'status': 'duplicate', 'attempts': 0,
+                        'result': channel.get_partial_message(int(delivered_id))}
+            
+            # Rate-limit buckets, 429/5xx retries with jitter and per-destination outcome
+            outcome = await async_optimizer.deliver(channel, send, use_global=not webhook_delivery.cached(channel.id))
+            if outcome['success']:
+                sent_message_store.mark_delivered(cc_id, channel.id, outcome['result'].id)
+                print(f"DELIVERY_SEND: Sent to {channel.name} ({channel.guild.name}) in {outcome['latency_ms']}ms ({outcome['attempts']} attempts)")
+            return outcome
+        return job
 
-    async def _vip_fast_send(self, channel, embed):
-        """Ultra-fast send function for VIP messages - no error handling delays"""
-        try:
-            await channel.send(embed=embed)
-            return True
-        except:
-            return False  # Silent fail for maximum speed
-    
-    async def _vip_fast_send_with_tracking(self, channel, embed, cc_id, original_message_id):
-        """Ultra-fast send function for VIP messages with message tracking for global editing"""
-        try:
-            sent_message = await channel.send(embed=embed)
-            # Track sent message for global editing (async, non-blocking)
-            asyncio.create_task(self._track_sent_message(cc_id, original_message_id, str(channel.id), str(sent_message.id)))
-            return True
-        except:
-            return False  # Silent fail for maximum speed
-    
-    async def _elite_vip_ultra_send(self, channel, embed, cc_id, original_message_id):
-        """Ultra-fast send function for Elite VIP messages - maximum speed priority"""
-        try:
-            sent_message = await channel.send(embed=embed)
-            # Background tracking for Elite VIP - non-blocking
-            asyncio.create_task(self._track_sent_message(cc_id, original_message_id, str(channel.id), str(sent_message.id)))
-            return True
-        except:
-            return False  # Silent fail for Elite VIP maximum speed
-    
-    async def _track_sent_message(self, cc_id, original_message_id, channel_id, sent_message_id):
-        """Track sent message in MongoDB for global editing functionality"""
-        try:
-            # Use MongoDB handler for tracking sent messages
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                success = self.bot.db_handler.track_sent_message(
-                    cc_id=cc_id,
-                    original_message_id=original_message_id,
-                    channel_id=channel_id,
-                    sent_message_id=sent_message_id
-                )
-                if success:
-                    print(f"✅ MONGODB: Tracked sent message {sent_message_id} for CC-{cc_id}")
-                else:
-                    print(f"❌ MONGODB: Failed to track sent message {sent_message_id}")
-            else:
-                print(f"❌ MONGODB: No database handler - message tracking disabled")
-        except Exception as e:
-            print(f"TRACK_ERROR: Failed to track sent message {sent_message_id}: {e}")
-    
     async def _log_message_async(self, log_data, user_type):
         """Asynchronously log message to MongoDB after distribution with duplicate prevention"""
         try:
             # Use MongoDB handler for logging crosschat messages
-            print(f"🔍 DEBUG: Checking if bot has db_handler: {hasattr(self.bot, 'db_handler')}")
-            if hasattr(self.bot, 'db_handler'):
-                print(f"🔍 DEBUG: db_handler exists: {self.bot.db_handler is not None}")
+            print(f"🔍 DEBUG: Checking if bot has async_db: {getattr(self.bot, 'async_db', None) is not None}")
             
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
+            if getattr(self.bot, 'async_db', None):
                 message_data = {
                     'message_id': log_data['message_id'],
                     'user_id': log_data['user_id'],
@@ -1058,68 +746,22 @@ class SimpleCrossChat:
                     'guild_id': log_data['guild_id'],
                     'channel_id': log_data['channel_id'],
                     'tag_name': log_data.get('tag_name', 'Unknown'),
-                    'timestamp': log_data.get('timestamp')
+                    'timestamp': log_data.get('timestamp'),
+                    'cc_id': log_data.get('cc_id'),
+                    'embed_snapshot': log_data.get('embed_snapshot')
                 }
-                print(f"🔍 DEBUG: Calling log_crosschat_message with data: {message_data}")
-                success = self.bot.db_handler.log_crosschat_message(message_data)
+                if not message_data['timestamp']:
+                    del message_data['timestamp']
+                success = message_logger.log(message_data)
                 if success:
-                    print(f"✅ MONGODB {user_type}_LOG: Logged {log_data['tag_name']} message {log_data['message_id']}")
+                    print(f"✅ MONGODB {user_type}_LOG: Queued {log_data['tag_name']} message {log_data['message_id']}")
                 else:
                     print(f"❌ MONGODB {user_type}_LOG: Failed to log message {log_data['message_id']}")
             else:
-                print(f"❌ MONGODB {user_type}_LOG: No database handler available - bot.db_handler is None or missing")
+                print(f"❌ MONGODB {user_type}_LOG: No database handler available - bot.async_db is None or missing")
         except Exception as e:
             print(f"❌ MONGODB {user_type}_LOG_ERROR: Failed to log message {log_data.get('message_id', 'unknown')}: {e}")
 
-    async def _remove_discord_duplicates(self, original_message, cc_id, channel_ids):
-        """Remove Discord-level duplicates by scanning channels after sends complete"""
-        try:
-            await asyncio.sleep(3)  # Wait for Discord API to settle
-            
-            duplicate_count = 0
-            cc_id_pattern = cc_id  # Look for this specific CC-ID
-            
-            # Scan each channel for duplicate messages with same CC-ID
-            for channel_id in channel_ids:
-                if channel_id == original_message.channel.id:
-                    continue  # Skip origin channel
-                    
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    if not channel:
-                        continue
-                    
-                    # Get last 10 messages to find duplicates
-                    messages = []
-                    async for msg in channel.history(limit=10):
-                        if msg.bot and hasattr(msg, 'embeds') and msg.embeds:
-                            embed = msg.embeds[0]
-                            if hasattr(embed, 'footer') and embed.footer and embed.footer.text:
-                                if cc_id_pattern in embed.footer.text:
-                                    messages.append(msg)
-                    
-                    # If more than 1 message with same CC-ID, delete extras
-                    if len(messages) > 1:
-                        # Keep the first one, delete the rest
-                        for duplicate_msg in messages[1:]:
-                            try:
-                                await duplicate_msg.delete()
-                                duplicate_count += 1
-                                print(f"DUPLICATE_DELETED: Removed duplicate CC-{cc_id} from {channel.name}")
-                            except Exception as e:
-                                print(f"DUPLICATE_DELETE_FAILED: {e}")
-                                
-                except Exception as e:
-                    print(f"DUPLICATE_SCAN_ERROR: {e}")
-            
-            if duplicate_count > 0:
-                print(f"DUPLICATE_CLEANUP: Removed {duplicate_count} Discord-level duplicates for CC-{cc_id}")
-            else:
-                print(f"DUPLICATE_CLEANUP: No duplicates found for CC-{cc_id}")
-                
-        except Exception as e:
-            print(f"DUPLICATE_CLEANUP_ERROR: {e}")
-
     async def send_announcement(self, content: str):
         """Send announcement to all cross-chat channels"""
         try:
@@ -1222,14 +864,15 @@ class SimpleCrossChat:
         """Process message edits and update globally across CrossChat channels"""
         try:
             # Check if this message is from a CrossChat channel
-            channels = self.get_channels()
-            if not channels or int(after.channel.id) not in channels:
+            if not channel_registry.is_crosschat_channel(after.channel.id):
                 print(f"EDIT_SKIP: Message {after.id} not in CrossChat channel")
                 return None
             
-            # Check if the message was originally processed by CrossChat using MongoDB
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                original_record = self.bot.db_handler.get_crosschat_message(str(before.id))
+            # Check if the message was originally processed by CrossChat (pending write-behind entry first)
+            if getattr(self.bot, 'async_db', None):
+                original_record = message_logger.get_pending(before.id)
+                if not original_record or not original_record.get('cc_id'):
+                    original_record = await self.bot.async_db.get_crosschat_message(str(before.id))
                 
                 if not original_record:
                     print(f"EDIT_SKIP: Original message {before.id} not found in CrossChat database")
@@ -1241,12 +884,12 @@ class SimpleCrossChat:
                     print(f"EDIT_PROCESS: Processing edit for CrossChat message CC-{cc_id}")
                     
                     # Update message in MongoDB
-                    self.bot.db_handler.update_crosschat_message(str(after.id), after.content)
+                    await self.bot.async_db.update_crosschat_message(str(after.id), after.content)
                     
-                    # Find and edit all related messages globally
-                    await self._edit_crosschat_globally(cc_id, after.content, str(after.id))
+                    # Debounced: rapid successive edits collapse into one propagation of the latest content
+                    self._schedule_global_edit(cc_id, after.content, str(after.id), original_record.get('embed_snapshot'))
                     
-                    print(f"EDIT_COMPLETE: Updated CrossChat message CC-{cc_id} globally")
+                    print(f"EDIT_COMPLETE: Scheduled global update for CrossChat message CC-{cc_id}")
                     return 'processed'
                 else:
                     print("EDIT_SKIP: No CC-ID found for message")
@@ -1261,85 +904,117 @@ class SimpleCrossChat:
             traceback.print_exc()
             return 'failed'
 
-    async def _edit_crosschat_globally(self, cc_id: str, new_content: str, original_message_id: str):
-        """Edit all crosschat messages globally with the same CC-ID"""
+    def _schedule_global_edit(self, cc_id: str, new_content: str, original_message_id: str, embed_snapshot=None):
+        """Start (or extend) the debounce window for a CC-ID - only the latest content is propagated"""
+        pending = self._pending_edits.get(cc_id)
+        if pending:
+            pending['content'] = new_content
+            pending['embed_snapshot'] = embed_snapshot or pending['embed_snapshot']
+            print(f"EDIT_DEBOUNCE: Coalesced edit for CC-{cc_id}")
+            return
+        
+        self._pending_edits[cc_id] = {'content': new_content, 'embed_snapshot': embed_snapshot}
+        
+        async def fire():
+            await asyncio.sleep(self.edit_debounce)
+            latest = self._pending_edits.pop(cc_id, None)
+            if latest:
+                await self._edit_crosschat_globally(cc_id, latest['content'], original_message_id, latest['embed_snapshot'])
+        
+        async_optimizer.background_task(fire())
+
+    async def _edit_crosschat_globally(self, cc_id: str, new_content: str, original_message_id: str, embed_snapshot=None):
+        """Edit all crosschat messages globally with the same CC-ID - no per-destination fetches, concurrent, rate-limit aware"""
         try:
-            # Get all crosschat channels
-            channels = self.get_channels()
-            if not channels:
-                print(f"EDIT_GLOBAL_SKIP: No crosschat channels available")
+            if not getattr(self.bot, 'async_db', None):
+                print(f"EDIT_GLOBAL_SKIP: No database handler available")
                 return
-
-            print(f"EDIT_GLOBAL: Searching for messages with CC-ID {cc_id} across {len(channels)} channels")
             
-            # Search for all messages with this CC-ID
-            if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                sent_messages = self.bot.db_handler.get_sent_messages_by_cc_id(cc_id)
-                
-                if not sent_messages:
-                    print(f"EDIT_GLOBAL_SKIP: No sent messages found for CC-ID {cc_id}")
+            sent_messages = await sent_message_store.get(cc_id)
+            if not sent_messages:
+                print(f"EDIT_GLOBAL_SKIP: No sent messages found for CC-ID {cc_id}")
+                return
+            
+            targets = self._edit_targets(sent_messages, skip_message_id=original_message_id)
+            if not embed_snapshot:
+                # Relayed before snapshots were stored - copy the embed from one delivered message
+                embed_snapshot = await self._fetch_embed_snapshot(targets)
+                if not embed_snapshot:
+                    print(f"EDIT_GLOBAL_SKIP: No embed snapshot available for CC-ID {cc_id}")
                     return
-                
-                edit_count = 0
-                for sent_msg in sent_messages:
-                    # Skip the original message that was edited
-                    if sent_msg.get('message_id') == original_message_id:
-                        continue
-                    
-                    try:
-                        channel_id = int(sent_msg.get('channel_id'))
-                        message_id = int(sent_msg.get('message_id'))
-                        
-                        channel = self.bot.get_channel(channel_id)
-                        if channel:
-                            # Fetch and edit the message
-                            message = await channel.fetch_message(message_id)
-                            if message and message.author == self.bot.user:
-                                # Parse the current embed to preserve formatting
-                                if message.embeds:
-                                    embed = message.embeds[0]
-                                    # Update the description with new content
-                                    embed.description = new_content
-                                    await message.edit(embed=embed)
-                                    edit_count += 1
-                                    print(f"EDIT_GLOBAL_SUCCESS: Updated message {message_id} in {channel.name}")
-                                else:
-                                    # Fallback for non-embed messages
-                                    await message.edit(content=new_content)
-                                    edit_count += 1
-                                    print(f"EDIT_GLOBAL_SUCCESS: Updated text message {message_id} in {channel.name}")
-                    except Exception as e:
-                        print(f"EDIT_GLOBAL_ERROR: Failed to edit message {sent_msg.get('message_id')}: {e}")
-                
-                print(f"EDIT_GLOBAL_COMPLETE: Updated {edit_count} messages globally for CC-ID {cc_id}")
-            else:
-                print(f"EDIT_GLOBAL_SKIP: No database handler available")
+            
+            # Rebuild the delivered embed from its snapshot - no fetch_message per destination
+            embed = discord.Embed.from_dict(embed_snapshot)
+            embed.description = new_content or "*[Image/File attached]*"
+            
+            print(f"EDIT_GLOBAL: Propagating CC-{cc_id} edit to {len(targets)} messages")
+            edit_count = await self._edit_copies(targets, embed)
+            print(f"EDIT_GLOBAL_COMPLETE: Updated {edit_count}/{len(targets)} messages globally for CC-ID {cc_id}")
                 
         except Exception as e:
             print(f"EDIT_GLOBAL_CRITICAL_ERROR: {e}")
             import traceback
             traceback.print_exc()
 
+    def _edit_targets(self, sent_messages, skip_message_id: str = None) -> dict:
+        """channel_id -> (channel, message_id) for every delivered copy whose channel is known"""
+        targets = {}
+        for channel_id, message_id in sent_messages:
+            # Skip the original message that was edited
+            if message_id == skip_message_id:
+                continue
+            try:
+                channel_id = int(channel_id)
+                channel = channel_registry.get_channel(channel_id) or self.bot.get_channel(channel_id)
+                if channel:
+                    targets[channel.id] = (channel, int(message_id))
+            except (TypeError, ValueError):
+                continue
+        return targets
+
+    async def _fetch_embed_snapshot(self, targets: dict, attempts: int = 3):
+        """Embed of one delivered copy, as a dict - for messages relayed before snapshots were stored"""
+        for channel, message_id in list(targets.values())[:attempts]:
+            try:
+                delivered = await channel.fetch_message(message_id)
+            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+                continue
+            if delivered.embeds:
+                return delivered.embeds[0].to_dict()
+        return None
+
+    async def _edit_copies(self, targets: dict, embed) -> int:
+        """Edit delivered copies through the rate-limited fan-out - returns how many were updated"""
+        async def edit_one(channel, message_data):
+            message_id = targets[channel.id][1]
+            # Copies sent in webhook mode can only be edited by the webhook
+            if await webhook_delivery.edit(channel, message_id, embed=embed):
+                return True
+            return await channel.get_partial_message(message_id).edit(embed=embed)
+        
+        outcomes = await async_optimizer.parallel_channel_distribution(
+            [channel for channel, _ in targets.values()], {}, edit_one
+        )
+        return sum(1 for outcome in outcomes if outcome.get('success'))
+
     async def edit_message(self, cc_id: str, new_content: str):
         """Edit a cross-chat message by CC-ID"""
         try:
-            # Find the original message ID from CC-ID
-            original_message_id = self.cc_id_reverse.get(cc_id)
-            if not original_message_id:
-                print(f"SIMPLE_EDIT: CC-ID {cc_id} not found")
-                return False
+            # Snowflake-derived CC-IDs decode to the original message ID; legacy time/random IDs do not,
+            # but their sent messages are still in the store
+            original_message_id = cc_id_generator.decode_cc_id(cc_id)
                 
-            # Get the sent messages for this original message
-            sent_messages = self.message_mappings.get(original_message_id, [])
-            if not sent_messages:
+            # Get the sent messages for this CC-ID (recent window in memory, indexed query on miss)
+            targets = self._edit_targets(await sent_message_store.get(cc_id))
+            if not targets:
                 print(f"SIMPLE_EDIT: No sent messages found for CC-ID {cc_id}")
                 return False
             
             # Get user ID from database for footer
             user_id = "Unknown"
             try:
-                if hasattr(self.bot, 'db_handler') and self.bot.db_handler:
-                    message_record = self.bot.db_handler.get_crosschat_message(str(original_message_id))
+                if original_message_id and getattr(self.bot, 'async_db', None):
+                    message_record = await self.bot.async_db.get_crosschat_message(str(original_message_id))
                     if message_record and message_record.get('user_id'):
                         user_id = message_record['user_id']
             except Exception as e:
@@ -1362,14 +1037,8 @@ class SimpleCrossChat:
             # Add footer with CC-ID and user ID
             embed.set_footer(text=f"CC-{cc_id} • ID: {user_id}")
             
-            # Edit all sent messages
-            edit_count = 0
-            for sent_msg in sent_messages:
-                try:
-                    await sent_msg.edit(embed=embed)
-                    edit_count += 1
-                except Exception as e:
-                    print(f"SIMPLE_EDIT: Failed to edit message: {e}")
+            # Edit all sent messages - concurrent, rate-limit aware, webhook copies via the webhook
+            edit_count = await self._edit_copies(targets, embed)
             
             print(f"SIMPLE_EDIT: Edited {edit_count} messages for CC-ID {cc_id}")
             return edit_count > 0
@@ -1377,15 +1046,3 @@ class SimpleCrossChat:
         except Exception as e:
             print(f"SIMPLE_EDIT: Error editing message with CC-ID {cc_id}: {e}")
             return False
-
-    async def _vip_fast_send_with_files(self, channel, embed, files, cc_id, original_message_id):
-        """VIP optimized sending with file support"""
-        try:
-            sent_message = await channel.send(embed=embed, files=files)
-            # Track sent message for global editing
-            await self._track_sent_message(cc_id, original_message_id, str(channel.id), str(sent_message.id))
-            print(f"VIP_SEND: Sent to {channel.name} ({channel.guild.name}) with {len(files)} files")
-            return True
-        except Exception as e:
-            print(f"VIP_SEND_ERROR: Failed to send to {channel.name}: {e}")
-            return False
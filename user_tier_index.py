@@ -0,0 +1,181 @@
+"""
+User Tier Index
+Precomputed user -> VIP / Elite / Staff / Founder flags maintained from gateway member and role events
+"""
+
+import os
+from typing import Dict, FrozenSet, Set, Optional, Any
+
+# Tier flags
+ELITE = 'elite'            # VIP_ROLE_ID2 in any guild
+ARCHITECT = 'architect'    # VIP_ROLE_ID in any guild
+STAFF = 'staff'            # STAFF_ROLE_ID in any guild
+SUPPORT_VIP = 'support_vip'  # VIP_ROLE_ID or VIP_ROLE_ID2 in the SynapseChat Support server
+FOUNDER = 'founder'        # BOT_OWNER_ID
+
+def _env_id(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        print(f"TIER_INDEX: Ignoring invalid {name}={value!r}")
+        return None
+
+class UserTierIndex:
+    """Answers tier lookups with a dict hit instead of walking every guild per message"""
+
+    def __init__(self):
+        # Environment is read once
+        self.support_guild_id = _env_id('SYNAPSECHAT_GUILD_ID')
+        self.vip_role_id = _env_id('VIP_ROLE_ID')      # Architect
+        self.vip_role_id2 = _env_id('VIP_ROLE_ID2')    # Elite
+        self.staff_role_id = _env_id('STAFF_ROLE_ID')
+        self.bot_owner_id = _env_id('BOT_OWNER_ID')
+
+        # role_id -> flag granted by holding it in any guild
+        self._role_flags: Dict[int, str] = {}
+        if self.vip_role_id2:
+            self._role_flags[self.vip_role_id2] = ELITE
+        if self.vip_role_id:
+            self._role_flags[self.vip_role_id] = ARCHITECT
+        if self.staff_role_id:
+            self._role_flags[self.staff_role_id] = STAFF
+        self._support_roles = {rid for rid in (self.vip_role_id, self.vip_role_id2) if rid}
+
+        # (user_id) -> {(guild_id, role_id)} tracked role memberships
+        self._holdings: Dict[int, Set[tuple]] = {}
+        # user_id -> flags (derived from holdings)
+        self._flags: Dict[int, FrozenSet[str]] = {}
+
+        self.built = False
+        self.rebuilds = 0
+        self.member_updates = 0
+        self.lookups = 0
+
+    def _compute_flags(self, user_id: int) -> FrozenSet[str]:
+        flags = set()
+        for guild_id, role_id in self._holdings.get(user_id, ()):
+            flags.add(self._role_flags[role_id])
+            if guild_id == self.support_guild_id and role_id in self._support_roles:
+                flags.add(SUPPORT_VIP)
+        if self.bot_owner_id and user_id == self.bot_owner_id:
+            flags.add(FOUNDER)
+        return frozenset(flags)
+
+    def _refresh_user(self, user_id: int):
+        holdings = self._holdings.get(user_id)
+        if not holdings:
+            self._holdings.pop(user_id, None)
+        flags = self._compute_flags(user_id)
+        if flags:
+            self._flags[user_id] = flags
+        else:
+            self._flags.pop(user_id, None)
+
+    def rebuild(self, bot) -> int:
+        """Build the index from the role holders of every guild (startup / resync)"""
+        holdings: Dict[int, Set[tuple]] = {}
+        for guild in bot.guilds:
+            for role_id in self._role_flags:
+                role = guild.get_role(role_id)
+                if not role:
+                    continue
+                for member in role.members:
+                    holdings.setdefault(member.id, set()).add((guild.id, role_id))
+
+        self._holdings = holdings
+        self._flags = {}
+        for user_id in holdings:
+            self._refresh_user(user_id)
+        if self.bot_owner_id:
+            self._refresh_user(self.bot_owner_id)
+
+        self.built = True
+        self.rebuilds += 1
+        print(f"TIER_INDEX: Indexed {len(self._flags)} users with tiers across {len(bot.guilds)} guilds")
+        return len(self._flags)
+
+    def update_member(self, member):
+        """Member joined or their roles changed - re-derive their tracked roles in that guild"""
+        if not self._role_flags:
+            return
+        guild_id = member.guild.id
+        holdings = {h for h in self._holdings.get(member.id, ()) if h[0] != guild_id}
+        for role_id in self._role_flags:
+            if member.get_role(role_id) is not None:
+                holdings.add((guild_id, role_id))
+        self._holdings[member.id] = holdings
+        self._refresh_user(member.id)
+        self.member_updates += 1
+
+    def remove_member(self, guild_id: int, user_id: int):
+        """Member left a guild"""
+        holdings = self._holdings.get(user_id)
+        if not holdings:
+            return
+        self._holdings[user_id] = {h for h in holdings if h[0] != guild_id}
+        self._refresh_user(user_id)
+        self.member_updates += 1
+
+    def refresh_role(self, role):
+        """Tracked role updated - resync its holders in that guild"""
+        if role.id not in self._role_flags:
+            return
+        self.remove_role(role.guild.id, role.id)
+        for member in role.members:
+            self._holdings.setdefault(member.id, set()).add((role.guild.id, role.id))
+            self._refresh_user(member.id)
+
+    def remove_role(self, guild_id: int, role_id: int):
+        """Tracked role deleted - drop it from every holder"""
+        if role_id not in self._role_flags:
+            return
+        key = (guild_id, role_id)
+        for user_id in [uid for uid, holdings in self._holdings.items() if key in holdings]:
+            self._holdings[user_id].discard(key)
+            self._refresh_user(user_id)
+
+    def add_guild(self, guild):
+        """Bot joined a guild - index its tracked role holders"""
+        for role_id in self._role_flags:
+            role = guild.get_role(role_id)
+            if role:
+                self.refresh_role(role)
+
+    def remove_guild(self, guild_id: int):
+        """Bot left a guild - drop every holding from it"""
+        for user_id in [uid for uid, holdings in self._holdings.items() if any(h[0] == guild_id for h in holdings)]:
+            self._holdings[user_id] = {h for h in self._holdings[user_id] if h[0] != guild_id}
+            self._refresh_user(user_id)
+
+    def get_flags(self, user_id) -> FrozenSet[str]:
+        """Get a user's tier flags - single dict lookup"""
+        self.lookups += 1
+        try:
+            return self._flags.get(int(user_id), frozenset())
+        except (TypeError, ValueError):
+            return frozenset()
+
+    def is_elite(self, user_id) -> bool:
+        return ELITE in self.get_flags(user_id)
+
+    def is_support_vip(self, user_id) -> bool:
+        return SUPPORT_VIP in self.get_flags(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        counts = {flag: 0 for flag in (ELITE, ARCHITECT, STAFF, SUPPORT_VIP, FOUNDER)}
+        for flags in self._flags.values():
+            for flag in flags:
+                counts[flag] += 1
+        return {
+            'built': self.built,
+            'indexed_users': len(self._flags),
+            'tier_counts': counts,
+            'rebuilds': self.rebuilds,
+            'member_updates': self.member_updates,
+            'lookups': self.lookups
+        }
+
+# Global tier index instance
+user_tier_index = UserTierIndex()
@@ -0,0 +1,240 @@
+"""
+Violation Ledger
+Per-user automod violation counters that decay over time, persisted to MongoDB in batches
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+class LedgerEntry:
+    """One user's decayed violation count, warnings issued at that count and the last few reasons"""
+
+    __slots__ = ('count', 'decayed_at', 'last_violation', 'warnings', 'reasons')
+
+    def __init__(self, count: int = 0, decayed_at: float = None, last_violation: float = None,
+                 warnings: int = 0, reasons=(), recent_reasons: int = 5):
+        self.count = count
+        self.decayed_at = decayed_at if decayed_at is not None else time.time()
+        self.last_violation = last_violation
+        self.warnings = warnings
+        self.reasons = deque(reasons, maxlen=recent_reasons)
+
+class ViolationLedger:
+    """In-memory ledger on the moderation fast path; changed entries are flushed with one bulk_write
+    every few seconds and the ledger is reloaded at startup"""
+
+    def __init__(self, decay_hours: float = None, flush_interval_ms: int = None, max_users: int = None,
+                 recent_reasons: int = None):
+        # One violation is forgiven per decay interval
+        self.decay_interval = (decay_hours or float(os.environ.get('AUTOMOD_VIOLATION_DECAY_HOURS', 24))) * 3600
+        self.flush_interval = (flush_interval_ms or int(os.environ.get('AUTOMOD_LEDGER_FLUSH_MS', 5000))) / 1000
+        self.max_users = max_users or int(os.environ.get('AUTOMOD_LEDGER_MAX_USERS', 100000))
+        self.recent_reasons = recent_reasons or int(os.environ.get('AUTOMOD_LEDGER_REASONS', 5))
+        self.violations_per_warning = 3
+
+        self.async_db = None
+        self._entries: "OrderedDict[str, LedgerEntry]" = OrderedDict()  # least recently active first
+        self._dirty = set()
+        self._task = None
+        self._flush_lock = None
+
+        # Statistics
+        self.recorded = 0
+        self.loaded = 0
+        self.evicted = 0
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.failed_flushes = 0
+
+    def attach(self, async_db):
+        """Attach the async database handler used for flushing"""
+        self.async_db = async_db
+
+    def start(self):
+        """Start the background flush task on the running loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+        print(f"LEDGER: Started (flush every {int(self.flush_interval * 1000)}ms)")
+
+    def load(self, db_handler) -> int:
+        """Load persisted ledger entries from MongoDB (startup only)"""
+        if not db_handler:
+            return 0
+
+        try:
+            documents = db_handler.get_violation_ledger()
+        except Exception as e:
+            print(f"LEDGER_ERROR: Failed to load violation ledger: {e}")
+            return 0
+
+        for document in sorted(documents, key=lambda doc: doc.get('last_violation') or 0):
+            try:
+                user_id = str(document['user_id'])
+                entry = LedgerEntry(
+                    count=int(document.get('count', 0)),
+                    decayed_at=float(document.get('decayed_at') or time.time()),
+                    last_violation=document.get('last_violation'),
+                    warnings=int(document.get('warnings', 0)),
+                    reasons=[tuple(reason) for reason in document.get('reasons') or []],
+                    recent_reasons=self.recent_reasons
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if self._decay(entry, time.time()):
+                self._entries[user_id] = entry
+        self._evict()
+
+        self.loaded = len(self._entries)
+        print(f"LEDGER: Loaded {self.loaded} users with active violations from MongoDB")
+        return self.loaded
+
+    def _decay(self, entry: LedgerEntry, now: float) -> bool:
+        """Forgive one violation per elapsed interval - False once nothing is left"""
+        steps = int((now - entry.decayed_at) // self.decay_interval)
+        if steps > 0:
+            entry.count = max(0, entry.count - steps)
+            entry.decayed_at += steps * self.decay_interval
+            # Warnings already issued stay valid only while the count still justifies them
+            entry.warnings = min(entry.warnings, entry.count // self.violations_per_warning)
+        return entry.count > 0
+
+    def record(self, user_id: str, reason: str, categories: List[str] = None, guild_id: str = None) -> LedgerEntry:
+        """Count a violation and return the user's updated entry"""
+        now = time.time()
+        entry = self._entries.get(user_id)
+        if entry is None or not self._decay(entry, now):
+            entry = LedgerEntry(decayed_at=now, recent_reasons=self.recent_reasons)
+            self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+
+        entry.count += 1
+        entry.last_violation = now
+        entry.reasons.append((reason, list(categories or []), guild_id, now))
+        self._dirty.add(user_id)
+        self.recorded += 1
+        self._evict()
+
+        if self.async_db and (self._task is None or self._task.done()):
+            self.start()
+        return entry
+
+    def set_warnings(self, user_id: str, warnings: int):
+        """Remember how many warnings were issued for the current count"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.warnings = warnings
+            self._dirty.add(user_id)
+
+    def reset(self, user_id: str):
+        """Clear a user's count (after a service ban)"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.count = 0
+            entry.warnings = 0
+            entry.decayed_at = time.time()
+            self._dirty.add(user_id)
+
+    def get(self, user_id: str) -> Optional[LedgerEntry]:
+        """Get a user's entry with decay applied (None if they have no active violations)"""
+        entry = self._entries.get(user_id)
+        if entry is None or not self._decay(entry, time.time()):
+            return None
+        return entry
+
+    def _evict(self):
+        """Drop the least recently active users over max_users (their stored document stays)"""
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def _document(self, user_id: str, entry: LedgerEntry) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'count': entry.count,
+            'decayed_at': entry.decayed_at,
+            'last_violation': entry.last_violation,
+            'warnings': entry.warnings,
+            'reasons': [list(reason) for reason in entry.reasons],
+            'updated_at': datetime.utcnow()
+        }
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                break
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"LEDGER_ERROR: Flush loop error: {e}")
+
+    async def flush(self) -> int:
+        """Write every changed entry with one unordered bulk_write"""
+        if not self.async_db:
+            return 0
+
+        async with self._flush_lock:
+            # Checked under the lock - an in-flight flush may restore its entries before releasing it
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            # Entries dropped since they changed keep their last stored state
+            documents = {
+                user_id: self._document(user_id, self._entries[user_id])
+                for user_id in dirty if user_id in self._entries
+            }
+            self.flushes += 1
+            try:
+                ok = await self.async_db.bulk_upsert_violation_ledger(documents)
+            except asyncio.CancelledError:
+                self._dirty |= dirty
+                raise
+            except Exception as e:
+                print(f"LEDGER_ERROR: Flush raised: {e}")
+                ok = False
+            if ok:
+                self.flushed_entries += len(documents)
+                return len(documents)
+
+            # Retry on the next flush
+            self.failed_flushes += 1
+            self._dirty |= dirty
+            print(f"LEDGER_ERROR: Flush of {len(documents)} entries failed - will retry")
+            return 0
+
+    async def stop(self):
+        """Stop the flush task and write out everything still pending"""
+        if self._task:
+            task, self._task = self._task, None
+            task.cancel()
+            # Let an in-flight flush restore its entries before the final flush
+            await asyncio.gather(task, return_exceptions=True)
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ledger size and flush statistics"""
+        return {
+            'users': len(self._entries),
+            'pending': len(self._dirty),
+            'recorded': self.recorded,
+            'loaded': self.loaded,
+            'evicted': self.evicted,
+            'flushes': self.flushes,
+            'flushed_entries': self.flushed_entries,
+            'failed_flushes': self.failed_flushes,
+            'decay_hours': round(self.decay_interval / 3600, 2)
+        }
+
+# Global violation ledger instance
+violation_ledger = ViolationLedger()
@@ -0,0 +1,156 @@
+"""
+Webhook Delivery Mode
+Posts crosschat messages through one cached webhook per channel with the author's name and avatar
+"""
+
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+import discord
+
+WEBHOOK_NAME = "SynapseChat CrossChat"
+
+# Discord rejects webhook usernames containing these words
+_RESERVED_NAMES = re.compile(r'discord|clyde', re.IGNORECASE)
+
+class WebhookDelivery:
+    """Provisions and caches crosschat webhooks; channels without Manage Webhooks fall back to channel.send"""
+
+    def __init__(self):
+        self.enabled = os.environ.get('CROSSCHAT_WEBHOOK_MODE', 'false').lower() == 'true'
+        self.retry_after = int(os.environ.get('CROSSCHAT_WEBHOOK_RETRY', 600))  # seconds before re-checking a fallback channel
+
+        self._webhooks: Dict[int, discord.Webhook] = {}
+        self._unavailable: Dict[int, float] = {}  # channel_id -> time permission check failed
+
+        # Statistics
+        self.webhook_sends = 0
+        self.fallback_sends = 0
+        self.provisioned = 0
+        self.reused = 0
+
+    def cached(self, channel_id) -> Optional[discord.Webhook]:
+        return self._webhooks.get(int(channel_id))
+
+    def forget(self, channel_id):
+        """Drop a cached webhook (channel deleted / webhooks changed)"""
+        self._webhooks.pop(int(channel_id), None)
+        self._unavailable.pop(int(channel_id), None)
+
+    async def verify(self, channel):
+        """Drop the cached webhook if it no longer exists in the channel (on_webhooks_update).
+        The event also fires for the bot's own create_webhook, so the cache is only dropped when it is stale"""
+        webhook = self._webhooks.get(channel.id)
+        if webhook is None:
+            self._unavailable.pop(channel.id, None)
+            return
+        try:
+            if any(existing.id == webhook.id for existing in await channel.webhooks()):
+                return
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+        self.forget(channel.id)
+
+    async def get_webhook(self, channel) -> Optional[discord.Webhook]:
+        """Get the channel's crosschat webhook, creating it on first use"""
+        webhook = self._webhooks.get(channel.id)
+        if webhook:
+            return webhook
+
+        failed_at = self._unavailable.get(channel.id)
+        if failed_at and time.monotonic() - failed_at < self.retry_after:
+            return None
+
+        if not channel.permissions_for(channel.guild.me).manage_webhooks:
+            self._unavailable[channel.id] = time.monotonic()
+            print(f"WEBHOOK: Missing Manage Webhooks in #{channel.name} ({channel.guild.name}) - using channel.send")
+            return None
+
+        try:
+            for existing in await channel.webhooks():
+                if existing.name == WEBHOOK_NAME and existing.token and existing.user and existing.user.id == channel.guild.me.id:
+                    webhook = existing
+                    self.reused += 1
+                    break
+            if webhook is None:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="SynapseChat crosschat delivery")
+                self.provisioned += 1
+                print(f"WEBHOOK: Created crosschat webhook in #{channel.name} ({channel.guild.name})")
+        except (discord.Forbidden, discord.HTTPException) as e:
+            self._unavailable[channel.id] = time.monotonic()
+            print(f"WEBHOOK_ERROR: Could not provision webhook in {channel.id}: {e}")
+            return None
+
+        self._webhooks[channel.id] = webhook
+        self._unavailable.pop(channel.id, None)
+        return webhook
+
+    @staticmethod
+    def display_name(author, guild) -> str:
+        """Webhook username: author and origin server, within Discord's 80 character limit"""
+        name = _RESERVED_NAMES.sub(lambda m: m.group(0)[0] + '\u200b' + m.group(0)[1:], f"{author.display_name} • {guild.name}")
+        return name[:80]
+
+    async def send(self, channel, message, files_factory: Callable[[], List[discord.File]] = None, **kwargs):
+        """Send via the channel's webhook as the message author, or via channel.send as fallback.
+        files_factory rebuilds the attachments if the webhook send consumed them and the send falls back"""
+        webhook = await self.get_webhook(channel) if self.enabled else None
+        if webhook is None:
+            self.fallback_sends += 1
+            return await channel.send(**kwargs)
+
+        # Webhook executions take no nonce - the local delivered-set check covers them
+        nonce = kwargs.pop('nonce', None)
+
+        try:
+            sent = await webhook.send(
+                username=self.display_name(message.author, message.guild),
+                avatar_url=message.author.display_avatar.url,
+                allowed_mentions=discord.AllowedMentions.none(),
+                wait=True,
+                **kwargs
+            )
+            self.webhook_sends += 1
+            return sent
+        except discord.NotFound:
+            # Webhook was deleted - drop it and fall back for this send
+            self.forget(channel.id)
+            if kwargs.get('files'):
+                # The failed webhook send already read and closed the files
+                if files_factory is None:
+                    raise
+                kwargs['files'] = files_factory()
+            self.fallback_sends += 1
+            return await channel.send(nonce=nonce, **kwargs)
+
+    async def edit(self, channel, message_id: int, **kwargs) -> bool:
+        """Edit a message through the channel's webhook - False if it was not sent by the webhook"""
+        webhook = self._webhooks.get(channel.id)
+        if webhook is None and self.enabled:
+            # The cache is in memory only - resolve the webhook again after a restart or webhooks update
+            webhook = await self.get_webhook(channel)
+        if webhook is None:
+            return False
+        try:
+            await webhook.edit_message(message_id, **kwargs)
+        except (discord.NotFound, discord.Forbidden):
+            # Sent with channel.send (fallback or before webhook mode) - only the bot can edit it
+            return False
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get webhook delivery statistics"""
+        return {
+            'enabled': self.enabled,
+            'cached_webhooks': len(self._webhooks),
+            'fallback_channels': len(self._unavailable),
+            'webhook_sends': self.webhook_sends,
+            'fallback_sends': self.fallback_sends,
+            'provisioned': self.provisioned,
+            'reused': self.reused
+        }
+
+# Global webhook delivery instance
+webhook_delivery = WebhookDelivery()
@@ -0,0 +1,192 @@
+"""
+Write-Behind Crosschat Message Logger
+Coalesces every update for a message_id into one document and flushes batches with bulk_write
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+class WriteBehindLogger:
+    """Buffers crosschat_messages updates in memory and flushes them every N ms or M ops"""
+
+    def __init__(self, flush_interval_ms: int = None, max_batch: int = None, max_pending: int = None):
+        self.async_db = None
+        self.flush_interval = (flush_interval_ms or int(os.environ.get('CROSSCHAT_LOG_FLUSH_MS', 250))) / 1000
+        self.max_batch = max_batch or int(os.environ.get('CROSSCHAT_LOG_MAX_BATCH', 200))
+        self.max_pending = max_pending or int(os.environ.get('CROSSCHAT_LOG_MAX_PENDING', 20000))
+
+        # message_id -> merged $set fields (dicts keep insertion order = oldest first)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ops_since_flush = 0
+        self._wakeup = None
+        self._task = None
+        self._flush_lock = None
+
+        # Statistics
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_docs = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def attach(self, async_db):
+        """Attach the async database handler used for flushing"""
+        self.async_db = async_db
+
+    def start(self):
+        """Start the background flush task on the running loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+        print(f"WRITE_BEHIND: Logger started (flush every {int(self.flush_interval * 1000)}ms or {self.max_batch} ops)")
+
+    def log(self, message_data: Dict[str, Any]) -> bool:
+        """Queue an update for message_data['message_id'] - merged with any pending update"""
+        if not self.async_db:
+            return False
+
+        message_id = message_data.get('message_id')
+        if not message_id:
+            return False
+        message_id = str(message_id)
+
+        if self._task is None or self._task.done():
+            self.start()
+
+        self.enqueued += 1
+        pending = self._pending.get(message_id)
+        if pending is not None:
+            pending.update(message_data)
+            self.coalesced += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                # Shed the oldest update rather than grow without bound during an outage
+                oldest = next(iter(self._pending))
+                del self._pending[oldest]
+                self.dropped += 1
+            pending = dict(message_data)
+            pending.setdefault('timestamp', datetime.utcnow())
+            self._pending[message_id] = pending
+
+        self._ops_since_flush += 1
+        if self._ops_since_flush >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    def get_pending(self, message_id) -> Optional[Dict[str, Any]]:
+        """Get the not-yet-flushed document for a message, if any"""
+        pending = self._pending.get(str(message_id))
+        return dict(pending) if pending is not None else None
+
+    async def _flush_loop(self):
+        """Flush whenever the interval elapses or the op threshold is reached"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"WRITE_BEHIND_ERROR: Flush loop error: {e}")
+
+    async def flush(self) -> int:
+        """Write all pending documents with one unordered bulk_write"""
+        if not self.async_db:
+            return 0
+
+        async with self._flush_lock:
+            # Checked under the lock - an in-flight flush may requeue its batch before releasing it
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = {}
+            self._ops_since_flush = 0
+
+            started = time.perf_counter()
+            try:
+                ok = await self.async_db.bulk_upsert_crosschat_messages(batch)
+            except asyncio.CancelledError:
+                # Upserts are idempotent - writing the batch again on the final flush is safe
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                print(f"WRITE_BEHIND_ERROR: Flush raised: {e}")
+                ok = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            self.flushes += 1
+            self.last_flush_ms = round(elapsed_ms, 2)
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+            self.total_flush_ms += elapsed_ms
+
+            if ok:
+                self.flushed_docs += len(batch)
+                return len(batch)
+
+            self.failed_flushes += 1
+            self._requeue(batch)
+            print(f"WRITE_BEHIND_ERROR: Flush of {len(batch)} documents failed - requeued")
+            return 0
+
+    def _requeue(self, batch: Dict[str, Dict[str, Any]]):
+        """Put a batch that was not written back ahead of newer updates - those win over it field by field"""
+        for message_id, fields in self._pending.items():
+            if message_id in batch:
+                batch[message_id].update(fields)
+            else:
+                batch[message_id] = fields
+        self._pending = batch
+
+        # Shed the oldest updates rather than grow without bound during an outage
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            for message_id in list(itertools.islice(self._pending, excess)):
+                del self._pending[message_id]
+            self.dropped += excess
+
+    async def stop(self):
+        """Stop the flush task and write out everything still pending"""
+        if self._task:
+            task, self._task = self._task, None
+            task.cancel()
+            # Let an in-flight flush requeue its batch before the final flush
+            await asyncio.gather(task, return_exceptions=True)
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and flush latency statistics"""
+        return {
+            'queue_depth': len(self._pending),
+            'enqueued': self.enqueued,
+            'coalesced': self.coalesced,
+            'flushes': self.flushes,
+            'flushed_docs': self.flushed_docs,
+            'failed_flushes': self.failed_flushes,
+            'dropped': self.dropped,
+            'last_flush_ms': self.last_flush_ms,
+            'max_flush_ms': round(self.max_flush_ms, 2),
+            'avg_flush_ms': round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            'docs_per_flush': round(self.flushed_docs / self.flushes, 2) if self.flushes else 0.0
+        }
+
+# Global logger instance
+message_logger = WriteBehindLogger()